@@ -0,0 +1 @@
+from .anomaly_detector import AnomalyDetector
\ No newline at end of file
@@ -0,0 +1,172 @@
+import numpy as np
+
+# linha de base por média e variância móveis exponenciais (EWMA/EWMV)
+# amostra é anômala quando se afasta da média mais que threshold desvios padrão, após warmup amostras
+# desvio padrão mínimo de minStd vezes a média evita alarmes em séries quase constantes (ex: intervalo fixo de ping)
+class EwmaDetector:
+
+    def __init__(self, alpha=0.05, threshold=4.0, warmup=30, minStd=0.01):
+        self.alpha = alpha # peso da amostra nova
+        self.threshold = threshold
+        self.warmup = warmup
+        self.minStd = minStd
+        self.n = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.active = False # última amostra foi anômala (evento já emitido para o episódio)
+
+    # retorna desvio padrão da linha de base
+    def getStd(self):
+        return max(float(np.sqrt(self.var)), self.minStd * abs(self.mean), 1e-9)
+
+    # atualiza linha de base, retorna True se a amostra é anômala
+    # amostras anômalas entram limitadas a threshold desvios padrão: picos isolados quase não mudam a linha de base,
+    # mas uma mudança de nível persistente é absorvida aos poucos
+    def update(self, value):
+        self.n += 1
+        if self.n == 1:
+            self.mean = value
+            return False
+
+        deviation = value - self.mean
+        limit = self.threshold * self.getStd()
+        anomalous = self.n > self.warmup and abs(deviation) > limit
+
+        if anomalous:
+            deviation = limit if deviation > 0 else -limit
+        self.mean += self.alpha * deviation
+        self.var = (1 - self.alpha) * (self.var + self.alpha * deviation * deviation)
+
+        return anomalous
+
+# CUSUM bilateral sobre a amostra padronizada pela linha de base EWMA: detecta mudanças de nível persistentes
+# pequenas demais para o limite do EwmaDetector; drift e threshold em desvios padrão
+class CusumDetector:
+
+    def __init__(self, drift=0.5, threshold=8.0):
+        self.drift = drift
+        self.threshold = threshold
+        self.high = 0.0 # soma acumulada de desvios para cima
+        self.low = 0.0 # soma acumulada de desvios para baixo
+
+    # atualiza somas com a amostra padronizada, retorna "up", "down" ou None (somas reiniciam após uma mudança)
+    def update(self, score):
+        self.high = max(0.0, self.high + score - self.drift)
+        self.low = max(0.0, self.low - score - self.drift)
+
+        if self.high > self.threshold:
+            self.high = self.low = 0.0
+            return "up"
+
+        if self.low > self.threshold:
+            self.high = self.low = 0.0
+            return "down"
+
+        return None
+
+# detecta rajadas de perda: minBurst ou mais perdas consecutivas, evento emitido quando a rajada termina
+class LossBurstDetector:
+
+    def __init__(self, minBurst=3):
+        self.minBurst = minBurst
+        self.run = 0 # perdas consecutivas atuais
+        self.start = None # tempo da primeira perda da rajada
+
+    # registra perdas (lost > 0) ou sucesso (lost = 0), retorna (início, tamanho) da rajada encerrada ou None
+    def update(self, time, lost):
+        if lost > 0:
+            self.start = time if self.run == 0 else self.start
+            self.run += lost
+            return None
+
+        burst = (self.start, self.run) if self.run >= self.minBurst else None
+        self.run = 0
+
+        return burst
+
+# detectores de anomalias em fluxo, custo O(1) por amostra: EWMA e CUSUM para cada métrica (rtt, intervalo, taxa de pacotes)
+# e rajadas de perda; gera eventos (tempo, métrica, detector, linha de base, observado) guardados no estado agregado do analisador
+# amostras anômalas consecutivas formam um único evento EWMA (início do episódio)
+# rate: pacotes por segundo em intervalos de rateInterval s, avaliado quando o intervalo termina
+class AnomalyDetector:
+
+    def __init__(self, alpha=0.05, threshold=4.0, warmup=30, drift=0.5, cusumThreshold=8.0, minBurst=3, rateInterval=1.0, maxEvents=10000):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.drift = drift
+        self.cusumThreshold = cusumThreshold
+        self.minBurst = minBurst
+        self.rateInterval = int(rateInterval * 1e9) # em ns
+        self.maxEvents = maxEvents # eventos além do limite são só contados
+        self.metrics = {} # métrica -> (EwmaDetector, CusumDetector)
+        self.loss = LossBurstDetector(minBurst)
+        self.rateBin = None # intervalo de taxa atual
+        self.rateCount = 0 # pacotes no intervalo atual
+        self.events = []
+        self.counts = {} # eventos por métrica
+
+    # cria detector vazio com a mesma configuração (um por estado agregado)
+    def new(self):
+        return AnomalyDetector(self.alpha, self.threshold, self.warmup, self.drift, self.cusumThreshold, self.minBurst,
+                               self.rateInterval / 1e9, self.maxEvents)
+
+    # configuração, usada na identidade de parciais e checkpoints
+    def __repr__(self):
+        return (f"AnomalyDetector(alpha={self.alpha}, threshold={self.threshold}, warmup={self.warmup}, drift={self.drift}, "
+                f"cusumThreshold={self.cusumThreshold}, minBurst={self.minBurst}, rateInterval={self.rateInterval / 1e9})")
+
+    # registra evento, tempo em ns
+    def addEvent(self, time, metric, detector, baseline, observed):
+        self.counts[metric] = self.counts.get(metric, 0) + 1
+
+        if len(self.events) < self.maxEvents:
+            self.events.append({"time": time / 1e9, "metric": metric, "detector": detector, "baseline": baseline, "observed": observed})
+
+    # atualiza detectores de uma métrica com uma amostra (tempo em ns)
+    def update(self, metric, time, value):
+        if metric not in self.metrics:
+            self.metrics[metric] = (EwmaDetector(self.alpha, self.threshold, self.warmup), CusumDetector(self.drift, self.cusumThreshold))
+        ewma, cusum = self.metrics[metric]
+
+        baseline, std = ewma.mean, ewma.getStd()
+        anomalous = ewma.update(value)
+        if anomalous and not ewma.active:
+            self.addEvent(time, metric, "ewma", baseline, value)
+        elif not anomalous and ewma.n > self.warmup:
+            change = cusum.update((value - baseline) / std)
+            if change is not None:
+                self.addEvent(time, metric, f"cusum.{change}", baseline, value)
+        ewma.active = anomalous
+
+    # registra perdas antes de um pacote recebido (lost = 0 encerra rajada)
+    def updateLoss(self, time, lost):
+        burst = self.loss.update(time, lost)
+        if burst is not None:
+            self.addEvent(burst[0], "loss", "burst", 0, burst[1])
+
+    # conta pacote no intervalo de taxa, avalia taxa do intervalo anterior quando um novo começa
+    # intervalos vazios entre os dois contam como uma única amostra de taxa 0 (custo constante mesmo após longos silêncios)
+    def updateRate(self, time):
+        current = time // self.rateInterval
+
+        if self.rateBin is not None and current > self.rateBin:
+            self.update("rate", self.rateBin * self.rateInterval, self.rateCount / (self.rateInterval / 1e9))
+            if current > self.rateBin + 1:
+                self.update("rate", (self.rateBin + 1) * self.rateInterval, 0.0)
+            self.rateCount = 0
+
+        self.rateBin = current if self.rateBin is None else max(self.rateBin, current)
+        self.rateCount += 1
+
+    # combina eventos de outra captura (detectores não são combinados, cada captura tem sua linha de base)
+    def merge(self, other):
+        self.events = sorted(self.events + other.events, key=lambda event: event["time"])[:self.maxEvents]
+        for metric, n in other.counts.items():
+            self.counts[metric] = self.counts.get(metric, 0) + n
+
+        return self
+
+    # retorna contagem de eventos por métrica (ex: anomalies.rtt)
+    def getMetrics(self):
+        return {f"anomalies.{metric}": n for metric, n in sorted(self.counts.items())}
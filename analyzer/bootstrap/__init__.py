@@ -0,0 +1 @@
+from .bootstrap import Bootstrap
\ No newline at end of file
@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+
+# estatísticas com intervalo de confiança: nome -> quantil (None = média)
+STATISTICS = {"mean": None,
+              "median": 0.5,
+              "p99": 0.99
+              }
+
+BATCH_ELEMENTS = 2**22 # elementos por bloco de reamostragens (memória de cada bloco em cada processo)
+WINDOW = 6 # erros padrão da posição de cada quantil cobertos por grupos finos na reamostragem por contagens
+
+# reamostragem exata: sorteia índices das amostras com reposição, em blocos de reamostragens (matriz reamostragens x n)
+# retorna distribuição de cada estatística (executado em processo separado)
+def resampleExact(args):
+    data, resamples, seed = args
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    quantiles = [q for q in STATISTICS.values() if q is not None]
+    batch = max(1, BATCH_ELEMENTS // n)
+    results = {name: np.empty(resamples) for name in STATISTICS}
+
+    for start in range(0, resamples, batch):
+        stop = min(start + batch, resamples)
+        sample = data[rng.integers(0, n, size=(stop - start, n))]
+        values = np.quantile(sample, quantiles, axis=1, method="inverted_cdf")
+
+        for name, q in STATISTICS.items():
+            results[name][start:stop] = sample.mean(axis=1) if q is None else values[quantiles.index(q)]
+
+    return results
+
+# reamostragem por contagens: cada reamostragem é um sorteio multinomial das n amostras entre os grupos de valores,
+# custo proporcional à quantidade de grupos e não de amostras; quantis pela contagem acumulada (retorna distribuição de cada estatística)
+def resampleBinned(args):
+    values, counts, resamples, seed = args
+    rng = np.random.default_rng(seed)
+    n = int(counts.sum())
+    probabilities = counts / n
+    batch = max(1, BATCH_ELEMENTS // len(values))
+    results = {name: np.empty(resamples) for name in STATISTICS}
+
+    for start in range(0, resamples, batch):
+        stop = min(start + batch, resamples)
+        sample = rng.multinomial(n, probabilities, size=stop - start)
+        cumulative = np.cumsum(sample, axis=1)
+
+        for name, q in STATISTICS.items():
+            if q is None:
+                results[name][start:stop] = sample @ values / n
+            else:
+                rank = max(int(np.ceil(q * n)), 1) # menor valor com pelo menos rank amostras até ele (inverted_cdf)
+                results[name][start:stop] = values[np.minimum((cumulative < rank).sum(axis=1), len(values) - 1)]
+
+    return results
+
+# intervalos de confiança bootstrap (percentil) da média, mediana e p99 de amostras de tempo (rtt, intervalo, jitter),
+# sem supor distribuição normal como mean ± std/sqrt(n)
+# até exactLimit elementos (amostras x reamostragens) a reamostragem é exata; acima, as amostras ordenadas são agrupadas em até bins
+# grupos (valor = média do grupo, exato quando há até bins valores distintos) e cada reamostragem é um sorteio multinomial
+# reamostragens divididas entre workers processos acima de parallelLimit elementos, cada um com semente independente
+class Bootstrap:
+
+    def __init__(self, resamples=10000, confidence=0.95, seed=None, workers=None, bins=2048, exactLimit=2 * 10**7, parallelLimit=10**7):
+        self.resamples = resamples
+        self.confidence = confidence
+        self.seed = seed
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.bins = bins
+        self.exactLimit = exactLimit
+        self.parallelLimit = parallelLimit
+
+    # agrupa amostras em valores e contagens: valores distintos ou grupos das amostras ordenadas
+    # metade dos grupos com mesma quantidade de amostras, a outra metade dividida entre os quantis, em grupos finos a até
+    # WINDOW erros padrão da posição de cada quantil (a variação do quantil reamostrado é menor que um grupo grosso)
+    def getBins(self, data):
+        values, counts = np.unique(data, return_counts=True)
+        if len(values) <= self.bins:
+            return values, counts
+
+        n = len(data)
+        quantiles = [q for q in STATISTICS.values() if q is not None]
+        starts = [np.linspace(0, n, self.bins // 2 + 1)]
+        for q in quantiles:
+            error = WINDOW * np.sqrt(n * q * (1 - q))
+            starts.append(np.linspace(max(q * n - error, 0), min(q * n + error, n), self.bins // (2 * len(quantiles)) + 1))
+
+        starts = np.unique(np.concatenate(starts).astype(np.int64))
+        counts = np.diff(starts)
+
+        return np.add.reduceat(np.sort(data), starts[:-1]) / counts, counts
+
+    # retorna distribuição bootstrap de cada estatística, reamostragens divididas entre processos
+    def resample(self, data):
+        exact = len(data) * self.resamples <= self.exactLimit
+
+        if exact:
+            function, sampleArgs, size = resampleExact, (data,), len(data)
+        else:
+            values, counts = self.getBins(data)
+            function, sampleArgs, size = resampleBinned, (values, counts), len(values)
+
+        workers = min(self.workers, self.resamples) if size * self.resamples > self.parallelLimit else 1
+        seeds = np.random.SeedSequence(self.seed).spawn(workers)
+        shares = [len(share) for share in np.array_split(np.arange(self.resamples), workers)]
+        jobs = [sampleArgs + (share, seed) for share, seed in zip(shares, seeds)]
+
+        if workers == 1:
+            parts = [function(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(function, jobs))
+
+        return {name: np.concatenate([part[name] for part in parts]) for name in STATISTICS}, "exact" if exact else "binned"
+
+    # retorna estimativa e intervalo de confiança de cada estatística (ex: mean, mean.low, mean.high), None sem amostras
+    def getIntervals(self, data):
+        data = np.asarray(data, dtype=float)
+        if data.size == 0:
+            return None
+
+        distributions, method = self.resample(data)
+        alpha = (1 - self.confidence) / 2
+        intervals = {"n": int(data.size), "resamples": self.resamples, "confidence": self.confidence, "method": method}
+
+        for name, q in STATISTICS.items():
+            low, high = np.quantile(distributions[name], [alpha, 1 - alpha])
+            intervals[name] = float(np.mean(data)) if q is None else float(np.quantile(data, q, method="inverted_cdf"))
+            intervals[f"{name}.low"] = float(low)
+            intervals[f"{name}.high"] = float(high)
+
+        return intervals
@@ -0,0 +1 @@
+from .capture_correlator import CaptureCorrelator
\ No newline at end of file
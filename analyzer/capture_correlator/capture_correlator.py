@@ -0,0 +1,202 @@
+from collections import deque
+import hashlib
+import heapq
+import struct
+import numpy as np
+from analyzer.pcap_index import PcapIndex
+from analyzer.packet_filter import PacketFilter
+from analyzer.packet_filter.packet_filter import ETHERTYPE_IPV4, ETHERTYPE_IPV6
+from analyzer.online_stats import OnlineStats
+from analyzer.prefix_trie.prefix_trie import IPV4_MAPPED, intToIp
+
+# chaves de identidade do pacote usadas na junção
+# icmp: (src, dst, tipo, id, seq) do ICMP/ICMPv6; ipid: (src, dst, protocolo, IP ID, hash do payload IP), serve para qualquer protocolo
+# campos alterados no caminho (TTL, hop limit, checksum do IP) não fazem parte da chave
+KEYS = ["icmp", "ipid"]
+
+ICMP_PROTOS = (1, 58) # ICMP, ICMPv6
+
+# correlaciona capturas do mesmo tráfego feitas em pontos diferentes do caminho (ex: h1-h3.pcap e h2-h4.pcap)
+# capturas consecutivas formam um segmento; cada segmento é uma junção em fluxo (sort-merge pelo tempo) com tabela hash limitada
+# à janela maxDelay, então a memória depende da taxa de pacotes e não do tamanho das capturas
+# para cada fluxo (src, dst) de cada segmento: atraso de um sentido, perda no segmento e diferença estimada entre os relógios
+class CaptureCorrelator:
+
+    def __init__(self, paths, key="icmp", maxDelay=1.0, maxPending=100000):
+        if key not in KEYS:
+            raise ValueError(f"Unknown correlation key: {key}")
+
+        if len(paths) < 2:
+            raise ValueError("Correlation requires at least two captures")
+
+        self.paths = list(paths)
+        self.key = key
+        self.maxDelay = int(maxDelay * 1e9) # maior atraso + diferença entre relógios esperados, em ns
+        self.maxPending = maxPending # limite de pacotes aguardando par em cada lado, os mais antigos são descartados
+        self.segments = None
+
+    # extrai chave de identidade dos bytes do registro (src e dst inteiros nas duas primeiras posições), None se o pacote não serve para a chave
+    def getPacketKey(self, raw, linkType):
+        etherType, offset = PacketFilter.getNetworkLayer(raw, linkType)
+
+        if etherType == ETHERTYPE_IPV4 and len(raw) >= offset + 20:
+            src = IPV4_MAPPED | int.from_bytes(raw[offset + 12:offset + 16], "big")
+            dst = IPV4_MAPPED | int.from_bytes(raw[offset + 16:offset + 20], "big")
+            ipId = struct.unpack_from("!H", raw, offset + 4)[0]
+            payload = offset + (raw[offset] & 0x0F) * 4
+        elif etherType == ETHERTYPE_IPV6 and len(raw) >= offset + 40:
+            src = int.from_bytes(raw[offset + 8:offset + 24], "big")
+            dst = int.from_bytes(raw[offset + 24:offset + 40], "big")
+            ipId = struct.unpack_from("!I", raw, offset)[0] & 0xFFFFF # flow label, IPv6 não tem IP ID
+            payload = offset + 40
+        else:
+            return None
+
+        proto, position = PacketFilter.getTransportLayer(raw, etherType, offset)
+
+        if self.key == "icmp":
+            if proto not in ICMP_PROTOS or position is None or len(raw) < position + 8:
+                return None
+            icmpType = raw[position]
+            icmpId, seq = struct.unpack_from("!HH", raw, position + 4)
+            return (src, dst, icmpType, icmpId, seq)
+
+        digest = hashlib.blake2b(raw[payload:], digest_size=8).digest()
+
+        return (src, dst, proto, ipId, digest)
+
+    # lê captura em sequência sem decodificar: (tempo em ns, chave) de cada pacote com chave
+    def streamKeys(self, path):
+        index = PcapIndex(path)
+
+        for _, time, _, raw in index.streamRecords():
+            packetKey = self.getPacketKey(raw, index.linkType)
+            if packetKey is not None:
+                yield time, packetKey
+
+    # junção em fluxo de duas capturas (upstream a, downstream b): retorna estado por fluxo (src, dst)
+    # delays: tempo em b - tempo em a dos pacotes vistos nas duas capturas (inclui diferença entre relógios), em ms
+    # onlyA/onlyB: pacotes vistos em uma só captura dentro da janela
+    def join(self, pathA, pathB):
+        flows = {}
+        pending = ({}, {}) # chave -> deque de tempos, por lado
+        order = (deque(), deque()) # (tempo, chave) na ordem de chegada, por lado, para expirar a janela
+
+        def getFlow(src, dst):
+            if (src, dst) not in flows:
+                flows[(src, dst)] = {"delays": OnlineStats(), "onlyA": 0, "onlyB": 0}
+            return flows[(src, dst)]
+
+        # descarta pendentes mais antigos que limit (sem par dentro da janela)
+        def expire(side, limit):
+            while order[side] and (order[side][0][0] < limit or len(order[side]) > self.maxPending):
+                time, packetKey = order[side].popleft()
+                times = pending[side].get(packetKey)
+                if times and times[0] == time:
+                    times.popleft()
+                    if not times:
+                        del pending[side][packetKey]
+                    getFlow(packetKey[0], packetKey[1])["onlyB" if side else "onlyA"] += 1
+
+        streams = (((time, 0, packetKey) for time, packetKey in self.streamKeys(pathA)),
+                   ((time, 1, packetKey) for time, packetKey in self.streamKeys(pathB)))
+
+        for time, side, packetKey in heapq.merge(*streams, key=lambda item: item[0]):
+            expire(0, time - self.maxDelay)
+            expire(1, time - self.maxDelay)
+
+            other = 1 - side
+            times = pending[other].get(packetKey)
+            if times:
+                # par encontrado: sai dos pendentes do outro lado, a entrada em order é ignorada ao expirar
+                matched = times.popleft()
+                if not times:
+                    del pending[other][packetKey]
+                delay = time - matched if side == 1 else matched - time
+                getFlow(packetKey[0], packetKey[1])["delays"].add(delay / 1e6)
+            else:
+                pending[side].setdefault(packetKey, deque()).append(time)
+                order[side].append((time, packetKey))
+
+        expire(0, np.inf)
+        expire(1, np.inf)
+
+        return flows
+
+    # estima diferença entre relógios (b - a) em ms a partir de fluxos nos dois sentidos, supondo atraso mínimo simétrico:
+    # fluxo a -> b mede atraso + offset, fluxo b -> a mede offset - atraso, o offset fica no meio dos extremos
+    # retorna None se não há tráfego nos dois sentidos
+    @staticmethod
+    def estimateClockOffset(flows):
+        estimates = []
+
+        for (src, dst), flow in flows.items():
+            reverse = flows.get((dst, src))
+            if src < dst and reverse is not None and flow["delays"].n > 0 and reverse["delays"].n > 0:
+                if flow["delays"].min >= reverse["delays"].max:
+                    estimates.append((flow["delays"].min + reverse["delays"].max) / 2)
+                elif reverse["delays"].min >= flow["delays"].max:
+                    estimates.append((reverse["delays"].min + flow["delays"].max) / 2)
+
+        return float(np.median(estimates)) if estimates else None
+
+    # executa as junções de cada segmento (capturas consecutivas) e retorna lista de segmentos
+    def correlate(self):
+        if self.segments is not None:
+            return self.segments
+
+        self.segments = []
+        for pathA, pathB in zip(self.paths, self.paths[1:]):
+            flows = self.join(pathA, pathB)
+            self.segments.append({"from": pathA, "to": pathB, "flows": flows, "clockOffset": self.estimateClockOffset(flows)})
+
+        return self.segments
+
+    # retorna uma linha por segmento e fluxo: sentido, atraso de um sentido corrigido pelo offset (ms), perda no segmento e offset
+    # sem tráfego nos dois sentidos os relógios são considerados sincronizados (clockOffset 0)
+    def getSummary(self):
+        rows = []
+
+        for number, segment in enumerate(self.correlate()):
+            offset = segment["clockOffset"]
+            for (src, dst), flow in segment["flows"].items():
+                stats = flow["delays"].getStats()
+                shift = offset or 0
+                forward = stats["mean"] >= shift if stats["n"] > 0 else flow["onlyA"] >= flow["onlyB"] # a -> b
+                # atrasos corrigidos: a -> b é tempo em b - tempo em a - offset, b -> a é o oposto
+                delays = sorted(((stats["min"] - shift), (stats["max"] - shift)) if forward else (shift - stats["max"], shift - stats["min"]))
+                sent = stats["n"] + (flow["onlyA"] if forward else flow["onlyB"])
+                lost = flow["onlyA"] if forward else flow["onlyB"]
+
+                rows.append({"segment": number,
+                             "from": segment["from"] if forward else segment["to"],
+                             "to": segment["to"] if forward else segment["from"],
+                             "src": intToIp(src),
+                             "dst": intToIp(dst),
+                             "matched": stats["n"],
+                             "delay.mean": (stats["mean"] - shift) * (1 if forward else -1),
+                             "delay.min": delays[0] if stats["n"] > 0 else 0,
+                             "delay.max": delays[1] if stats["n"] > 0 else 0,
+                             "delay.std": stats["std"],
+                             "loss.packets": lost,
+                             "loss.rate": lost/sent * 100 if sent > 0 else 0,
+                             "unexpected": flow["onlyB"] if forward else flow["onlyA"], # vistos somente depois do segmento
+                             "clockOffset": offset if offset is not None else 0,
+                             "clockOffset.estimated": offset is not None
+                             })
+
+        return rows
+
+    # imprime atraso de um sentido, perda e offset de cada segmento
+    def printMetrics(self):
+        rows = self.getSummary()
+
+        for number, segment in enumerate(self.correlate()):
+            offset = segment["clockOffset"]
+            print(f"Segment {number}: {segment['from']} <-> {segment['to']}")
+            print(f"Clock offset: {offset:.6f} ms" if offset is not None else "Clock offset: unknown (no traffic in both directions), assuming 0")
+            for row in rows:
+                if row["segment"] == number:
+                    print(f"{row['src']} -> {row['dst']}: {row['matched']} packets, one-way delay mean {row['delay.mean']:.6f} ms "
+                          f"(min {row['delay.min']:.6f}, max {row['delay.max']:.6f}), loss {row['loss.packets']} ({row['loss.rate']:.2f}%)")
+            print()
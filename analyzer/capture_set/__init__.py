@@ -0,0 +1 @@
+from .capture_set import CaptureSet
\ No newline at end of file
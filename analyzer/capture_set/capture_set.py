@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import pickle
+import glob
+import os
+
+# conjunto de capturas analisadas em map-reduce: cada captura gera um estado agregado parcial (map),
+# guardado em cache no disco identificado pelo arquivo, e os parciais são combinados em tabela por captura e resumo geral (reduce)
+class CaptureSet:
+
+    def __init__(self, analyzerClass, paths, packetsMargin=None, cacheDir=None, workers=None, **options):
+        self.analyzerClass = analyzerClass
+        self.paths = self.expandPaths(paths)
+        self.packetsMargin = packetsMargin
+        self.cacheDir = cacheDir # diretório dos parciais (None = arquivo auxiliar ao lado de cada captura)
+        self.workers = workers
+        self.options = options # opções repassadas ao analisador (compact, index, window, packetFilter)
+        self.partials = None
+
+    # expande diretórios (*.pcap) e padrões glob em lista ordenada de capturas
+    @staticmethod
+    def expandPaths(paths):
+        paths = [paths] if isinstance(paths, str) else paths
+        expanded = []
+
+        for path in paths:
+            if os.path.isdir(path):
+                expanded += glob.glob(os.path.join(path, "*.pcap"))
+            elif glob.has_magic(path):
+                expanded += glob.glob(path)
+            else:
+                expanded.append(path)
+
+        return sorted(set(expanded))
+
+    # retorna id da captura a partir do nome do arquivo (sem extensão)
+    @staticmethod
+    def getCaptureId(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    # identidade do arquivo e da configuração da análise, parcial em cache só é válido se for igual
+    def getIdentity(self, path):
+        info = os.stat(path)
+
+        return {"path": os.path.realpath(path),
+                "size": info.st_size,
+                "mtime": info.st_mtime_ns,
+                "inode": info.st_ino,
+                "analyzer": self.analyzerClass.__name__,
+                "version": self.analyzerClass.stateVersion,
+                "packetsMargin": self.packetsMargin,
+                "options": repr(sorted(self.options.items()))
+                }
+
+    # retorna caminho do parcial em cache da captura
+    def getCachePath(self, path):
+        if self.cacheDir is None:
+            return f"{path}.{self.analyzerClass.__name__}.partial"
+
+        name = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()[:16]
+
+        return os.path.join(self.cacheDir, f"{self.getCaptureId(path)}-{name}.{self.analyzerClass.__name__}.partial")
+
+    # carrega parcial em cache, None se não existir ou não corresponder ao arquivo atual
+    def loadPartial(self, path):
+        try:
+            with open(self.getCachePath(path), "rb") as f:
+                partial = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        return partial["state"] if partial.get("identity") == self.getIdentity(path) else None
+
+    # grava parcial em cache de forma atômica
+    def savePartial(self, path, state):
+        cachePath = self.getCachePath(path)
+        tmpPath = cachePath + ".tmp"
+
+        try:
+            if self.cacheDir is not None:
+                os.makedirs(self.cacheDir, exist_ok=True)
+
+            with open(tmpPath, "wb") as f:
+                pickle.dump({"identity": self.getIdentity(path), "state": state}, f)
+
+            os.replace(tmpPath, cachePath)
+        except OSError as e:
+            print(f"Partial could not be saved: {e}")
+
+    # map: retorna estado parcial de cada captura, analisando (em processos paralelos) somente as que não estão em cache
+    def getPartials(self):
+        if self.partials is not None:
+            return self.partials
+
+        partials = {path: self.loadPartial(path) for path in self.paths}
+        missing = [path for path in self.paths if partials[path] is None]
+
+        if len(missing) > 1 and self.workers != 1:
+            # processos do pipeline de cada captura divididos entre as capturas em paralelo (total <= núcleos)
+            cpus = os.cpu_count() or 1
+            options = self.getAnalyzerOptions(max(1, cpus // min(self.workers or cpus, len(missing))))
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                states = list(executor.map(computePartial, [(self.analyzerClass, path, self.packetsMargin, options) for path in missing]))
+        else:
+            options = self.getAnalyzerOptions(self.workers)
+            states = [computePartial((self.analyzerClass, path, self.packetsMargin, options)) for path in missing]
+
+        for path, state in zip(missing, states):
+            self.savePartial(path, state)
+            partials[path] = state
+
+        self.partials = partials
+
+        return partials
+
+    # opções do analisador de cada captura, com workers processos de decodificação no pipeline
+    def getAnalyzerOptions(self, workers):
+        return dict(self.options, workers=workers) if self.options.get("pipeline") else self.options
+
+    # retorna linhas com as métricas de cada captura
+    def getTable(self):
+        return [self.getAnalyzerStub(path).getStateMetrics(state) for path, state in self.getPartials().items()]
+
+    # reduce: retorna estado combinado de todas as capturas
+    def reduce(self):
+        stub = self.getAnalyzerStub("all")
+        state = stub.newState()
+
+        for partial in self.getPartials().values():
+            stub.mergeState(state, partial)
+
+        return state
+
+    # retorna métricas de todas as capturas combinadas
+    def getSummary(self):
+        return self.getAnalyzerStub("all").getStateMetrics(self.reduce())
+
+    # analisador sem captura carregada, usado somente para combinar estados e calcular métricas
+    def getAnalyzerStub(self, path):
+        stub = self.analyzerClass.__new__(self.analyzerClass)
+        stub.id = self.getCaptureId(path)
+        stub.anomalyDetector = self.options.get("anomalyDetector")
+        stub.deduplicator = self.options.get("deduplicator")
+
+        return stub
+
+# calcula estado parcial de uma captura (executado em processo separado)
+def computePartial(args):
+    analyzerClass, path, packetsMargin, options = args
+    capture = analyzerClass(id=CaptureSet.getCaptureId(path), packetsMargin=packetsMargin, path=path, **options)
+
+    return capture.getPartial(capture.getState())
@@ -0,0 +1 @@
+from .cli import main
\ No newline at end of file
@@ -0,0 +1,4 @@
+import sys
+from analyzer.cli import main
+
+sys.exit(main())
@@ -0,0 +1,334 @@
+import argparse
+import sqlite3
+import json
+import os
+import sys
+import time
+from analyzer.packet_analyzer import PacketAnalyzer
+from analyzer.icmp_analyzer import IcmpAnalyzer
+from analyzer.tcp_analyzer import TcpAnalyzer
+from analyzer.capture_set import CaptureSet
+from analyzer.capture_correlator import CaptureCorrelator
+from analyzer.capture_correlator.capture_correlator import KEYS as CORRELATION_KEYS
+from analyzer.sampler import Sampler
+from analyzer.anomaly_detector import AnomalyDetector
+from analyzer.deduplicator import Deduplicator
+from analyzer.bootstrap import Bootstrap
+from analyzer.microburst_analyzer import MicroburstAnalyzer
+from analyzer.results_store import ResultsStore
+from analyzer.metrics_exporter import MetricsExporter
+from analyzer.sampler.sampler import METHODS as SAMPLING_METHODS
+
+# analisadores disponíveis pela linha de comando
+ANALYZERS = {"packet": PacketAnalyzer,
+             "icmp": IcmpAnalyzer,
+             "tcp": TcpAnalyzer
+             }
+
+FORMATS = ["json", "csv", "parquet"]
+
+# monta parser de argumentos da linha de comando
+def buildParser():
+    parser = argparse.ArgumentParser(prog="analyzer", description="Analyze .pcap captures and emit machine-readable metrics")
+    parser.add_argument("captures", nargs="+", help="capture files (.pcap), directories or glob patterns")
+    parser.add_argument("-a", "--analyzer", choices=ANALYZERS.keys(), default="packet", help="analyzer used on every capture")
+    parser.add_argument("-m", "--margin", type=int, default=None, help="ignore the first and last n packets of each capture")
+    parser.add_argument("--index", action="store_true", help="build/use a sidecar index (.idx.npz) and read only the selected packets")
+    parser.add_argument("--window", nargs=2, type=float, metavar=("START", "END"), default=None,
+                        help="analyze only packets between START and END seconds after the first packet (uses the index)")
+    parser.add_argument("--prefilter", action="store_true", help="drop packets the analyzer doesn't use (e.g. non-ICMP) from raw headers, before decoding")
+    parser.add_argument("--sample", choices=SAMPLING_METHODS, default=None,
+                        help="approximate analysis: decode only sampled records, summary metrics are scaled estimates with confidence intervals")
+    parser.add_argument("--every", type=int, default=None, help="systematic: 1 in N packets, time: 1 in N time slices")
+    parser.add_argument("--rate", type=float, default=None, help="random: probability of sampling each packet")
+    parser.add_argument("--slice", type=float, default=1.0, help="time: slice length in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (random sampling, start offset of systematic/time)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="read, decode and aggregate in parallel stages (prefetching reader thread, decode worker processes)")
+    parser.add_argument("--workers", type=int, default=None, help="decode worker processes for --pipeline, or captures analyzed in parallel with --aggregate "
+                             "(default: all cores, split between the captures and their pipelines)")
+    parser.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                        help="memory per keyed table (TCP/ICMP keys, retransmission counts), larger tables spill sorted runs to disk")
+    parser.add_argument("--dedup", nargs="?", type=float, const=0.01, default=None, metavar="SECONDS",
+                        help="drop duplicate packets (same IP packet seen again within SECONDS, default 0.01) from multi-interface captures")
+    parser.add_argument("--follow", action="store_true",
+                        help="incremental analysis of growing captures: resume from the checkpoint (.ckpt) and read only appended packets")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="map-reduce over all captures: one row per capture plus an 'all' row, partial results are cached per capture")
+    parser.add_argument("--cache", default=None, metavar="DIR", help="directory for cached partial results (default: next to each capture)")
+    parser.add_argument("--correlate", action="store_true",
+                        help="join captures of the same traffic taken at consecutive points of the path (in the given order): "
+                             "one-way delay, loss per segment and clock offset, one row per segment and flow")
+    parser.add_argument("--key", choices=CORRELATION_KEYS, default="icmp", help="packet identity used by --correlate")
+    parser.add_argument("--max-delay", type=float, default=1.0,
+                        help="--correlate: largest one-way delay plus clock offset in seconds, unmatched packets older than this are lost")
+    parser.add_argument("--anomalies", action="store_true",
+                        help="one pass with streaming detectors (EWMA, CUSUM, loss bursts) on RTT, interval, loss and packet rate: "
+                             "one row per event (time, metric, detector, baseline, observed) instead of the summary, works with --follow")
+    parser.add_argument("--threshold", type=float, default=4.0, help="--anomalies: EWMA threshold in standard deviations")
+    parser.add_argument("--bootstrap", nargs="?", type=int, const=10000, default=None, metavar="RESAMPLES",
+                        help="bootstrap confidence intervals for mean, median and p99 of RTT, interval and jitter (default 10000 resamples)")
+    parser.add_argument("--microbursts", action="store_true",
+                        help="detect microbursts: bytes per --burst-window above --burst-threshold of --line-rate (one summary row per capture)")
+    parser.add_argument("--line-rate", type=float, default=1000.0, metavar="MBPS", help="--microbursts: link capacity in Mbps")
+    parser.add_argument("--burst-window", type=float, default=100.0, metavar="MICROSECONDS", help="--microbursts: window length")
+    parser.add_argument("--burst-threshold", type=float, default=0.5, metavar="FRACTION", help="--microbursts: fraction of the line rate")
+    parser.add_argument("--per-flow", action="store_true", help="--microbursts: one row per burst and top flow instead of the summary")
+    parser.add_argument("--rtt", action="store_true", help="round trip time statistics")
+    parser.add_argument("--interval", action="store_true", help="arrival time interval statistics")
+    parser.add_argument("--jitter", action="store_true", help="RTT and interval based jitter statistics")
+    parser.add_argument("--loss", action="store_true", help="packet loss statistics")
+    parser.add_argument("--layers", action="store_true", help="amount of packets per protocol layer")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="json", help="output format")
+    parser.add_argument("-o", "--output", default=None, help="output file (stdout if omitted, required for parquet)")
+    parser.add_argument("--export", default=None, metavar="FILE",
+                        help="also write the summary as OpenMetrics text (e.g. a node-exporter textfile .prom), replaced atomically")
+    parser.add_argument("--export-interval", type=float, default=None, metavar="SECONDS",
+                        help="with --follow and --export: keep analyzing appended packets and refresh the export every SECONDS")
+    parser.add_argument("--prometheus", action="store_true", help="--export in the Prometheus text format instead of OpenMetrics")
+    parser.add_argument("--store", default=None, metavar="DB", help="also record the summary metrics in a SQLite results history")
+    parser.add_argument("--store-window", type=float, default=None, metavar="SECONDS",
+                        help="--store: also record the metrics of each time window of SECONDS (analysis of each capture only)")
+
+    return parser
+
+# retorna id da captura a partir do nome do arquivo (sem extensão)
+def getCaptureId(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+# analisa cada captura uma única vez e retorna lista de resumos
+# store: ResultsStore onde os resumos (com início e fim da captura) e, com storeWindow, as métricas de cada janela são gravados na execução run
+def analyzeCaptures(analyzerClass, paths, margin=None, rtt=False, interval=False, jitter=False, loss=False, layers=False, bootstrap=None,
+                    store=None, run=None, storeWindow=None, **options):
+    rows = []
+
+    for path in paths:
+        capture = analyzerClass(id=getCaptureId(path), packetsMargin=margin, path=path, **options)
+        rows.append(capture.getSummary(rtt=rtt, interval=interval, jitter=jitter, loss=loss, layers=layers, bootstrap=bootstrap))
+
+        if store is not None:
+            start = capture.getStartTime()
+            store.addRow(run, rows[-1], start, start + rows[-1]["totalTime"] / 1e3 if start is not None else None)
+            for windowStart, windowEnd, metrics in capture.getWindowMetrics(storeWindow) if storeWindow else []:
+                store.addRow(run, selectMetrics(metrics, rtt, interval, jitter, loss, layers), windowStart, windowEnd, storeWindow)
+        del capture # libera pacotes antes da próxima captura
+
+    return rows
+
+# prefixos das métricas de cada opção no resumo
+METRIC_PREFIXES = {"rtt": ("rtt.",),
+                   "interval": ("interval.",),
+                   "jitter": ("rttJitter.", "intervalJitter."),
+                   "loss": ("loss.",),
+                   "layers": ("layers.",)
+                   }
+
+# mantém somente métricas gerais e as selecionadas
+def selectMetrics(metrics, rtt=False, interval=False, jitter=False, loss=False, layers=False):
+    selected = {"rtt": rtt, "interval": interval, "jitter": jitter, "loss": loss, "layers": layers}
+    row = {}
+
+    for key, value in metrics.items():
+        prefix = key.split(".")[0] + "." if "." in key else None
+        option = next((name for name, prefixes in METRIC_PREFIXES.items() if prefix in prefixes), None)
+
+        if prefix is None or (option is not None and selected[option]):
+            row[key] = value
+
+    return row
+
+# analisa somente pacotes novos de cada captura (modo follow) e retorna lista de resumos com as métricas selecionadas
+def followCaptures(analyzerClass, paths, rtt=False, interval=False, jitter=False, loss=False, layers=False, **options):
+    rows = []
+
+    for path in paths:
+        capture = analyzerClass(id=getCaptureId(path), path=path, index=True, **options)
+        rows.append(selectMetrics(capture.follow(), rtt, interval, jitter, loss, layers))
+
+    return rows
+
+# detecta anomalias em uma passada por captura (ou somente nos pacotes novos com follow), retorna uma linha por evento
+def detectAnomalies(analyzerClass, paths, margin=None, follow=False, **options):
+    rows = []
+
+    for path in paths:
+        id = getCaptureId(path)
+        if follow:
+            capture = analyzerClass(id=id, path=path, **dict(options, index=True))
+            capture.follow()
+            events = capture.getAnomalyEvents(capture.followState)
+        else:
+            capture = analyzerClass(id=id, packetsMargin=margin, path=path, **options)
+            events = capture.getAnomalyEvents()
+        rows += [{"id": id, **event} for event in events]
+        del capture
+
+    return rows
+
+# modo follow contínuo: a cada exportInterval s analisa pacotes novos e substitui o arquivo exportado, até ser interrompido
+# store: ResultsStore, cada atualização é gravada como uma execução
+def exportLoop(analyzerClass, paths, exporter, exportInterval, store=None, **options):
+    try:
+        while True:
+            start = time.monotonic()
+            rows = followCaptures(analyzerClass, paths, **options)
+            exporter.write(rows)
+            if store is not None:
+                storeRows(store, store.startRun(analyzerClass.__name__), rows)
+            time.sleep(max(0, exportInterval - (time.monotonic() - start)))
+    except KeyboardInterrupt:
+        pass
+
+# grava linhas de resumo no histórico (sem tempo dos pacotes, as linhas ficam com o tempo da execução)
+def storeRows(store, run, rows):
+    for row in rows:
+        store.addRow(run, row)
+    store.flush()
+
+# detecta microrajadas em cada captura: uma linha de resumo por captura, ou uma linha por rajada e fluxo com perFlow
+def detectMicrobursts(paths, perFlow=False, **options):
+    rows = []
+
+    for path in paths:
+        microbursts = MicroburstAnalyzer(path, id=getCaptureId(path), **options)
+        rows += microbursts.getBurstRows(perFlow=True) if perFlow else [microbursts.getSummary()]
+
+    return rows
+
+# combina resultados parciais (em cache) de todas as capturas, retorna uma linha por captura e uma linha "all" com o total
+def aggregateCaptures(analyzerClass, paths, margin=None, cacheDir=None, rtt=False, interval=False, jitter=False, loss=False, layers=False,
+                      **options):
+    captureSet = CaptureSet(analyzerClass, paths, packetsMargin=margin, cacheDir=cacheDir, **options)
+    rows = captureSet.getTable() + [captureSet.getSummary()]
+
+    return [selectMetrics(row, rtt, interval, jitter, loss, layers) for row in rows]
+
+# grava resumos no formato escolhido
+def writeRows(rows, format="json", output=None):
+    if format == "json":
+        text = json.dumps(rows, indent=2)
+
+        if output:
+            with open(output, "w") as f:
+                f.write(text + "\n")
+        else:
+            print(text)
+        return
+
+    import pandas as pd
+    df = pd.DataFrame(rows)
+
+    if format == "csv":
+        df.to_csv(output if output else sys.stdout, index=False)
+
+    elif format == "parquet":
+        if not output:
+            print("Parquet output requires --output")
+            sys.exit(1)
+        df.to_parquet(output, engine="pyarrow", index=False)
+
+def main(argv=None):
+    args = buildParser().parse_args(argv)
+
+    packetFilter = True if args.prefilter else None
+    paths = args.captures if args.correlate else CaptureSet.expandPaths(args.captures) # correlação mantém a ordem do caminho
+    try:
+        sampler = Sampler(args.sample, every=args.every, rate=args.rate, seed=args.seed, sliceTime=args.slice) if args.sample else None
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    if sampler is not None and (args.aggregate or args.follow):
+        print("--sample scales the metrics of each capture, it can't be used with --aggregate or --follow")
+        sys.exit(1)
+
+    # follow lê todos os registros novos a partir do checkpoint, sempre com índice
+    if args.follow and (args.margin is not None or args.window is not None or args.pipeline or args.workers is not None
+                        or args.memory_budget is not None):
+        print("--follow reads every appended packet, it can't be used with --margin, --window, --pipeline, --workers or --memory-budget")
+        sys.exit(1)
+
+    deduplicator = Deduplicator(args.dedup) if args.dedup is not None else None
+    exporter = MetricsExporter(args.export, openMetrics=not args.prometheus) if args.export else None
+    if exporter is not None and (args.anomalies or args.correlate or args.microbursts):
+        print("--export writes summary metrics, it can't be used with --anomalies, --correlate or --microbursts")
+        sys.exit(1)
+
+    bootstrap = Bootstrap(args.bootstrap, workers=args.workers) if args.bootstrap is not None else None
+    if bootstrap is not None and (args.aggregate or args.follow or args.anomalies or args.correlate):
+        print("--bootstrap needs the samples of each capture, it can't be used with --aggregate, --follow, --anomalies or --correlate")
+        sys.exit(1)
+
+    if args.store and (args.anomalies or args.correlate or args.per_flow):
+        print("--store records summary metrics, it can't be used with --anomalies, --correlate or --per-flow")
+        sys.exit(1)
+
+    if args.store_window is not None and (not args.store or args.store_window <= 0 or args.aggregate or args.follow or args.microbursts):
+        print("--store-window requires --store, a positive length and the analysis of each capture (no --aggregate, --follow or --microbursts)")
+        sys.exit(1)
+
+    try:
+        store = ResultsStore(args.store) if args.store else None
+    except sqlite3.Error as e:
+        print(f"Error opening results store: {e}")
+        sys.exit(1)
+
+    if args.export_interval is not None:
+        if exporter is None or not args.follow:
+            print("--export-interval requires --follow and --export")
+            sys.exit(1)
+
+        exportLoop(ANALYZERS[args.analyzer], paths, exporter, args.export_interval, store=store, rtt=args.rtt, interval=args.interval,
+                   jitter=args.jitter, loss=args.loss, layers=args.layers, packetFilter=packetFilter, deduplicator=deduplicator)
+        if store is not None:
+            store.close()
+        return 0
+
+    analyzerName = MicroburstAnalyzer.__name__ if args.microbursts else ANALYZERS[args.analyzer].__name__
+    run = store.startRun(analyzerName, {key: value for key, value in vars(args).items() if value is not None}) if store else None
+
+    if args.anomalies:
+        rows = detectAnomalies(ANALYZERS[args.analyzer], paths, margin=args.margin, follow=args.follow, index=args.index,
+                               window=args.window, packetFilter=packetFilter, pipeline=args.pipeline,
+                               workers=args.workers, anomalyDetector=AnomalyDetector(threshold=args.threshold), deduplicator=deduplicator)
+    elif args.microbursts:
+        try:
+            rows = detectMicrobursts(paths, window=args.burst_window, lineRate=args.line_rate, threshold=args.burst_threshold,
+                                     perFlow=args.per_flow)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    elif args.correlate:
+        try:
+            rows = CaptureCorrelator(paths, key=args.key, maxDelay=args.max_delay).getSummary()
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    elif args.aggregate:
+        rows = aggregateCaptures(ANALYZERS[args.analyzer], paths, margin=args.margin, cacheDir=args.cache, rtt=args.rtt,
+                                 interval=args.interval, jitter=args.jitter, loss=args.loss, layers=args.layers, index=args.index,
+                                 window=args.window, packetFilter=packetFilter, pipeline=args.pipeline, workers=args.workers,
+                                 memoryBudget=args.memory_budget, deduplicator=deduplicator)
+    elif args.follow:
+        rows = followCaptures(ANALYZERS[args.analyzer], paths, rtt=args.rtt, interval=args.interval, jitter=args.jitter,
+                              loss=args.loss, layers=args.layers, packetFilter=packetFilter, deduplicator=deduplicator)
+    else:
+        rows = analyzeCaptures(ANALYZERS[args.analyzer], paths, margin=args.margin, rtt=args.rtt, interval=args.interval,
+                               jitter=args.jitter, loss=args.loss, layers=args.layers, index=args.index, window=args.window,
+                               packetFilter=packetFilter, pipeline=args.pipeline, workers=args.workers, sampler=sampler,
+                               memoryBudget=args.memory_budget, deduplicator=deduplicator, bootstrap=bootstrap, store=store, run=run,
+                               storeWindow=args.store_window)
+    writeRows(rows, args.format, args.output)
+
+    if exporter is not None:
+        exporter.write(rows)
+
+    if store is not None:
+        if args.aggregate or args.follow or args.microbursts:
+            storeRows(store, run, rows)
+        store.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+from .deduplicator import Deduplicator
\ No newline at end of file
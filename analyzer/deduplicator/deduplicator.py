@@ -0,0 +1,68 @@
+from collections import deque
+import hashlib
+from analyzer.packet_filter import PacketFilter
+from analyzer.packet_filter.packet_filter import ETHERTYPE_IPV4, ETHERTYPE_IPV6
+
+# eliminação de pacotes duplicados em capturas de várias interfaces (dois lados de uma bridge, interfaces em bonding):
+# o mesmo pacote visto de novo dentro de window s é descartado antes da decodificação
+# o hash cobre a camada de rede em diante, sem TTL/hop limit e checksum do IP (mudam entre os pontos de captura) e sem a camada de enlace;
+# pacotes não IP usam o quadro inteiro
+# hashes vistos ficam em conjunto limitado a maxEntries, expirados por tempo
+class Deduplicator:
+
+    def __init__(self, window=0.01, maxEntries=65536):
+        self.window = int(window * 1e9) # em ns, menor que o tempo de uma retransmissão real
+        self.maxEntries = maxEntries
+        self.seen = {} # hash -> tempo em ns da última ocorrência
+        self.order = deque() # (tempo, hash) na ordem de chegada, para expirar
+        self.duplicates = 0 # pacotes descartados
+
+    # cria deduplicador vazio com a mesma configuração (um por captura)
+    def new(self):
+        return Deduplicator(self.window / 1e9, self.maxEntries)
+
+    # configuração, usada na identidade de parciais
+    def __repr__(self):
+        return f"Deduplicator(window={self.window / 1e9}, maxEntries={self.maxEntries})"
+
+    # retorna hash dos bytes invariantes do registro
+    @staticmethod
+    def getHash(raw, linkType):
+        etherType, offset = PacketFilter.getNetworkLayer(raw, linkType)
+
+        if etherType == ETHERTYPE_IPV4 and len(raw) >= offset + 20:
+            header = bytearray(raw[offset:offset + 20])
+            header[8] = 0 # TTL
+            header[10:12] = b"\x00\x00" # checksum
+            return hashlib.blake2b(bytes(header) + raw[offset + 20:], digest_size=8).digest()
+
+        if etherType == ETHERTYPE_IPV6 and len(raw) >= offset + 40:
+            header = bytearray(raw[offset:offset + 40])
+            header[7] = 0 # hop limit
+            return hashlib.blake2b(bytes(header) + raw[offset + 40:], digest_size=8).digest()
+
+        return hashlib.blake2b(raw, digest_size=8).digest()
+
+    # descarta hashes mais antigos que a janela e os excedentes de maxEntries
+    def expire(self, time):
+        limit = time - self.window
+
+        while self.order and (self.order[0][0] < limit or len(self.order) > self.maxEntries):
+            seenTime, digest = self.order.popleft()
+            if self.seen.get(digest) == seenTime:
+                del self.seen[digest]
+
+    # retorna True se o registro (tempo em ns) repete um pacote visto dentro da janela
+    def isDuplicate(self, raw, linkType, time):
+        self.expire(time)
+        digest = self.getHash(raw, linkType)
+        seenTime = self.seen.get(digest)
+
+        if seenTime is not None and abs(time - seenTime) <= self.window:
+            self.duplicates += 1
+            return True
+
+        self.seen[digest] = time
+        self.order.append((time, digest))
+
+        return False
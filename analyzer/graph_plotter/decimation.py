@@ -0,0 +1,75 @@
+import numpy as np
+
+# point decimation for line graphs, reduces a series to a fixed number of points keeping its visual shape
+
+# Largest-Triangle-Three-Buckets: keeps from each bucket the point forming the largest triangle
+# with the previous kept point and the mean of the next bucket
+def lttb(x, y, nOut):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if nOut >= n or nOut < 3:
+        return x, y
+
+    # nOut - 2 buckets between the first and last points (always kept)
+    edges = np.linspace(1, n - 1, nOut - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # mean point of every bucket, computed at once
+    counts = ends - starts
+    meanX = np.add.reduceat(x[:n - 1], starts) / counts
+    meanY = np.add.reduceat(y[:n - 1], starts) / counts
+
+    # next bucket mean for each bucket, the last one uses the last point
+    nextX = np.append(meanX[1:], x[-1])
+    nextY = np.append(meanY[1:], y[-1])
+
+    selected = np.empty(nOut, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+
+    for i in range(len(starts)):
+        bx = x[starts[i]:ends[i]]
+        by = y[starts[i]:ends[i]]
+        areas = np.abs((x[a] - nextX[i]) * (by - y[a]) - (x[a] - bx) * (nextY[i] - y[a]))
+        a = starts[i] + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
+
+# min/max: keeps the minimum and maximum of each bucket (one bucket per pair of output points), in original order
+def minMax(x, y, nOut):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    buckets = nOut // 2
+
+    if nOut >= n or buckets < 1:
+        return x, y
+
+    # equal sized buckets, last one padded with nan
+    size = int(np.ceil(n / buckets))
+    buckets = int(np.ceil(n / size))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    iMin = offsets + np.nanargmin(padded, axis=1)
+    iMax = offsets + np.nanargmax(padded, axis=1)
+
+    selected = np.unique(np.concatenate((iMin, iMax))) # sorted, removes min == max
+
+    return x[selected], y[selected]
+
+METHODS = {"lttb": lttb,
+           "minmax": minMax
+           }
+
+# decimate (x, y) to at most nOut points using the chosen method
+def decimate(x, y, nOut, method="lttb"):
+    if method not in METHODS:
+        raise ValueError(f"Unknown decimation method: {method}")
+
+    return METHODS[method](x, y, nOut)
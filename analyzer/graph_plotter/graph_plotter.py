@@ -1,6 +1,22 @@
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+import numpy as np
 import sys
+from analyzer.graph_plotter.decimation import decimate
+from analyzer.histogram import Histogram
+from analyzer.graph_plotter.plot_cache import getJobHash, isUpToDate, writeHash
+
+# import pyplot on the first figure instead of at import time (most of the package's startup cost),
+# cached graphs and runs that never plot don't load matplotlib
+# headless backend, only the interactive script (plotUserInput) needs a window
+def getPyplot():
+    import matplotlib
+    if __name__ != "__main__" and "matplotlib.pyplot" not in sys.modules:
+        matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+
+    return plt
 
 # colors supported by matplotlib (except white)
 class Color(Enum):
@@ -158,7 +174,7 @@ class GraphPlotter:
         self.legendPosition = legendPosition # legend position option (right, bottom, left)
         self.colors = colors if colors else list(Color) # colors input or list of Color enum
         self.plotCount = plotCount # number of plots
-        self.fig, self.axis = plt.subplots() # subplots objects for each instance, avoid error using plt global 
+        self.fig, self.axis = getPyplot().subplots() # subplots objects for each instance, avoid error using plt global 
     
     # get color from Color enum or color passed by argument
     def getColor(self, color=None, i=0):
@@ -189,10 +205,17 @@ class GraphPlotter:
             else:
                 self.axis.legend()
 
-        plt.show()
+        getPyplot().show()
+
+    # plotHash: hash of the plotted data and style (see plot_cache.getPlotHash), saving is skipped if the file was
+    # already rendered from the same hash; returns True if the file is up to date
+    def saveGraph(self, filename="graph.png", dpi=300, bbox_inches="tight", close=True, plotHash=None):
+
+        if plotHash is not None and isUpToDate(filename, plotHash):
+            if close:
+                self.close()
+            return True
 
-    def saveGraph(self, filename="graph.png", dpi=300, bbox_inches="tight"):
-        
         if self.legendFlag == True:
             if self.legendPosition == "right":
                 self.axis.legend(loc='center left', bbox_to_anchor=(1, 0.5))
@@ -209,18 +232,62 @@ class GraphPlotter:
             else:
                 self.axis.legend()
 
+        saved = False
         try:
             self.fig.savefig(filename, dpi=dpi, bbox_inches=bbox_inches)
+            saved = True
         except Exception as e:
             print(f"Error saving graph: {e}")
 
+        if saved and plotHash is not None:
+            writeHash(filename, plotHash)
+
+        # release the figure, pyplot keeps every figure alive until closed
+        if close:
+            self.close()
+
+        return saved
+
+    # close the figure, the instance can't plot after this
+    def close(self):
+        if self.fig is not None:
+            getPyplot().close(self.fig)
+            self.fig, self.axis = None, None
+
+    # clear the axis to reuse the same figure for another graph
+    def clear(self):
+        self.axis.clear()
+        self.plotCount = 0
+
+    # render a batch of graph jobs, in parallel worker processes when workers != 1
+    # job: {"options": GraphPlotter arguments, "plots": [(plot method name, arguments)], "filename": output file, "dpi": resolution,
+    #      "cache": skip rendering if the output is up to date (default True)}
+    @staticmethod
+    def renderJobs(jobs, workers=None):
+        jobs = list(jobs)
+
+        if workers == 1 or len(jobs) <= 1:
+            return [renderJob(job) for job in jobs]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(renderJob, jobs))
+
     # plot using object attributes or method arguments 
     def plotLineGraph(self, x, y, color=None, plotLabel=None, xLabel=None, yLabel=None, title=None, grid=None, marker="o", linestyle="-", autoScaleY=False, 
-                      autoScaleX=False, yScaleFactor=3, xScaleFactor=3, yScaleStart=0, xScaleStart=0, yScale="linear", xScale="linear", base=10):
+                      autoScaleX=False, yScaleFactor=3, xScaleFactor=3, yScaleStart=0, xScaleStart=0, yScale="linear", xScale="linear", base=10,
+                      maxPoints=None, decimation="lttb"):
 
         color = self.getColor(color, self.plotCount)
         self.plotCount += 1
 
+        # scale limits use the full series, before decimation
+        yMean = np.mean(y) if autoScaleY and len(y) > 0 else None
+        xMean = np.mean(x) if autoScaleX and len(x) > 0 else None
+
+        # reduce the series to maxPoints (lttb or minmax), render time stops depending on the number of samples
+        if maxPoints is not None and len(x) == len(y) and len(y) > maxPoints:
+            x, y = decimate(x, y, maxPoints, decimation)
+
         self.axis.plot(x, y, color=color, label=plotLabel, marker=marker, linestyle=linestyle)
 
         self.axis.set_xlabel(xLabel or self.xLabel)
@@ -236,12 +303,10 @@ class GraphPlotter:
             self.axis.set_xscale(xScale, base=base)
 
         # automatic scale adjustment, to better visualization of the graph
-        if autoScaleY and len(y) > 0:
-            yMean = sum(y) / len(y)
+        if yMean is not None:
             self.axis.set_ylim(yScaleStart, yMean * yScaleFactor)
 
-        if autoScaleX and len(x) > 0:
-            xMean = sum(x) / len(x)
+        if xMean is not None:
             self.axis.set_xlim(xScaleStart, xMean * xScaleFactor)
 
     def plotBarGraph(self, x, y, color=None, plotLabel=None, xLabel=None, yLabel=None, title=None, grid=None, align="center", edgecolor="black", horizontal=False):
@@ -280,12 +345,35 @@ class GraphPlotter:
         self.axis.set_title(self.title or "")
         self.axis.axis('equal')  # circle
 
+    # data can be raw samples or a pre-binned Histogram, both are rendered from bin counts
     def plotHistogram(self, data, bins=10, color=None, plotLabel=None, xLabel=None, yLabel=None, title=None, grid=None, edgecolor="black", density=False, histtype="bar"):
 
         color = self.getColor(color, self.plotCount)
         self.plotCount += 1
 
-        self.axis.hist(data, bins, color=color, label=plotLabel, edgecolor=edgecolor, density=density, histtype=histtype)
+        if isinstance(data, Histogram):
+            histogram = data
+        elif np.isscalar(bins):
+            histogram = Histogram.fromData(data, int(bins))
+        else:
+            histogram = Histogram(bins).fill(data)
+
+        counts = histogram.getDensity() if density else histogram.counts
+        edges = histogram.edges
+
+        # only the range with samples, log histograms cover many empty decades
+        nonEmpty = np.nonzero(histogram.counts)[0]
+        if len(nonEmpty) > 0:
+            counts = counts[nonEmpty[0]:nonEmpty[-1] + 1]
+            edges = edges[nonEmpty[0]:nonEmpty[-1] + 2]
+
+        if histtype == "bar":
+            self.axis.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color=color, label=plotLabel, edgecolor=edgecolor)
+        else:
+            self.axis.stairs(counts, edges, fill=(histtype == "stepfilled"), color=color, label=plotLabel)
+
+        if histogram.scale == "log":
+            self.axis.set_xscale("log")
 
         self.axis.set_xlabel(xLabel or self.xLabel)
         self.axis.set_ylabel(yLabel or self.yLabel)
@@ -332,6 +420,29 @@ class GraphPlotter:
             
         self.showGraph()       
 
+# render a single graph job in the current process, returns the output filename (None on error)
+# jobs are content addressed: if the output was rendered from the same data and style it isn't plotted again
+def renderJob(job):
+    plotHash = getJobHash(job) if job.get("cache", True) else None
+
+    if plotHash is not None and isUpToDate(job["filename"], plotHash):
+        return job["filename"]
+
+    graph = GraphPlotter(**job.get("options", {}))
+
+    try:
+        for method, arguments in job.get("plots", []):
+            getattr(graph, method)(**arguments)
+    except Exception as e:
+        print(f"Error plotting graph {job['filename']}: {e}")
+        graph.close()
+        return None
+
+    if not graph.saveGraph(job["filename"], dpi=job.get("dpi", 300), plotHash=plotHash):
+        return None
+
+    return job["filename"]
+
 if __name__ == "__main__":
 
     plot = GraphPlotter()
@@ -0,0 +1,89 @@
+from importlib.metadata import version
+from functools import cache
+from enum import Enum
+import numpy as np
+import hashlib
+import json
+import os
+from analyzer.histogram import Histogram
+
+# source files that change how a graph looks, editing any of them invalidates every cached graph
+SOURCES = ["graph_plotter.py", "decimation.py"]
+
+# hash of the rendering code and matplotlib version, part of every plot hash
+# computed on the first hash, the version comes from the package metadata so matplotlib itself isn't imported
+@cache
+def getRendererVersion():
+    digest = hashlib.sha256(version("matplotlib").encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for source in SOURCES:
+        with open(os.path.join(directory, source), "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+# feed a value into the hash: dicts (sorted keys), sequences, numpy arrays (raw bytes), histograms and scalars
+def updateHash(digest, value):
+    if isinstance(value, dict):
+        digest.update(b"d%d" % len(value))
+        for key in sorted(value, key=repr):
+            updateHash(digest, key)
+            updateHash(digest, value[key])
+
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d" % len(value))
+        for item in value:
+            updateHash(digest, item)
+
+    elif isinstance(value, np.ndarray):
+        digest.update(f"a{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+
+    elif isinstance(value, Histogram):
+        updateHash(digest, value.toDict())
+
+    elif isinstance(value, Enum):
+        updateHash(digest, value.value)
+
+    else:
+        digest.update(b"s" + repr(value).encode())
+
+# hash of everything that defines a graph: plotted data, labels, style, dpi and the renderer version
+def getPlotHash(*values):
+    digest = hashlib.sha256(getRendererVersion().encode())
+
+    for value in values:
+        updateHash(digest, value)
+
+    return digest.hexdigest()
+
+# hash of a render job (see renderJob), the output filename is not part of it
+def getJobHash(job):
+    return getPlotHash(job.get("options", {}), job.get("plots", []), job.get("dpi", 300))
+
+# hidden sidecar file with the hash of the rendered graph
+def getHashPath(filename):
+    directory, name = os.path.split(filename)
+
+    return os.path.join(directory, f".{name}.hash")
+
+# True if the graph file exists, wasn't modified after rendering and was rendered from the same hash
+def isUpToDate(filename, plotHash):
+    try:
+        with open(getHashPath(filename)) as f:
+            cached = json.load(f)
+        info = os.stat(filename)
+    except (OSError, ValueError):
+        return False
+
+    return cached.get("hash") == plotHash and cached.get("size") == info.st_size and cached.get("mtime") == info.st_mtime_ns
+
+# record the hash of a graph file that was just rendered
+def writeHash(filename, plotHash):
+    try:
+        info = os.stat(filename)
+        with open(getHashPath(filename), "w") as f:
+            json.dump({"hash": plotHash, "size": info.st_size, "mtime": info.st_mtime_ns}, f)
+    except OSError as e:
+        print(f"Error saving graph hash: {e}")
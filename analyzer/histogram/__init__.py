@@ -0,0 +1 @@
+from .histogram import Histogram
\ No newline at end of file
@@ -0,0 +1,204 @@
+import numpy as np
+from bisect import bisect_right
+
+# histograma com intervalos (bins) fixos, preenchido incrementalmente e combinável entre trechos/capturas
+# guarda somente contagens por intervalo, memória independe da quantidade de amostras
+class Histogram:
+
+    def __init__(self, edges, scale="linear"):
+        self.edges = np.asarray(edges, dtype=float) # limites dos intervalos, len(edges) = bins + 1
+        self.scale = scale # linear ou log, usado na plotagem
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64) # contagem por intervalo
+        self.underflow = 0 # amostras abaixo do primeiro limite
+        self.overflow = 0 # amostras acima do último limite
+        self.n = 0 # total de amostras
+        self.sum = 0.0 # soma das amostras
+        self.min = np.inf
+        self.max = -np.inf
+        self.edgesList = self.edges.tolist() # limites como lista, busca binária rápida em add()
+        self.binning = None # (escala, low, high, bins) dos construtores linear() e log(), recria os limites sem guardá-los
+
+    # histograma com intervalos de mesmo tamanho entre low e high
+    @classmethod
+    def linear(cls, low, high, bins=10):
+        if high <= low:
+            high = low + 1
+
+        histogram = cls(np.linspace(low, high, bins + 1), "linear")
+        histogram.binning = ("linear", low, high, bins)
+
+        return histogram
+
+    # histograma com intervalos em escala logarítmica entre low e high (low > 0)
+    @classmethod
+    def log(cls, low, high, binsPerDecade=20):
+        decades = np.log10(high) - np.log10(low)
+        bins = max(1, int(np.ceil(decades * binsPerDecade)))
+
+        histogram = cls(np.logspace(np.log10(low), np.log10(high), bins + 1), "log")
+        histogram.binning = ("log", low, high, binsPerDecade)
+
+        return histogram
+
+    # histograma padrão para tempos em ms (100 ns a 1000 s), mesmos intervalos em todas capturas para permitir combinação
+    @classmethod
+    def forTimes(cls):
+        return cls.log(1e-4, 1e6, 20)
+
+    # histograma linear com 10 intervalos entre mínimo e máximo dos dados (equivalente ao padrão de axis.hist)
+    @classmethod
+    def fromData(cls, data, bins=10):
+        data = np.asarray(data, dtype=float)
+        histogram = cls.linear(np.min(data), np.max(data), bins) if len(data) > 0 else cls.linear(0, 1, bins)
+        histogram.fill(data)
+
+        return histogram
+
+    # adiciona uma amostra
+    def add(self, value):
+        value = float(value)
+        i = bisect_right(self.edgesList, value) - 1
+
+        if value == self.edgesList[-1]: # último limite é inclusivo
+            i -= 1
+
+        if i < 0:
+            self.underflow += 1
+        elif i >= len(self.counts):
+            self.overflow += 1
+        else:
+            self.counts[i] += 1
+
+        self.n += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    # adiciona vetor de amostras
+    def fill(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+
+        if len(values) == 0:
+            return self
+
+        bins = len(self.counts)
+        indexes = np.searchsorted(self.edges, values, side="right") - 1
+        indexes[values == self.edges[-1]] = bins - 1 # último limite é inclusivo
+        inside = (indexes >= 0) & (indexes < bins)
+
+        self.counts += np.bincount(indexes[inside], minlength=bins)
+        self.underflow += int(np.count_nonzero(indexes < 0))
+        self.overflow += int(np.count_nonzero(indexes >= bins))
+        self.n += len(values)
+        self.sum += float(np.sum(values))
+        self.min = min(self.min, float(np.min(values)))
+        self.max = max(self.max, float(np.max(values)))
+
+        return self
+
+    # combina outro histograma com os mesmos intervalos neste
+    def merge(self, other):
+        if len(self.edges) != len(other.edges) or not np.allclose(self.edges, other.edges):
+            raise ValueError("Histograms with different bins can't be merged")
+
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.n += other.n
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def __add__(self, other):
+        return self.copy().merge(other)
+
+    def copy(self):
+        histogram = Histogram.fromDict(self.toDict())
+        histogram.binning = self.binning
+
+        return histogram
+
+    # retorna média das amostras
+    def getMean(self):
+        return self.sum / self.n if self.n > 0 else 0
+
+    # retorna quantil q (0 a 1) estimado por interpolação linear dentro do intervalo
+    def getQuantile(self, q):
+        if self.n == 0:
+            return 0
+
+        target = q * self.n
+        if target <= self.underflow:
+            return self.min
+
+        cumulative = self.underflow + np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, target))
+
+        if i >= len(self.counts):
+            return self.max
+
+        before = cumulative[i] - self.counts[i]
+        fraction = (target - before) / self.counts[i] if self.counts[i] > 0 else 0
+        value = self.edges[i] + fraction * (self.edges[i + 1] - self.edges[i])
+
+        return float(min(max(value, self.min), self.max))
+
+    # retorna densidade por intervalo (área total = 1)
+    def getDensity(self):
+        widths = np.diff(self.edges)
+        total = self.counts.sum()
+
+        return self.counts / (total * widths) if total > 0 else np.zeros(len(self.counts))
+
+    # retorna representação serializável
+    def toDict(self):
+        return {"edges": self.edges.tolist(),
+                "scale": self.scale,
+                "counts": self.counts.tolist(),
+                "underflow": self.underflow,
+                "overflow": self.overflow,
+                "n": self.n,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max
+                }
+
+    # estado para pickle (parciais, checkpoints): contagens não nulas e parâmetros dos intervalos em vez dos vetores de limites
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["edgesList"]
+        if self.binning is not None:
+            del state["edges"]
+
+        nonzero = np.flatnonzero(self.counts)
+        state["counts"] = (len(self.counts), nonzero.astype(np.uint32), self.counts[nonzero])
+
+        return state
+
+    def __setstate__(self, state):
+        if "edges" not in state:
+            scale, low, high, bins = state["binning"]
+            state["edges"] = getattr(Histogram, scale)(low, high, bins).edges
+
+        size, nonzero, counts = state["counts"]
+        state["counts"] = np.zeros(size, dtype=np.int64)
+        state["counts"][nonzero] = counts
+
+        self.__dict__.update(state)
+        self.edgesList = self.edges.tolist()
+
+    # cria histograma a partir de toDict()
+    @classmethod
+    def fromDict(cls, data):
+        histogram = cls(data["edges"], data.get("scale", "linear"))
+        histogram.counts = np.asarray(data["counts"], dtype=np.int64)
+        histogram.underflow = data["underflow"]
+        histogram.overflow = data["overflow"]
+        histogram.n = data["n"]
+        histogram.sum = data["sum"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+
+        return histogram
@@ -1,13 +1,33 @@
-from scapy.all import ICMP
+from scapy.layers.inet import ICMP
 import numpy as np
 from analyzer.packet_analyzer import PacketAnalyzer
+from analyzer.packet_analyzer.packet_analyzer import SERIES_NAMES
 from analyzer.ip_analyzer import IpAnalyzer
+from analyzer.prefix_trie.prefix_trie import ipToInt, intToIp
+from analyzer.histogram import Histogram
+from analyzer.packet_filter import PacketFilter
+from analyzer.packet_filter.packet_filter import ETHERTYPE_IPV4
 
 # analisador de camada ICMP
 class IcmpAnalyzer(PacketAnalyzer):
+    defaultFilter = PacketFilter(ipProtos={1}) # somente ICMP, demais pacotes descartados antes da decodificação
 
-    def __init__(self, id=None, packetsMargin=None, path=None):
-        super().__init__(id, packetsMargin, path)
+    sampleByKey = True
+
+    def __init__(self, id=None, packetsMargin=None, path=None, **options):
+        super().__init__(id, packetsMargin, path, **options)
+
+    # chave de amostragem: id e seq de echo request/reply, a resposta é amostrada junto com a requisição
+    # override
+    @staticmethod
+    def getSampleKey(raw, linkType):
+        etherType, offset = PacketFilter.getNetworkLayer(raw, linkType)
+        proto, position = PacketFilter.getTransportLayer(raw, etherType, offset)
+
+        if etherType == ETHERTYPE_IPV4 and proto == 1 and position is not None and len(raw) >= position + 8 and raw[position] in (0, 8):
+            return bytes(raw[position + 4:position + 8])
+
+        return None
 
     # retorna tipo de ICMP: 0 = echo request , 8 = echo reply
     def getIcmpType(self, pkt):
@@ -45,43 +65,50 @@ class IcmpAnalyzer(PacketAnalyzer):
 
         return sorted(list(seqsList)) if seqsList else []
     
-    # retorna pares tuplas com atributos ICMP e IP e pacote equivalente para cada pacote ICMP
+    # retorna tabela (SpillTable) de tuplas com atributos ICMP e IP (endereços inteiros) e posição do pacote equivalente para cada pacote ICMP
     def getIcmpKeys(self):
-        icmpKeys = {}
+        icmpKeys = self.newKeyTable()
 
-        for pkt in self.getPackets():
+        for i, pkt in enumerate(self.getPackets()):
             if ICMP in pkt:
                 key = (
-                    IpAnalyzer.getSrcIp(pkt),
-                    IpAnalyzer.getDstIp(pkt), 
+                    IpAnalyzer.getSrcIpInt(pkt),
+                    IpAnalyzer.getDstIpInt(pkt), 
                     self.getIcmpType(pkt), 
                     self.getIcmpId(pkt), 
                     self.getIcmpSeq(pkt)
                 )
-                icmpKeys[key] = pkt
+                icmpKeys.add(key, i)
         
         return icmpKeys
     
-    # retorna pacote filtrado por chave
+    # retorna pacote filtrado por chave, endereços como string ou inteiro
     #override
     def getPacketByKey(self, key):
-        return self.getIcmpKeys().get(key)
+        src, dst = (ipToInt(address) if isinstance(address, str) else address for address in key[:2])
+
+        position = self.getIcmpKeys().get((src, dst) + tuple(key[2:]))
+
+        return self.getPacket(position) if position is not None else None
 
     # retorna estatísticas de rtt ICMP: lista de rtt, desvio padrão, média, máximo, mínimo, erro padrão e coeficiente de variação
     # override
     def getRttStats(self):
         rtts = []
         requests = {}
+        histogram = Histogram.forTimes() # preenchido a cada rtt calculado
 
         for pkt in self.getPackets():
             if ICMP in pkt:
                 seq = self.getIcmpSeq(pkt)
 
                 if self.getIcmpType(pkt) == 8: # echo request
-                    requests[seq] = pkt
+                    requests[seq] = self.getTimeNs(pkt)
 
                 elif self.getIcmpType(pkt) == 0 and seq in requests: # echo reply
-                    rtts.append(self.getTimeDiff(requests[seq], pkt))
+                    rtt = (self.getTimeNs(pkt) - requests[seq]) / 1e6
+                    rtts.append(rtt)
+                    histogram.add(rtt)
 
         rtts = np.array(rtts) if rtts else []
         mean = np.mean(rtts) if len(rtts) > 0 else 0 
@@ -92,6 +119,7 @@ class IcmpAnalyzer(PacketAnalyzer):
         cv = (std/mean)*100 if mean > 0 else 0
 
         return {"rtts": rtts,
+                "histogram": histogram,
                 "mean": mean,
                 "std": std,
                 "max": max,
@@ -112,9 +140,9 @@ class IcmpAnalyzer(PacketAnalyzer):
         for pkt in self.getPackets():
             if ICMP in pkt:
                 if self.getIcmpType(pkt) == 8:
-                    requestTimes.append(self.getTime(pkt))
+                    requestTimes.append(self.getTimeNs(pkt))
 
-        intervals = np.diff(requestTimes) if requestTimes else []  # diferença entre tempos consecutivos
+        intervals = np.diff(np.array(requestTimes, dtype=np.int64)) / 1e6 if requestTimes else []  # diferença entre tempos consecutivos (ns -> ms)
         mean = np.mean(intervals) if len(intervals) > 0 else 0
         std = np.std(intervals) if len(intervals) > 0 else 0
         max = np.max(intervals) if len(intervals) > 0 else 0
@@ -123,6 +151,7 @@ class IcmpAnalyzer(PacketAnalyzer):
         cv = (std/mean)*100 if mean > 0 else 0
 
         return {"intervals": intervals,
+                "histogram": Histogram.forTimes().fill(intervals),
                 "mean": mean,
                 "std": std,
                 "max": max,
@@ -157,6 +186,96 @@ class IcmpAnalyzer(PacketAnalyzer):
                 "lossStats": lossStats
                 }
 
+    # estado agregado ICMP: requisições pendentes, contadores de perda e séries de rtt e intervalo
+    # override
+    def newState(self):
+        state = super().newState()
+        state.update({"requests": {},
+                      "sent": 0,
+                      "replies": 0,
+                      "received": set(),
+                      "lastRequest": None,
+                      "lastReply": None, # seq da última resposta, lacunas são perdas consecutivas
+                      "rtt": self.newSeries(),
+                      "interval": self.newSeries()
+                      })
+
+        return state
+
+    # override
+    def updateState(self, state, pkt):
+        super().updateState(state, pkt)
+
+        if ICMP not in pkt:
+            return
+
+        seq = self.getIcmpSeq(pkt)
+        icmpType = self.getIcmpType(pkt)
+        time = self.getTimeNs(pkt)
+
+        anomalies = state["anomalies"]
+
+        if icmpType == 8: # echo request
+            state["sent"] += 1
+            state["requests"][seq] = time
+            if state["lastRequest"] is not None:
+                interval = (time - state["lastRequest"]) / 1e6
+                self.addSample(state["interval"], interval)
+                if anomalies is not None:
+                    anomalies.update("interval", time, interval)
+            state["lastRequest"] = time
+
+        elif icmpType == 0: # echo reply
+            if seq not in state["received"]:
+                state["replies"] += 1
+                state["received"].add(seq)
+            if seq in state["requests"]:
+                rtt = (time - state["requests"][seq]) / 1e6
+                self.addSample(state["rtt"], rtt)
+                if anomalies is not None:
+                    anomalies.update("rtt", time, rtt)
+
+            # respostas faltando entre a anterior e esta (seq de 16 bits), respostas repetidas ou fora de ordem são ignoradas
+            gap = (seq - state["lastReply"] - 1) % 65536 if state["lastReply"] is not None else 0
+            if gap < 32768:
+                state["lastReply"] = seq
+                if anomalies is not None:
+                    anomalies.updateLoss(time, gap)
+                    anomalies.updateLoss(time, 0)
+
+    # override
+    def getStateMetrics(self, state):
+        metrics = super().getStateMetrics(state)
+        metrics.update(self.getSeriesMetrics("rtt", state["rtt"]))
+        metrics.update(self.getSeriesMetrics("interval", state["interval"]))
+
+        sent = state["sent"]
+        received = state["replies"]
+        metrics.update({"loss.sent": sent,
+                        "loss.received": received,
+                        "loss.lost": sent - received,
+                        "loss.lossRate": ((sent - received) * 100)/sent if sent > 0 else 0
+                        })
+
+        return metrics
+
+    # override
+    def getPartial(self, state):
+        partial = super().getPartial(state)
+        del partial["requests"], partial["received"]
+
+        return partial
+
+    # override
+    def mergeState(self, state, other):
+        super().mergeState(state, other)
+        state["sent"] += other["sent"]
+        state["replies"] += other["replies"]
+        self.mergeSeries(state["rtt"], other["rtt"])
+        self.mergeSeries(state["interval"], other["interval"])
+
+        return state
+
     # imprime métricas ICMP
     # override
     def printGeneralMetrics(self):
@@ -169,7 +288,7 @@ class IcmpAnalyzer(PacketAnalyzer):
 
         print("ICMP keys:")
         for key in icmpKeys.keys():
-            print(key)
+            print((intToIp(key[0]), intToIp(key[1])) + key[2:])
 
         return super().printGeneralMetrics(id, totalPackets, totalBytes, layers, throughput)
 
@@ -223,6 +342,12 @@ class IcmpAnalyzer(PacketAnalyzer):
 
         return super().printIntervalJitterMetrics(layer, mean, std, max, min, error, cv)
     
+    # override
+    def printBootstrapMetrics(self, bootstrap=None):
+        layer = "ICMP"
+        for name, intervals in self.getBootstrapStats(bootstrap).items():
+            super().printBootstrapMetrics(layer, SERIES_NAMES[name], intervals)
+
     # override
     def printLossMetrics(self):
         layer = "ICMP"
@@ -294,7 +419,7 @@ class IcmpAnalyzer(PacketAnalyzer):
     # override
     def plotRttHistogram(self, path):
         id = self.getId()
-        rtts = self.getRttStats().get("rtts")
+        rtts = self.getRttStats().get("histogram")
         title = None
         xLabel = "RTT interval (ms)"
         yLabel = "Frequency"
@@ -304,7 +429,7 @@ class IcmpAnalyzer(PacketAnalyzer):
     # override
     def plotIntervalHistogram(self, path):
         id = self.getId()
-        intervals = self.getIntervalStats().get("intervals")
+        intervals = self.getIntervalStats().get("histogram")
         title = None
         xLabel = "Packet arrival time interval (ms)"
         yLabel = "Frequency"
@@ -315,7 +440,7 @@ class IcmpAnalyzer(PacketAnalyzer):
     def plotRttJitterHistogram(self, path):
         id = self.getId()
         rtts = self.getRttStats().get("rtts")
-        jitters = self.getJitterStats(rtts).get("jitters")
+        jitters = self.getJitterStats(rtts).get("histogram")
         title = None
         xLabel = "Jitter interval (ms)"
         yLabel = "Frequency"
@@ -326,7 +451,7 @@ class IcmpAnalyzer(PacketAnalyzer):
     def plotIntervalJitterHistogram(self, path):
         id = self.getId()
         intervals = self.getIntervalStats().get("intervals")
-        jitters = self.getJitterStats(intervals).get("jitters")
+        jitters = self.getJitterStats(intervals).get("histogram")
         title = None
         xLabel = "Jitter interval (ms)"
         yLabel = "Frequency"
@@ -1,29 +1,105 @@
-from scapy.all import IP
+from scapy.layers.inet import IP
+from scapy.layers.inet6 import IPv6
+from collections import Counter
 import numpy as np
 from analyzer.packet_analyzer import PacketAnalyzer
+from analyzer.packet_record import PacketRecord, PacketTable
+from analyzer.prefix_trie.prefix_trie import ipToInt, getPrefix
 
-# analisador de camada IPv4
+# analisador de camada IP (IPv4 e IPv6)
 class IpAnalyzer(PacketAnalyzer):
 
-    def __init__(self, id=None, path=None):
-        super().__init__(id, path)
-    
-    # retorna IPv4 de origem
+    def __init__(self, id=None, packetsMargin=None, path=None, **options):
+        super().__init__(id, packetsMargin, path, **options)
+
+    # retorna IP de origem, None se o pacote não tiver camada IP
     @staticmethod
     def getSrcIp(pkt):
         if IP in pkt:
             return pkt[IP].src
-        
-        else:
-            print("The packet doesn't have an IP layer")
-            return None
 
-    # retorna IPv4 de destino
+        if IPv6 in pkt:
+            return pkt[IPv6].src
+
+        return None
+
+    # retorna IP de destino, None se o pacote não tiver camada IP
     @staticmethod
     def getDstIp(pkt):
         if IP in pkt:
             return pkt[IP].dst
-        
-        else:
-            print("The packet doesn't have an IP layer")
-            return None
\ No newline at end of file
+
+        if IPv6 in pkt:
+            return pkt[IPv6].dst
+
+        return None
+
+    # retorna IP de origem como inteiro de 128 bits (IPv4 mapeado em IPv6), chave compacta para dicionários de fluxos
+    @staticmethod
+    def getSrcIpInt(pkt):
+        if isinstance(pkt, PacketRecord):
+            return pkt.srcInt
+
+        return ipToInt(IpAnalyzer.getSrcIp(pkt))
+
+    # retorna IP de destino como inteiro de 128 bits (IPv4 mapeado em IPv6)
+    @staticmethod
+    def getDstIpInt(pkt):
+        if isinstance(pkt, PacketRecord):
+            return pkt.dstInt
+
+        return ipToInt(IpAnalyzer.getDstIp(pkt))
+
+    # retorna pacotes e bytes por endereço de origem ou destino: lista de (endereço inteiro, pacotes, bytes)
+    def getAddressCounts(self, direction="src"):
+        packets = self.getPackets()
+
+        # tabela compacta: contagem vetorizada sobre os índices do dicionário de endereços
+        if isinstance(packets, PacketTable):
+            column = packets.getColumn(direction)
+            nPackets = np.bincount(column, minlength=len(packets.addresses))
+            nBytes = np.bincount(column, weights=packets.getColumn("length"), minlength=len(packets.addresses))
+
+            return [(address, int(nPackets[i]), int(nBytes[i])) for i, address in enumerate(packets.addresses)
+                    if address is not None and nPackets[i] > 0]
+
+        getIp = self.getSrcIpInt if direction == "src" else self.getDstIpInt
+        nPackets = Counter()
+        nBytes = Counter()
+
+        for pkt in packets:
+            address = getIp(pkt)
+            if address is not None:
+                nPackets[address] += 1
+                nBytes[address] += len(pkt)
+
+        return [(address, n, nBytes[address]) for address, n in nPackets.items()]
+
+    # retorna tráfego agregado por prefixo, em ordem decrescente de bytes: prefixo -> valor associado, pacotes e bytes
+    # com PrefixTrie usa o prefixo mais longo que contém cada endereço (ex: lista de prefixos por AS), senão prefixos de tamanho fixo
+    # cada endereço distinto é buscado uma única vez
+    def getPrefixStats(self, trie=None, length4=24, length6=64, direction="src"):
+        stats = {}
+
+        for address, nPackets, nBytes in self.getAddressCounts(direction):
+            if trie is not None:
+                prefix, value = trie.lookup(address) or ("other", None)
+            else:
+                prefix, value = getPrefix(address, length4, length6), None
+
+            if prefix not in stats:
+                stats[prefix] = {"value": value, "packets": 0, "bytes": 0}
+            stats[prefix]["packets"] += nPackets
+            stats[prefix]["bytes"] += nBytes
+
+        return dict(sorted(stats.items(), key=lambda item: item[1]["bytes"], reverse=True))
+
+    # imprime tráfego dos prefixos com mais bytes
+    def printPrefixMetrics(self, trie=None, length4=24, length6=64, direction="src", top=10):
+        stats = self.getPrefixStats(trie, length4, length6, direction)
+
+        print(f"Traffic per {direction} prefix:")
+        for prefix, prefixStats in list(stats.items())[:top]:
+            value = f" ({prefixStats['value']})" if prefixStats["value"] is not None else ""
+            print(f"{prefix}{value}: {prefixStats['packets']} packets, {prefixStats['bytes']} bytes")
+        print()
\ No newline at end of file
@@ -0,0 +1 @@
+from .load_generator import LoadGenerator
\ No newline at end of file
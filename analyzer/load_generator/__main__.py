@@ -0,0 +1,4 @@
+import sys
+from analyzer.load_generator.load_generator import main
+
+sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from analyzer.histogram import Histogram
+from analyzer.online_stats import OnlineStats
+
+# requisições padrão no formato do servidor do project1 ("opção|argumentos\n"), somente consultas para não alterar o banco
+DEFAULT_REQUESTS = ["4", "5", "6|{id}", "7|{genre}"]
+GENRES = ["ACAO", "COMEDIA", "DRAMA", "FICCAO", "TERROR"]
+
+# métricas de latência registradas por requisição, em ms
+# connect: handshake TCP (comparável ao rtt SYN ↔ SYN+ACK do TcpAnalyzer), firstByte: envio até o primeiro byte da resposta,
+# service: conexão até o fim da resposta, latency: horário planejado até o fim da resposta (inclui espera por conexão livre)
+METRICS = ["connect", "firstByte", "service", "latency"]
+
+# gerador de carga assíncrono para o servidor TCP do project1: uma conexão por requisição (mesmo protocolo do cliente em C),
+# até concurrency conexões simultâneas e requisições iniciadas na taxa alvo (rate por segundo, None = o mais rápido possível)
+class LoadGenerator:
+
+    def __init__(self, host="127.0.0.1", port=8080, concurrency=5, rate=None, requests=100, requestLines=None, timeout=5.0, seed=None):
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency
+        self.rate = rate
+        self.requests = requests
+        self.requestLines = requestLines or DEFAULT_REQUESTS # modelos de requisição, {id} e {genre} são sorteados
+        self.timeout = timeout # tempo máximo por requisição em s
+        self.random = random.Random(seed)
+        self.series = {metric: {"stats": OnlineStats(), "histogram": Histogram.forTimes()} for metric in METRICS}
+        self.sent = 0
+        self.ok = 0
+        self.failed = 0
+        self.elapsed = 0 # duração do teste em s
+
+    # monta próxima requisição, em maiúsculas como o cliente em C
+    def getRequest(self):
+        line = self.random.choice(self.requestLines).format(id=self.random.randint(0, 100000), genre=self.random.choice(GENRES))
+
+        return (line.upper() + "\n").encode()
+
+    # registra latência de uma métrica em ns
+    def addSample(self, metric, value):
+        self.series[metric]["stats"].add(value / 1e6)
+        self.series[metric]["histogram"].add(value / 1e6)
+
+    # executa uma requisição: conecta, envia uma linha e lê a resposta até o servidor fechar a conexão
+    # slots: semáforo de conexões já adquirido pelo agendador, liberado ao terminar
+    async def sendRequest(self, scheduled, slots):
+        try:
+            start = time.perf_counter_ns()
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+                connected = time.perf_counter_ns()
+
+                writer.write(self.getRequest())
+                await writer.drain()
+                sent = time.perf_counter_ns()
+
+                first = await asyncio.wait_for(reader.read(1), self.timeout)
+                firstByte = time.perf_counter_ns()
+                if not first:
+                    raise ConnectionError("connection closed without response")
+                await asyncio.wait_for(reader.read(), self.timeout)
+                end = time.perf_counter_ns()
+            except (OSError, asyncio.TimeoutError, ConnectionError):
+                self.failed += 1
+                return
+            finally:
+                if writer is not None:
+                    writer.close()
+        finally:
+            slots.release()
+
+        self.ok += 1
+        self.addSample("connect", connected - start)
+        self.addSample("firstByte", firstByte - sent)
+        self.addSample("service", end - start)
+        self.addSample("latency", end - scheduled)
+
+    # executa o teste de carga e retorna resumo
+    async def run(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        start = time.perf_counter_ns()
+
+        for i in range(self.requests):
+            # chegadas em taxa fixa (malha aberta): horário planejado não depende das respostas anteriores
+            scheduled = start + int(i * 1e9 / self.rate) if self.rate else time.perf_counter_ns()
+            delay = (scheduled - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # aguarda conexão livre, a espera entra na latência (medida a partir do horário planejado)
+            await slots.acquire()
+
+            tasks.append(asyncio.create_task(self.sendRequest(scheduled, slots)))
+            self.sent += 1
+
+        await asyncio.gather(*tasks)
+        self.elapsed = (time.perf_counter_ns() - start) / 1e9
+
+        return self.getSummary()
+
+    # executa o teste de carga fora de um loop asyncio
+    def start(self):
+        return asyncio.run(self.run())
+
+    # retorna histograma de latência de uma métrica
+    def getHistogram(self, metric="latency"):
+        return self.series[metric]["histogram"]
+
+    # retorna dicionário plano com contadores e estatísticas de cada métrica (ex: connect.mean), mesmo formato de getSummary() dos analisadores
+    def getSummary(self):
+        summary = {"requests.sent": self.sent,
+                   "requests.ok": self.ok,
+                   "requests.failed": self.failed,
+                   "duration": self.elapsed,
+                   "throughput": self.ok / self.elapsed if self.elapsed > 0 else 0 # requisições por segundo
+                   }
+
+        for metric, series in self.series.items():
+            stats = series["stats"].getStats()
+            stats["p50"] = series["histogram"].getQuantile(0.5) if stats["n"] > 0 else 0
+            stats["p99"] = series["histogram"].getQuantile(0.99) if stats["n"] > 0 else 0
+            summary.update({f"{metric}.{key}": value for key, value in stats.items()})
+
+        return summary
+
+    # compara handshake medido pelo gerador com o rtt SYN ↔ SYN+ACK de uma captura do mesmo teste (TcpAnalyzer)
+    def compareWithCapture(self, capture):
+        rttStats = capture.getRttStats()
+        connect = self.series["connect"]["stats"].getStats()
+
+        return {"connect.mean": connect["mean"],
+                "connect.n": connect["n"],
+                "captureRtt.mean": rttStats.get("mean"),
+                "captureRtt.n": len(rttStats.get("rtts")),
+                "difference.mean": connect["mean"] - rttStats.get("mean") # custo do handshake no cliente além da rede
+                }
+
+    # imprime resumo do teste de carga
+    def printMetrics(self):
+        summary = self.getSummary()
+
+        print(f"Requests: {summary['requests.sent']} sent, {summary['requests.ok']} ok, {summary['requests.failed']} failed")
+        print(f"Throughput: {summary['throughput']:.2f} requests/s\n")
+        for metric in METRICS:
+            print(f"{metric}: mean {summary[metric + '.mean']:.3f} ms, p50 {summary[metric + '.p50']:.3f} ms, "
+                  f"p99 {summary[metric + '.p99']:.3f} ms, max {summary[metric + '.max']:.3f} ms")
+        print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="analyzer.load_generator", description="Load generator for the project1 TCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-c", "--concurrency", type=int, default=5, help="maximum simultaneous connections")
+    parser.add_argument("-r", "--rate", type=float, default=None, help="target requests per second (default: as fast as possible)")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="total requests")
+    parser.add_argument("--timeout", type=float, default=5.0, help="timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-o", "--output", default=None, help="write the summary as json")
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(args.host, args.port, args.concurrency, args.rate, args.requests, timeout=args.timeout, seed=args.seed)
+    summary = generator.start()
+    generator.printMetrics()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    return 0
@@ -0,0 +1 @@
+from .metrics_exporter import MetricsExporter
\ No newline at end of file
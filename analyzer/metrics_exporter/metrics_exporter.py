@@ -0,0 +1,126 @@
+import math
+import os
+import re
+from analyzer.packet_analyzer.packet_analyzer import QUANTILES
+
+# séries de tempos exportadas como summary (quantis, soma e contagem) em segundos, mais gauges de mínimo, máximo e desvio padrão
+SERIES = {"rtt": "rtt",
+          "interval": "interval",
+          "rttJitter": "rtt_jitter",
+          "intervalJitter": "interval_jitter"
+          }
+
+# exporta métricas dos analisadores (linhas de getSummary(), follow() ou CaptureSet) no formato texto do OpenMetrics
+# ou do Prometheus (textfile collector do node-exporter), uma série por captura com o label capture
+# tempos em segundos e throughput em bits/s (unidades base do Prometheus), o arquivo é substituído de forma atômica
+class MetricsExporter:
+
+    def __init__(self, path, prefix="analyzer", openMetrics=True):
+        self.path = path
+        self.prefix = prefix
+        self.openMetrics = openMetrics # False = formato texto do Prometheus (contadores declarados com _total, sem # EOF)
+
+    # converte nome camelCase em snake_case (ex: uniquePackets -> unique_packets)
+    @staticmethod
+    def toSnakeCase(name):
+        return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+    # escapa valor de label
+    @staticmethod
+    def escapeLabel(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    # formata valor de amostra
+    @staticmethod
+    def formatValue(value):
+        value = float(value)
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+
+        return repr(int(value)) if value.is_integer() and abs(value) < 2**53 else repr(value)
+
+    # agrupa métricas das linhas em famílias: nome -> tipo, ajuda, unidade e amostras (sufixo, labels, valor)
+    def getFamilies(self, rows):
+        families = {}
+
+        def add(name, type, help, unit, labels, value, suffix=""):
+            family = families.setdefault(f"{self.prefix}_{name}", {"type": type, "help": help, "unit": unit, "samples": []})
+            family["samples"].append((suffix, labels, value))
+
+        for row in rows:
+            capture = {"capture": row.get("id")}
+
+            if "totalPackets" in row:
+                add("packets", "counter", "Packets analyzed", None, capture, row["totalPackets"], "_total")
+            if "totalBytes" in row:
+                add("bytes", "counter", "Bytes analyzed", "bytes", capture, row["totalBytes"], "_total")
+            if "totalTime" in row:
+                add("capture_duration_seconds", "gauge", "Time between first and last packet", "seconds", capture, row["totalTime"] / 1000)
+            if "duplicates" in row:
+                add("duplicate_packets", "counter", "Duplicate packets dropped", None, capture, row["duplicates"], "_total")
+            if "throughput" in row:
+                add("throughput_bits_per_second", "gauge", "Average throughput", None, capture, row["throughput"] * 1e6)
+
+            for key, name in SERIES.items():
+                if f"{key}.mean" not in row:
+                    continue
+
+                help = f"{key} in seconds"
+                n = row.get(f"{key}.n", 0)
+                for q in QUANTILES:
+                    if f"{key}.p{round(q * 100)}" in row:
+                        add(f"{name}_seconds", "summary", help, "seconds", dict(capture, quantile=str(q)), row[f"{key}.p{round(q * 100)}"] / 1000)
+                add(f"{name}_seconds", "summary", help, "seconds", capture, row[f"{key}.mean"] * n / 1000, "_sum")
+                add(f"{name}_seconds", "summary", help, "seconds", capture, n, "_count")
+
+                for stat, statName in (("min", "min"), ("max", "max"), ("std", "stddev")):
+                    if f"{key}.{stat}" in row:
+                        add(f"{name}_{statName}_seconds", "gauge", f"{key} {statName} in seconds", "seconds", capture, row[f"{key}.{stat}"] / 1000)
+
+            for key, value in row.items():
+                group, _, metric = key.partition(".")
+
+                if group == "loss" and metric == "lossRate":
+                    add("loss_ratio", "gauge", "Lost or retransmitted packets ratio", "ratio", capture, value / 100)
+                elif group == "loss" and metric:
+                    add(f"loss_{self.toSnakeCase(metric)}", "counter", f"Loss counter {metric}", None, capture, value, "_total")
+                elif group == "layers" and metric:
+                    add("layer_packets", "counter", "Packets per protocol layer", None, dict(capture, layer=metric), value, "_total")
+                elif group == "anomalies" and metric:
+                    add("anomalies", "counter", "Anomaly events per metric", None, dict(capture, metric=metric), value, "_total")
+
+        return families
+
+    # retorna texto das métricas
+    def formatMetrics(self, rows):
+        lines = []
+
+        for name, family in self.getFamilies(rows).items():
+            # OpenMetrics declara contadores sem o sufixo _total, Prometheus com o nome da amostra
+            declared = name if self.openMetrics or family["type"] != "counter" else name + "_total"
+            lines.append(f"# TYPE {declared} {family['type']}")
+            if self.openMetrics and family["unit"] is not None and name.endswith("_" + family["unit"]):
+                lines.append(f"# UNIT {declared} {family['unit']}")
+            lines.append(f"# HELP {declared} {family['help']}")
+
+            for suffix, labels, value in family["samples"]:
+                labelText = ",".join(f"{key}=\"{self.escapeLabel(label)}\"" for key, label in labels.items())
+                lines.append(f"{name}{suffix}{{{labelText}}} {self.formatValue(value)}")
+
+        if self.openMetrics:
+            lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+    # grava métricas de forma atômica (arquivo temporário + rename), leitores nunca veem arquivo incompleto
+    def write(self, rows):
+        tmpPath = self.path + ".tmp" # sem extensão .prom, ignorado pelo textfile collector
+
+        try:
+            with open(tmpPath, "w") as f:
+                f.write(self.formatMetrics(rows))
+            os.replace(tmpPath, self.path)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
@@ -0,0 +1 @@
+from .microburst_analyzer import MicroburstAnalyzer
\ No newline at end of file
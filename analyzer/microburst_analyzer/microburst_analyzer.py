@@ -0,0 +1,198 @@
+import struct
+import numpy as np
+from analyzer.pcap_index import PcapIndex
+from analyzer.packet_filter import PacketFilter
+from analyzer.packet_filter.packet_filter import ETHERTYPE_IPV4, ETHERTYPE_IPV6, PORT_PROTOS
+from analyzer.prefix_trie.prefix_trie import IPV4_MAPPED, intToIp
+
+# quantis das distribuições de duração e pico das rajadas
+QUANTILES = (0.5, 0.9, 0.99)
+
+# detecção de microrajadas: bytes (tamanho original) somados em janelas de window µs a partir dos tempos e tamanhos do índice,
+# sem decodificar pacotes; janelas com taxa acima de threshold * lineRate são quentes e janelas quentes consecutivas formam uma rajada
+# somente janelas com pacotes são calculadas (memória proporcional aos pacotes e não à duração / window)
+# atribuição por fluxo (src, dst, protocolo, portas) lê somente os registros das rajadas
+class MicroburstAnalyzer:
+
+    def __init__(self, path, id=None, window=100, lineRate=1000.0, threshold=0.5, topFlows=5):
+        if window <= 0:
+            raise ValueError("Microburst window must be > 0")
+
+        if lineRate <= 0 or not 0 < threshold <= 1:
+            raise ValueError("Microburst detection requires lineRate > 0 and 0 < threshold <= 1")
+
+        self.path = path
+        self.id = id
+        self.window = int(window * 1e3) # em ns
+        self.lineRate = lineRate # capacidade do enlace em Mbps
+        self.threshold = threshold # fração da capacidade
+        self.topFlows = topFlows # fluxos atribuídos a cada rajada
+        self.index = PcapIndex.open(path)
+        self.order = None # posições dos registros em ordem de tempo
+        self.bins = None
+        self.bursts = None
+
+    def getId(self):
+        return self.id
+
+    # bytes por janela com pelo menos um pacote: (número da janela, bytes, pacotes, posição do primeiro pacote em order)
+    def getBins(self):
+        if self.bins is not None:
+            return self.bins
+
+        times, lengths = self.index.times, self.index.wireLengths
+        self.order = np.arange(len(times)) if self.index.sorted else np.argsort(times, kind="stable")
+        windows = (times[self.order] - (times[self.order[0]] if len(times) > 0 else 0)) // self.window
+
+        # início de cada janela na sequência ordenada e soma dos tamanhos por trecho
+        starts = np.flatnonzero(np.diff(windows, prepend=-1)) if len(windows) > 0 else np.zeros(0, dtype=np.int64)
+        bytes = np.add.reduceat(lengths[self.order].astype(np.int64), starts) if len(starts) > 0 else np.zeros(0, dtype=np.int64)
+        packets = np.diff(np.append(starts, len(windows)))
+
+        self.bins = (windows[starts], bytes, packets, starts)
+
+        return self.bins
+
+    # taxa em Mbps de cada janela
+    def getRates(self):
+        return self.getBins()[1] * 8 / (self.window / 1e3) # bits por µs = Mbps
+
+    # retorna rajadas: janelas quentes consecutivas, com início, duração, bytes, pacotes, pico e registros (posições em order)
+    def getBursts(self):
+        if self.bursts is not None:
+            return self.bursts
+
+        windows, bytes, packets, starts = self.getBins()
+        rates = self.getRates()
+        hot = np.flatnonzero(rates > self.threshold * self.lineRate)
+        origin = self.index.times[self.order[0]] if len(self.order) > 0 else 0
+        self.bursts = []
+
+        # grupos de janelas quentes com números consecutivos
+        groups = np.split(hot, np.flatnonzero(np.diff(windows[hot]) != 1) + 1) if len(hot) > 0 else []
+        for group in groups:
+            first, last = group[0], group[-1]
+            nWindows = int(windows[last] - windows[first] + 1)
+            self.bursts.append({"start": (int(origin) + int(windows[first]) * self.window) / 1e9,
+                                "duration": nWindows * self.window / 1e3, # µs
+                                "windows": nWindows,
+                                "bytes": int(bytes[group].sum()),
+                                "packets": int(packets[group].sum()),
+                                "peakRate": float(rates[group].max()),
+                                "meanRate": float(bytes[group].sum() * 8 / (nWindows * self.window / 1e3)),
+                                "records": (int(starts[first]), int(starts[last] + packets[last]))
+                                })
+
+        return self.bursts
+
+    # extrai fluxo (src, dst, protocolo, porta de origem, porta de destino) dos bytes do registro, None se não for IP
+    @staticmethod
+    def getFlowKey(raw, linkType):
+        etherType, offset = PacketFilter.getNetworkLayer(raw, linkType)
+
+        if etherType == ETHERTYPE_IPV4 and len(raw) >= offset + 20:
+            src = IPV4_MAPPED | int.from_bytes(raw[offset + 12:offset + 16], "big")
+            dst = IPV4_MAPPED | int.from_bytes(raw[offset + 16:offset + 20], "big")
+        elif etherType == ETHERTYPE_IPV6 and len(raw) >= offset + 40:
+            src = int.from_bytes(raw[offset + 8:offset + 24], "big")
+            dst = int.from_bytes(raw[offset + 24:offset + 40], "big")
+        else:
+            return None
+
+        proto, position = PacketFilter.getTransportLayer(raw, etherType, offset)
+        if proto in PORT_PROTOS and position is not None and len(raw) >= position + 4:
+            return (src, dst, proto) + struct.unpack_from("!HH", raw, position)
+
+        return (src, dst, proto, None, None)
+
+    # retorna os topFlows fluxos com mais bytes na rajada: (fluxo, bytes, pacotes)
+    def getBurstFlows(self, burst):
+        first, last = burst["records"]
+        flows = {}
+
+        for i, _, wireLength, raw in self.index.iterRecords(np.sort(self.order[first:last])):
+            flow = self.getFlowKey(raw, self.index.linkType)
+            total = flows.get(flow, (0, 0))
+            flows[flow] = (total[0] + int(wireLength), total[1] + 1)
+
+        ranked = sorted(flows.items(), key=lambda item: item[1][0], reverse=True)[:self.topFlows]
+
+        return [(flow, total[0], total[1]) for flow, total in ranked]
+
+    # representação do fluxo na saída (ex: 10.0.0.1:443 > 10.0.0.2:5000 proto 6)
+    @staticmethod
+    def formatFlow(flow):
+        if flow is None:
+            return "non-IP"
+
+        src, dst, proto, srcPort, dstPort = flow
+        if srcPort is None:
+            return f"{intToIp(src)} > {intToIp(dst)} proto {proto}"
+
+        return f"{intToIp(src)}:{srcPort} > {intToIp(dst)}:{dstPort} proto {proto}"
+
+    # retorna métricas da captura: quantidade de rajadas, distribuições de duração (µs) e pico (Mbps), fração do tempo em rajada
+    def getSummary(self):
+        bursts = self.getBursts()
+        rates = self.getRates()
+        times = self.index.times
+        span = int(times.max() - times.min()) if len(times) > 0 else 0
+
+        summary = {"id": self.getId(),
+                   "window": self.window / 1e3,
+                   "lineRate": self.lineRate,
+                   "threshold": self.threshold,
+                   "peakRate": float(rates.max()) if len(rates) > 0 else 0.0,
+                   "microbursts.count": len(bursts),
+                   "microbursts.bytes": sum(burst["bytes"] for burst in bursts),
+                   "microbursts.packets": sum(burst["packets"] for burst in bursts),
+                   "microbursts.timeShare": sum(burst["duration"] for burst in bursts) * 1e3 / span if span > 0 else 0.0
+                   }
+
+        for key in ("duration", "peakRate"):
+            values = np.array([burst[key] for burst in bursts])
+            summary[f"microbursts.{key}.mean"] = float(values.mean()) if len(values) > 0 else 0.0
+            summary[f"microbursts.{key}.max"] = float(values.max()) if len(values) > 0 else 0.0
+            for q in QUANTILES:
+                summary[f"microbursts.{key}.p{round(q * 100)}"] = float(np.quantile(values, q)) if len(values) > 0 else 0.0
+
+        return summary
+
+    # retorna uma linha por rajada, ou por rajada e fluxo com perFlow (bytes e fração dos bytes da rajada de cada fluxo)
+    def getBurstRows(self, perFlow=False):
+        rows = []
+
+        for number, burst in enumerate(self.getBursts()):
+            row = {"id": self.getId(), "burst": number}
+            row.update({key: value for key, value in burst.items() if key != "records"})
+
+            if not perFlow:
+                rows.append(row)
+                continue
+
+            for flow, bytes, packets in self.getBurstFlows(burst):
+                rows.append(dict(row, **{"flow": self.formatFlow(flow),
+                                         "flow.bytes": bytes,
+                                         "flow.packets": packets,
+                                         "flow.share": bytes / burst["bytes"] if burst["bytes"] > 0 else 0.0
+                                         }))
+
+        return rows
+
+    # imprime resumo das rajadas e, com perFlow, os fluxos de cada rajada
+    def printMetrics(self, perFlow=False):
+        summary = self.getSummary()
+
+        print(f"Capture {self.getId()}: {summary['window']:.0f} us windows, threshold {self.threshold * 100:.0f}% of {self.lineRate} Mbps")
+        print(f"Peak rate: {summary['peakRate']:.2f} Mbps")
+        print(f"Microbursts: {summary['microbursts.count']} ({summary['microbursts.timeShare'] * 100:.4f}% of the time)")
+        print(f"Duration: mean {summary['microbursts.duration.mean']:.0f} us, p99 {summary['microbursts.duration.p99']:.0f} us, "
+              f"max {summary['microbursts.duration.max']:.0f} us")
+        print(f"Peak rate: mean {summary['microbursts.peakRate.mean']:.2f} Mbps, p99 {summary['microbursts.peakRate.p99']:.2f} Mbps\n")
+
+        if perFlow:
+            for number, burst in enumerate(self.getBursts()):
+                print(f"Burst {number} at {burst['start']:.6f} s: {burst['duration']:.0f} us, {burst['bytes']} bytes, peak {burst['peakRate']:.2f} Mbps")
+                for flow, bytes, packets in self.getBurstFlows(burst):
+                    print(f"  {self.formatFlow(flow)}: {bytes} bytes, {packets} packets")
+            print()
@@ -0,0 +1 @@
+from .online_stats import OnlineStats
\ No newline at end of file
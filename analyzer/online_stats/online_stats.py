@@ -0,0 +1,88 @@
+import numpy as np
+
+# estatísticas calculadas incrementalmente (Welford): média, desvio padrão, máximo e mínimo sem guardar amostras
+# combináveis entre trechos/capturas (Chan et al.) e serializáveis
+class OnlineStats:
+
+    def __init__(self):
+        self.n = 0 # número de amostras
+        self.mean = 0.0
+        self.m2 = 0.0 # soma dos quadrados das diferenças em relação à média
+        self.min = np.inf
+        self.max = -np.inf
+
+    # adiciona uma amostra
+    def add(self, value):
+        value = float(value)
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+        return self
+
+    # adiciona vetor de amostras
+    def addArray(self, values):
+        values = np.asarray(values, dtype=float)
+
+        if len(values) == 0:
+            return self
+
+        batch = OnlineStats()
+        batch.n = len(values)
+        batch.mean = float(np.mean(values))
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.min = float(np.min(values))
+        batch.max = float(np.max(values))
+
+        return self.merge(batch)
+
+    # combina outras estatísticas nestas
+    def merge(self, other):
+        if other.n == 0:
+            return self
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def __add__(self, other):
+        return OnlineStats.fromDict(self.toDict()).merge(other)
+
+    # retorna desvio padrão populacional (mesmo de np.std)
+    def getStd(self):
+        return float(np.sqrt(self.m2 / self.n)) if self.n > 0 else 0
+
+    # retorna estatísticas no formato dos analisadores: média, desvio padrão, máximo, mínimo, erro padrão e coeficiente de variação
+    def getStats(self):
+        std = self.getStd()
+        mean = self.mean if self.n > 0 else 0
+
+        return {"mean": mean,
+                "std": std,
+                "max": self.max if self.n > 0 else 0,
+                "min": self.min if self.n > 0 else 0,
+                "error": std/np.sqrt(self.n) if self.n > 0 else 0,
+                "cv": (std/mean)*100 if mean > 0 else 0,
+                "n": self.n
+                }
+
+    # retorna representação serializável
+    def toDict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    # cria estatísticas a partir de toDict()
+    @classmethod
+    def fromDict(cls, data):
+        stats = cls()
+        stats.n, stats.mean, stats.m2, stats.min, stats.max = data["n"], data["mean"], data["m2"], data["min"], data["max"]
+
+        return stats
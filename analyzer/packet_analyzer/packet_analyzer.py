@@ -1,23 +1,197 @@
-from scapy.all import rdpcap
+from scapy.utils import rdpcap, PcapReader
+from scapy.plist import PacketList
 from collections import Counter
 import numpy as np
 from analyzer.graph_plotter import GraphPlotter
+from analyzer.graph_plotter.graph_plotter import renderJob
+from analyzer.histogram import Histogram
+from analyzer.packet_record import PacketRecord, PacketTable
+from analyzer.packet_record.packet_record import getTimeNs
+from analyzer.pcap_index import PcapIndex
+from analyzer.pcap_index.pcap_index import loadLayers
+from analyzer.online_stats import OnlineStats
+from analyzer.pipeline import Pipeline
+from analyzer.spill_table import SpillTable
+from analyzer.bootstrap import Bootstrap
+from analyzer.bootstrap.bootstrap import STATISTICS as BOOTSTRAP_STATISTICS
+import pickle
+import zlib
 import sys
+import os
+
+# quantis incluídos nas métricas de cada série (rtt, intervalo, jitter)
+QUANTILES = (0.5, 0.9, 0.99)
+
+# nomes das séries de tempos na saída impressa
+SERIES_NAMES = {"rtt": "RTT",
+                "interval": "arrival time interval",
+                "rttJitter": "RTT based jitter",
+                "intervalJitter": "arrival time interval based jitter"
+                }
 
 # analisador de pacotes em capturas .pcap
 class PacketAnalyzer():
-    def __init__(self, id=None, packetsMargin=None, path=None):
+    defaultFilter = None # filtro de cabeçalhos próprio de cada analisador (ex: somente ICMP)
+    sampleByKey = False # amostragem por chave de getSampleKey() (pares requisição/resposta juntos) em vez de por pacote
+    stateVersion = 6 # versão do formato do estado agregado, checkpoints e parciais de outra versão são descartados
+
+    def __init__(self, id=None, packetsMargin=None, path=None, compact=False, index=False, window=None, packetFilter=None,
+                 pipeline=False, workers=None, sampler=None, anomalyDetector=None, memoryBudget=None, deduplicator=None):
         self.id = id
         self.packetsMargin = packetsMargin
+        self.path = path
+        self.pipeline = pipeline # leitura, decodificação e agregação em paralelo (Pipeline), resultado sempre compacto
+        self.workers = workers # processos de decodificação do pipeline (None = núcleos disponíveis)
+        self.compact = compact or pipeline # guarda somente campos usados pelos analisadores (PacketTable) em vez dos objetos scapy
+        self.window = window # janela de tempo (início, fim) em s relativa ao primeiro pacote, requer índice
+        self.index = None # índice auxiliar da captura (PcapIndex), pacotes são lidos sob demanda
+        self.recordIndexes = None # registros da captura selecionados por janela e margem
+        self.population = None # registros selecionados antes da amostragem
+        self.packetFilter = self.defaultFilter if packetFilter is True else packetFilter # PacketFilter aplicado aos bytes antes da decodificação (True = filtro padrão do analisador)
+        self.sampler = sampler.new() if sampler is not None else None # Sampler próprio da captura aplicado aos registros do índice, métricas do resumo são estimadas para a captura inteira
+        self.anomalyDetector = anomalyDetector # AnomalyDetector com a configuração dos detectores, cada estado agregado usa uma cópia vazia
+        self.followState = None # estado agregado da última chamada de follow()
+        self.memoryBudget = memoryBudget # memória (MB) de cada tabela por chave (getTcpKeys etc.), além dela trechos ordenados vão para o disco
+        self.deduplicator = deduplicator.new() if deduplicator is not None else None # Deduplicator próprio da captura, descarta pacotes repetidos antes da decodificação
+        self.graphJobs = None # gráficos acumulados para renderização em lote (None = renderiza imediatamente)
+        self.graphMaxPoints = 4000 # máximo de pontos por gráfico de linha, séries maiores são dizimadas (None = todos os pontos)
+        self.graphCache = True # não renderiza gráficos cujo arquivo já foi gerado com os mesmos dados e estilo
 
         try:
-            self.packets = rdpcap(path)
+            if index or window is not None or self.packetFilter is not None or sampler is not None or deduplicator is not None:
+                self.index = PcapIndex.open(path)
+                self.recordIndexes = self.selectRecords()
+                self.packets = None # carregados somente quando getPackets() for chamado
+            elif pipeline and packetsMargin is None:
+                PcapIndex.readGlobalHeader(path) # valida captura, pacotes lidos pelo pipeline somente quando usados
+                self.packets = None
+            else:
+                self.packets = self.loadPackets()
         except Exception as e:
             print(f"Capture path is wrong or not specified: {e}")
             sys.exit(1)
 
+    # retorna índices dos registros a analisar: janela de tempo e exclusão dos n primeiros e n últimos
+    def selectRecords(self):
+        indexes = self.index.findWindow(*self.window) if self.window is not None else np.arange(len(self.index))
+
+        if self.packetsMargin != None:
+            indexes = indexes[self.packetsMargin:-self.packetsMargin]
+
+        # limites de tempo do filtro verificados no índice, sem ler o arquivo
+        if self.packetFilter is not None and (self.packetFilter.start is not None or self.packetFilter.end is not None):
+            times = self.index.times[indexes]
+            keep = np.ones(len(indexes), dtype=bool)
+            if self.packetFilter.start is not None:
+                keep &= times >= self.packetFilter.start
+            if self.packetFilter.end is not None:
+                keep &= times < self.packetFilter.end
+            indexes = indexes[keep]
+
+        # amostragem por último, somente registros amostrados são lidos
+        if self.sampler is not None:
+            self.population = indexes
+            indexes = self.sampler.select(indexes, self.index.times[indexes], self.getSampleKeys(indexes))
+
+        return indexes
+
+    # retorna chave de amostragem (bytes) do registro, None = pacote amostrado individualmente
+    @staticmethod
+    def getSampleKey(raw, linkType):
+        return None
+
+    # retorna chaves de 32 bits dos registros (crc32 de getSampleKey, registros sem chave usam a posição na captura),
+    # lendo somente os bytes dos registros; None = analisador amostra por pacote
+    def getSampleKeys(self, indexes):
+        if not self.sampleByKey or self.sampler.method == "time":
+            return None
+
+        linkType = self.index.linkType
+        keys = np.empty(len(indexes), dtype=np.uint32)
+
+        for n, (i, _, _, raw) in enumerate(self.index.iterRecords(indexes)):
+            key = self.getSampleKey(raw, linkType)
+            keys[n] = zlib.crc32(b"k" + key) if key is not None else zlib.crc32(b"p" + int(i).to_bytes(8, "little"))
+
+        return keys
+
+    # retorna posição na captura de cada pacote analisado (modo indexado)
+    def getPacketPositions(self):
+        packets = self.getPackets()
+
+        if isinstance(packets, PacketTable):
+            return packets.getColumn("index")
+
+        if len(packets) == len(self.recordIndexes): # nenhum registro descartado pelo filtro ou deduplicação
+            return self.recordIndexes
+
+        return np.array([record[0] for record in self.iterRecords()], dtype=np.int64)
+
+    # retorna registros brutos selecionados que passam no filtro de cabeçalhos e não são duplicados: (índice, tempo em ns, tamanho original, bytes)
+    def iterRecords(self):
+        linkType = self.index.linkType
+        headerRules = self.packetFilter is not None and self.packetFilter.hasHeaderRules()
+        if self.deduplicator is not None: # cada leitura começa sem hashes vistos (getState no pipeline e getPackets leem a captura)
+            self.deduplicator = self.deduplicator.new()
+
+        for record in self.index.iterRecords(self.recordIndexes):
+            if headerRules and not self.packetFilter.match(record[3], linkType):
+                continue
+            if self.deduplicator is not None and self.deduplicator.isDuplicate(record[3], linkType, record[1]):
+                continue
+            yield record
+
+    # lê captura, em modo compacto os pacotes scapy são descartados após extração dos campos
+    # com índice, somente os registros selecionados são lidos
+    def loadPackets(self):
+        if self.pipeline:
+            return self.newPipeline().run()
+
+        if self.index is not None:
+            packets = ((i, self.index.decode(raw, time, wireLength)) for i, time, wireLength, raw in self.iterRecords())
+            return PacketTable.fromIndexedPackets(packets) if self.compact else PacketList([pkt for _, pkt in packets])
+
+        loadLayers() # camadas de enlace, rede e transporte do scapy
+        if not self.compact:
+            return rdpcap(self.path)
+
+        with PcapReader(self.path) as reader:
+            return PacketTable.fromPackets(reader)
+
+    # cria pipeline dos registros a analisar
+    def newPipeline(self):
+        if self.index is not None: # filtro e deduplicação aplicados na thread de leitura
+            return Pipeline(self.iterRecords(), self.index.linkType, workers=self.workers)
+
+        return Pipeline.fromCapture(self.path, packetFilter=self.packetFilter, workers=self.workers)
+
+    # retorna True se os pacotes ainda não foram lidos (modo indexado) e os registros selecionados são exatamente os pacotes analisados,
+    # métricas gerais vêm do índice
+    def isLazy(self):
+        return (self.index is not None and self.packets is None and (self.packetFilter is None or not self.packetFilter.hasHeaderRules())
+                and self.deduplicator is None)
+
+    # relê pacote original (objeto scapy) pela posição na captura
+    def loadRawPacket(self, index):
+        if self.index is not None:
+            return self.index.readPacket(index)
+
+        loadLayers()
+        with PcapReader(self.path) as reader:
+            for i, pkt in enumerate(reader):
+                if i == index:
+                    return pkt
+
+        return None
+
     # retorna pacotes, pode excluir os n primeiros e n últimos para evitar viés de borda
     def getPackets(self):
+        if self.packets is None:
+            self.packets = self.loadPackets()
+
+        if self.index is not None: # margem já aplicada na seleção de registros
+            return self.packets
+
         if self.packetsMargin != None:
             return self.packets[self.packetsMargin:-self.packetsMargin]
         else:
@@ -25,11 +199,18 @@ class PacketAnalyzer():
         
     # retorna pacote específico
     def getPacket(self, pkt):
+        if self.isLazy(): # lê somente o registro pedido
+            return self.index.readPacket(self.recordIndexes[pkt]) if len(self.recordIndexes) > 0 else 0
+
         return self.getPackets()[pkt] if len(self.getPackets()) > 0 else 0
     
-    # retorna tempo de captura de pacote em ms
+    # retorna tempo de captura de pacote em ns (inteiro), usado em todos os cálculos de tempo
+    def getTimeNs(self, pkt):
+        return getTimeNs(pkt)
+
+    # retorna tempo de captura de pacote em ms (apresentação)
     def getTime(self, pkt):
-        return float(pkt.time*1000)
+        return self.getTimeNs(pkt) / 1e6
     
     # retorna id
     def getId(self):
@@ -37,23 +218,43 @@ class PacketAnalyzer():
     
     # retorna número total de pacotes
     def getTotalPackets(self):
+        if self.isLazy():
+            return len(self.recordIndexes)
+
         return len(self.getPackets())
     
     # retorna total de bytes capturados
     def getTotalBytes(self):
+        if self.isLazy():
+            return int(self.index.lengths[self.recordIndexes].sum(dtype=np.int64))
+
+        if isinstance(self.getPackets(), PacketTable):
+            return self.getPackets().getTotalBytes()
+
         return sum(len(pkt) for pkt in self.getPackets()) if self.getTotalPackets() > 0 else 0
     
     # retorna tempo total de captura em ms
     def getTotalTime(self):
+        if self.isLazy():
+            times = self.index.times[self.recordIndexes]
+            return (int(times[-1]) - int(times[0]))/1e6 if len(times) > 0 else 0
+
         return self.getTimeDiff(self.getPackets()[0], self.getPackets()[-1]) if self.getTotalPackets() > 0 else 0
     
+    # retorna tempo do primeiro pacote analisado em s (epoch), None sem pacotes
+    def getStartTime(self):
+        if self.isLazy():
+            return int(self.index.times[self.recordIndexes[0]]) / 1e9 if len(self.recordIndexes) > 0 else None
+
+        return self.getTimeNs(self.getPackets()[0]) / 1e9 if self.getTotalPackets() > 0 else None
+
     # retorna pacotes capturados por segundo
     def getCaptureRate(self):
         return self.getTotalPackets()/self.getTotalTime() if self.getTotalTime() > 0 else 0
 
-    # recebe dois pacotes e retorna a diferença de tempo de captura entre eles
+    # recebe dois pacotes e retorna a diferença de tempo de captura entre eles em ms (diferença exata em ns)
     def getTimeDiff(self, pkt1, pkt2):
-        return self.getTime(pkt2) - self.getTime(pkt1)
+        return (self.getTimeNs(pkt2) - self.getTimeNs(pkt1)) / 1e6
     
     # retorna throughput medido em Mbps
     def getThroughput(self):
@@ -63,12 +264,17 @@ class PacketAnalyzer():
     
     # retorna lista de camadas e quantidade total encontrada por camada
     def getLayers(self):
-        layers = Counter() 
+        packets = self.getPackets()
 
-        for pkt in self.getPackets():
-            while pkt:
-                layers[pkt.name] += 1 # incrementa número de camadas
-                pkt = pkt.payload # próxima camada, payload da camada atual
+        if isinstance(packets, PacketTable):
+            layers = Counter(packets.countLayers()) # contagem vetorizada na tabela compacta
+        else:
+            layers = Counter()
+
+            for pkt in packets:
+                while pkt:
+                    layers[pkt.name] += 1 # incrementa número de camadas
+                    pkt = pkt.payload # próxima camada, payload da camada atual
 
         nLayers = list(layers.values())
         layers = list(layers.keys())
@@ -92,6 +298,7 @@ class PacketAnalyzer():
         cv = (std/mean)*100 if mean > 0 else 0
 
         return {"jitters": jitters,
+                "histogram": Histogram.forTimes().fill(jitters),
                 "mean": mean,
                 "std": std,
                 "max": max,
@@ -102,7 +309,18 @@ class PacketAnalyzer():
     
     # salva visualização gráfica de pacote em pdf
     def getPdfDump(self, filename, pkt):
-        self.getPacket(pkt).pdfdump(filename, layer_shift=1)
+        packet = self.getPacket(pkt)
+
+        # registro compacto não tem os bytes do pacote, relê o original da captura
+        if isinstance(packet, PacketRecord):
+            packet = self.loadRawPacket(packet.index)
+
+        packet.pdfdump(filename, layer_shift=1)
+
+    # retorna tabela vazia para agregação por chave (SpillTable), limitada a memoryBudget com merge externo em disco
+    # combine: função que combina valores da mesma chave (ex: operator.add para contagens), None = último valor
+    def newKeyTable(self, combine=None):
+        return SpillTable(combine, self.memoryBudget)
 
     def getPacketByKey(self, key):
         pass
@@ -116,6 +334,389 @@ class PacketAnalyzer():
     def getLossStats(self):
         pass
 
+    # retorna nomes das camadas de um pacote
+    @staticmethod
+    def getLayerNames(pkt):
+        if isinstance(pkt, PacketRecord):
+            return pkt.layers
+
+        names = []
+        while pkt:
+            names.append(pkt.name)
+            pkt = pkt.payload
+
+        return names
+
+    # retorna estado agregado vazio, atualizado pacote a pacote na análise incremental (serializável)
+    def newState(self):
+        return {"packets": 0,
+                "bytes": 0,
+                "first": None,
+                "last": None,
+                "layers": Counter(),
+                "anomalies": self.anomalyDetector.new() if self.anomalyDetector is not None else None,
+                "duplicates": 0 if self.deduplicator is not None else None # pacotes duplicados descartados
+                }
+
+    # atualiza estado agregado com um pacote (tempos em ns)
+    def updateState(self, state, pkt):
+        time = self.getTimeNs(pkt)
+        state["packets"] += 1
+        state["bytes"] += len(pkt)
+        state["first"] = time if state["first"] is None else state["first"]
+        state["last"] = time
+        state["layers"].update(self.getLayerNames(pkt))
+
+        if state["anomalies"] is not None:
+            state["anomalies"].updateRate(time)
+
+    # retorna métricas a partir do estado agregado, mesmas chaves de getSummary()
+    def getStateMetrics(self, state):
+        totalTime = (state["last"] - state["first"]) / 1e6 if state["packets"] > 0 else 0
+        metrics = {"id": self.getId(),
+                   "totalPackets": state["packets"],
+                   "totalBytes": state["bytes"],
+                   "totalTime": totalTime,
+                   "throughput": (state["bytes"] * 8/totalTime)/1000 if totalTime > 0 else 0
+                   }
+
+        for layer, n in state["layers"].items():
+            metrics[f"layers.{layer}"] = n
+
+        if state["anomalies"] is not None:
+            metrics.update(state["anomalies"].getMetrics())
+
+        if state["duplicates"] is not None:
+            metrics["duplicates"] = state["duplicates"]
+
+        return metrics
+
+    # retorna estado agregado de todos os pacotes analisados (resultado parcial serializável da captura)
+    # no pipeline com pacotes ainda não lidos, cada bloco decodificado é agregado ao chegar, em paralelo com a leitura e a
+    # decodificação dos blocos seguintes, e descartado em seguida (sem montar a tabela da captura)
+    def getState(self):
+        state = self.newState()
+
+        if self.pipeline and self.packets is None and (self.index is not None or self.packetsMargin is None):
+            self.newPipeline().run(lambda table: self.updateStateTable(state, table))
+        else:
+            self.updateStateTable(state, self.getPackets())
+
+        if self.deduplicator is not None:
+            state["duplicates"] = self.deduplicator.duplicates
+
+        return state
+
+    # retorna estado parcial da captura para cache e combinação (CaptureSet): sem os dados pendentes de cada analisador
+    # (requisições sem resposta etc.), que mergeState e getStateMetrics não usam
+    def getPartial(self, state):
+        return dict(state)
+
+    # atualiza estado agregado com todos os pacotes de uma tabela ou lista, em ordem
+    def updateStateTable(self, state, packets):
+        for pkt in packets:
+            self.updateState(state, pkt)
+
+    # retorna métricas por janela de windowLength s (alinhadas ao epoch, comparáveis entre execuções) em uma única passada:
+    # lista de (início s, fim s, métricas do estado agregado da janela); pares requisição/resposta entre duas janelas não são contados
+    def getWindowMetrics(self, windowLength):
+        length = int(windowLength * 1e9)
+        states = {}
+
+        for pkt in self.getPackets():
+            window = self.getTimeNs(pkt) // length
+            if window not in states:
+                states[window] = self.newState()
+            self.updateState(states[window], pkt)
+
+        return [(window * length / 1e9, (window + 1) * length / 1e9, self.getStateMetrics(states[window])) for window in sorted(states)]
+
+    # combina estado agregado de outra captura neste estado
+    # dados pendentes (requisições sem resposta etc.) são próprios de cada captura e não são combinados
+    def mergeState(self, state, other):
+        state["packets"] += other["packets"]
+        state["bytes"] += other["bytes"]
+        state["first"] = min(t for t in (state["first"], other["first"]) if t is not None) if other["packets"] > 0 else state["first"]
+        state["last"] = max(t for t in (state["last"], other["last"]) if t is not None) if other["packets"] > 0 else state["last"]
+        state["layers"].update(other["layers"])
+
+        if state["anomalies"] is not None and other["anomalies"] is not None:
+            state["anomalies"].merge(other["anomalies"])
+
+        if state["duplicates"] is not None and other["duplicates"] is not None:
+            state["duplicates"] += other["duplicates"]
+
+        return state
+
+    # nova série incremental de tempos: estatísticas, histograma e jitter entre amostras consecutivas
+    @staticmethod
+    def newSeries():
+        return {"stats": OnlineStats(),
+                "histogram": Histogram.forTimes(),
+                "jitter": OnlineStats(),
+                "jitterHistogram": Histogram.forTimes(),
+                "last": None
+                }
+
+    # adiciona amostra a uma série
+    @staticmethod
+    def addSample(series, value):
+        series["stats"].add(value)
+        series["histogram"].add(value)
+
+        if series["last"] is not None:
+            jitter = abs(value - series["last"])
+            series["jitter"].add(jitter)
+            series["jitterHistogram"].add(jitter)
+
+        series["last"] = value
+
+    # combina série de outra captura nesta série
+    @staticmethod
+    def mergeSeries(series, other):
+        series["stats"].merge(other["stats"])
+        series["histogram"].merge(other["histogram"])
+        series["jitter"].merge(other["jitter"])
+        series["jitterHistogram"].merge(other["jitterHistogram"])
+        series["last"] = other["last"]
+
+        return series
+
+    # retorna métricas de uma série com prefixo (ex: rtt.mean, rttJitter.mean)
+    def getSeriesMetrics(self, prefix, series):
+        metrics = self.flattenStats(prefix, dict(series["stats"].getStats(), histogram=series["histogram"]))
+        metrics.update(self.flattenStats(prefix + "Jitter", dict(series["jitter"].getStats(), histogram=series["jitterHistogram"])))
+
+        return metrics
+
+    # análise incremental de captura em crescimento: retoma do último registro lido (checkpoint com posição e estado agregado),
+    # processa somente registros novos e retorna métricas de toda a captura
+    def follow(self, checkpointPath=None):
+        if self.index is None:
+            self.index = PcapIndex.open(self.path)
+
+        checkpointPath = checkpointPath or self.path + ".ckpt"
+        checkpoint = self.loadCheckpoint(checkpointPath)
+
+        start = int(np.searchsorted(self.index.offsets, checkpoint["offset"]))
+        headerRules = self.packetFilter is not None and self.packetFilter.hasHeaderRules()
+        deduplicator = checkpoint["deduplicator"] # janela de hashes continua entre execuções
+
+        for _, time, wireLength, raw in self.index.iterRecords(range(start, len(self.index))):
+            if headerRules and not self.packetFilter.match(raw, self.index.linkType, time):
+                continue
+            if deduplicator is not None and deduplicator.isDuplicate(raw, self.index.linkType, time):
+                continue
+            self.updateState(checkpoint["state"], self.index.decode(raw, time, wireLength))
+
+        if deduplicator is not None:
+            checkpoint["state"]["duplicates"] = deduplicator.duplicates
+        checkpoint["offset"] = self.index.end
+        self.saveCheckpoint(checkpointPath, checkpoint)
+        self.followState = checkpoint["state"]
+
+        return self.getStateMetrics(checkpoint["state"])
+
+    # carrega checkpoint, novo se não existir ou se a captura foi substituída (rotação) ou é de outro analisador
+    def loadCheckpoint(self, checkpointPath):
+        firstTime = int(self.index.times[0]) if len(self.index) > 0 else None
+
+        try:
+            with open(checkpointPath, "rb") as f:
+                checkpoint = pickle.load(f)
+
+            if (checkpoint["analyzer"] == type(self).__name__ and checkpoint.get("version") == self.stateVersion
+                    and checkpoint["firstTime"] == firstTime and checkpoint["offset"] <= self.index.end
+                    and repr(checkpoint["state"]["anomalies"]) == repr(self.anomalyDetector)
+                    and repr(checkpoint["deduplicator"]) == repr(self.deduplicator)):
+                return checkpoint
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+        return {"analyzer": type(self).__name__,
+                "version": self.stateVersion,
+                "firstTime": firstTime,
+                "offset": 0,
+                "state": self.newState(),
+                "deduplicator": self.deduplicator
+                }
+
+    # grava checkpoint de forma atômica (arquivo temporário + rename)
+    @staticmethod
+    def saveCheckpoint(checkpointPath, checkpoint):
+        tmpPath = checkpointPath + ".tmp"
+
+        with open(tmpPath, "wb") as f:
+            pickle.dump(checkpoint, f)
+
+        os.replace(tmpPath, checkpointPath)
+
+    # retorna dicionário plano (somente escalares) com as métricas selecionadas, cada estatística é calculada uma única vez
+    # bootstrap: Bootstrap para intervalos de confiança da média, mediana e p99 de cada série (ex: rtt.bootstrap.p99.low), None = sem intervalos
+    def getSummary(self, rtt=False, interval=False, jitter=False, loss=False, layers=False, bootstrap=None):
+        summary = {"id": self.getId(),
+                   "totalPackets": self.getTotalPackets(),
+                   "totalBytes": self.getTotalBytes(),
+                   "totalTime": self.getTotalTime(),
+                   "throughput": self.getThroughput()
+                   }
+
+        rttStats = self.getRttStats() if rtt or jitter else None
+        intervalStats = self.getIntervalStats() if interval or jitter else None
+
+        if rtt and rttStats:
+            summary.update(self.flattenStats("rtt", rttStats))
+            if bootstrap is not None:
+                summary.update(self.flattenStats("rtt.bootstrap", bootstrap.getIntervals(rttStats.get("rtts"))))
+
+        if interval and intervalStats:
+            summary.update(self.flattenStats("interval", intervalStats))
+            if bootstrap is not None:
+                summary.update(self.flattenStats("interval.bootstrap", bootstrap.getIntervals(intervalStats.get("intervals"))))
+
+        if jitter:
+            for prefix, stats, key in (("rttJitter", rttStats, "rtts"), ("intervalJitter", intervalStats, "intervals")):
+                if stats and len(stats.get(key)) > 0:
+                    jitterStats = self.getJitterStats(stats.get(key))
+                    summary.update(self.flattenStats(prefix, jitterStats))
+                    if bootstrap is not None and jitterStats:
+                        summary.update(self.flattenStats(f"{prefix}.bootstrap", bootstrap.getIntervals(jitterStats.get("jitters"))))
+
+        if loss:
+            summary.update(self.flattenStats("loss", self.getLossStats()))
+
+        if layers:
+            layersStats = self.getLayers()
+            for layer, n in zip(layersStats.get("layers"), layersStats.get("nLayers")):
+                summary[f"layers.{layer}"] = n
+
+        if self.deduplicator is not None:
+            self.getPackets() # contagem de duplicados é feita na leitura
+            summary["duplicates"] = self.deduplicator.duplicates
+
+        # com amostragem, métricas gerais, camadas e média de rtt são substituídas pelas estimativas da captura inteira
+        if self.sampler is not None:
+            estimates = self.getSamplingEstimates(rtt, layers)
+            if rtt and "rtt.mean" not in estimates: # nenhum par amostrado: rtt não é estimável (não é 0 ms)
+                summary = {key: value for key, value in summary.items() if not key.startswith("rtt.")}
+            summary.update(estimates)
+
+        return summary
+
+    # retorna eventos de anomalia (tempo em s, métrica, detector, linha de base, observado) em uma única passada pelos pacotes
+    # state: estado agregado já calculado (ex: followState), None = calcula a partir dos pacotes
+    def getAnomalyEvents(self, state=None):
+        if self.anomalyDetector is None:
+            print("Anomaly detection is not enabled (anomalyDetector)")
+            return []
+
+        state = state or self.getState()
+
+        return state["anomalies"].events
+
+    # imprime eventos de anomalia
+    def printAnomalyMetrics(self, state=None):
+        events = self.getAnomalyEvents(state)
+
+        print(f"Anomalies: {len(events)} events")
+        for event in events:
+            print(f"{event['time']:.6f} {event['metric']} ({event['detector']}): baseline {event['baseline']:.4f}, observed {event['observed']:.4f}")
+        print()
+
+    # retorna estimativas para a captura inteira a partir dos pacotes amostrados, com intervalo de confiança (chaves .low e .high)
+    # sem filtro de cabeçalhos e deduplicação, total de pacotes, bytes e throughput são exatos (índice); senão são escalados, como as camadas
+    # rtt é a média dos pares requisição/resposta amostrados, omitido sem pares
+    def getSamplingEstimates(self, rtt=False, layers=False):
+        packets = self.getPackets()
+
+        if isinstance(packets, PacketTable):
+            lengths = packets.getColumn("length")
+            times = packets.getColumn("time")
+            layerNames = [packets.layerSets[i] for i in packets.getColumn("layers")] if layers else None
+        else:
+            lengths = np.array([len(pkt) for pkt in packets], dtype=np.int64)
+            times = np.array([self.getTimeNs(pkt) for pkt in packets], dtype=np.int64)
+            layerNames = [self.getLayerNames(pkt) for pkt in packets] if layers else None
+
+        totalTime = self.sampler.span / 1e6 # duração exata, do índice
+        estimates = {"sampling.method": self.sampler.method,
+                     "sampling.rate": self.sampler.getSamplingRate(),
+                     "sampling.packets": len(lengths),
+                     "sampling.confidence": self.sampler.confidence,
+                     "totalTime": totalTime
+                     }
+
+        def addEstimate(key, estimate):
+            estimates[key], estimates[f"{key}.low"], estimates[f"{key}.high"] = estimate
+
+        positions = self.getPacketPositions() if self.sampler.keys is not None else None
+
+        if (self.packetFilter is None or not self.packetFilter.hasHeaderRules()) and self.deduplicator is None:
+            totalBytes = int(self.index.lengths[self.population].sum(dtype=np.int64))
+            estimates.update({"totalPackets": len(self.population),
+                              "totalBytes": totalBytes,
+                              "throughput": (totalBytes * 8/totalTime)/1000 if totalTime > 0 else 0
+                              })
+        else:
+            addEstimate("totalPackets", self.sampler.estimateTotal(np.ones(len(lengths)), times, positions))
+            totalBytes = self.sampler.estimateTotal(lengths, times, positions)
+            addEstimate("totalBytes", totalBytes)
+            addEstimate("throughput", tuple((value * 8/totalTime)/1000 if totalTime > 0 else 0 for value in totalBytes))
+
+        if layers:
+            for layer in dict.fromkeys(name for names in layerNames for name in names):
+                addEstimate(f"layers.{layer}", self.sampler.estimateTotal([layer in names for names in layerNames], times, positions))
+
+        if rtt:
+            rttStats = self.getRttStats()
+            mean = self.sampler.estimateMean(rttStats.get("rtts") if rttStats else [])
+            if mean is not None:
+                addEstimate("rtt.mean", mean)
+
+        return estimates
+
+    # imprime estimativas da amostragem
+    def printSamplingMetrics(self, rtt=False, layers=False):
+        estimates = self.getSamplingEstimates(rtt, layers)
+        confidence = estimates["sampling.confidence"] * 100
+
+        print(f"Sampling: {estimates['sampling.method']}, {estimates['sampling.packets']} packets ({estimates['sampling.rate'] * 100:.2f}%)")
+        for key in estimates:
+            if f"{key}.low" in estimates:
+                print(f"Estimated {key}: {estimates[key]:.4f} ({confidence:.0f}% CI: {estimates[key + '.low']:.4f} - {estimates[key + '.high']:.4f})")
+        print()
+
+    # combina histogramas de várias capturas/trechos (mesmos intervalos) em um único histograma
+    @staticmethod
+    def mergeHistograms(histograms):
+        merged = None
+
+        for histogram in histograms:
+            merged = histogram.copy() if merged is None else merged.merge(histogram)
+
+        return merged
+
+    # retorna somente os valores escalares de um dicionário de estatísticas, com prefixo na chave (ex: rtt.mean)
+    # com histograma, inclui também quantidade de amostras e quantis
+    @staticmethod
+    def flattenStats(prefix, stats):
+        if not stats:
+            return {}
+
+        flat = {f"{prefix}.{key}": (value.item() if isinstance(value, np.generic) else value)
+                for key, value in stats.items()
+                if np.isscalar(value)
+                }
+
+        # quantidade de amostras e quantis do histograma (ex: rtt.n, rtt.p99)
+        histogram = stats.get("histogram")
+        if isinstance(histogram, Histogram):
+            flat[f"{prefix}.n"] = histogram.n
+            for q in QUANTILES:
+                flat[f"{prefix}.p{round(q * 100)}"] = float(histogram.getQuantile(q))
+
+        return flat
+
     # retorna quantidade correta de casas decimais para representação (value ± error)
     @staticmethod
     def getDecimalPlaces(error):
@@ -174,6 +775,33 @@ class PacketAnalyzer():
         print(f"Standard error: {error:.{places}f} ms")
         print(f"Percentage of standard deviation from the mean: {cv:.2f}%\n")
     
+    # retorna intervalos de confiança bootstrap de cada série com amostras: rtt, interval, rttJitter e intervalJitter
+    def getBootstrapStats(self, bootstrap=None):
+        bootstrap = bootstrap if bootstrap is not None else Bootstrap()
+        series = {}
+
+        rttStats = self.getRttStats()
+        intervalStats = self.getIntervalStats()
+
+        for name, stats, key in (("rtt", rttStats, "rtts"), ("interval", intervalStats, "intervals")):
+            if stats and len(stats.get(key)) > 0:
+                series[name] = stats.get(key)
+                jitterStats = self.getJitterStats(stats.get(key))
+                if jitterStats and len(jitterStats.get("jitters")) > 0:
+                    series[f"{name}Jitter"] = jitterStats.get("jitters")
+
+        return {name: bootstrap.getIntervals(data) for name, data in series.items()}
+
+    # imprime intervalos de confiança bootstrap de uma série (média, mediana e p99), casas decimais pela metade da largura do intervalo
+    def printBootstrapMetrics(self, layer, name, intervals):
+        confidence = intervals["confidence"] * 100
+
+        for statistic in BOOTSTRAP_STATISTICS:
+            low, high = intervals[f"{statistic}.low"], intervals[f"{statistic}.high"]
+            places = self.getDecimalPlaces((high - low) / 2) if high > low else 4 # intervalo sem largura (amostras repetidas)
+            print(f"{layer} {name} {statistic}: {intervals[statistic]:.{places}f} ms ({confidence:.0f}% CI: {low:.{places}f} - {high:.{places}f} ms)")
+        print(f"Bootstrap: {intervals['resamples']} resamples of {intervals['n']} samples ({intervals['method']})\n")
+
     # imprime métricas de perda de pacotes
     def printLossMetrics(self, layer, sent, received, lost, lossRate):
         print(f"{layer} sent packets: {sent}")
@@ -182,72 +810,94 @@ class PacketAnalyzer():
         print(f"{layer} loss rate: {lossRate}%\n")
         print("-------------------------------------------------------------------")
 
+    # passa a acumular gráficos em vez de renderizá-los imediatamente
+    def deferGraphs(self):
+        if self.graphJobs is None:
+            self.graphJobs = []
+
+    # retorna e esvazia lista de gráficos acumulados
+    def getGraphJobs(self):
+        jobs = self.graphJobs or []
+        self.graphJobs = [] if self.graphJobs is not None else None
+
+        return jobs
+
+    # renderiza gráficos acumulados, em processos paralelos
+    def renderGraphs(self, workers=None):
+        return GraphPlotter.renderJobs(self.getGraphJobs(), workers)
+
+    # renderiza gráfico ou acumula para renderização em lote
+    def submitGraph(self, filename, options, plots):
+        job = {"options": options, "plots": plots, "filename": filename, "cache": self.graphCache}
+
+        if self.graphJobs is not None:
+            self.graphJobs.append(job)
+        else:
+            renderJob(job)
+
     # plota gráfico de barra para o total de camadas
     def plotLayersGraph(self, path, id, layers, nLayers, title=None, xLabel=None, yLabel=None, legendFlag=True, horizontal=False):
-        layersGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendFlag=legendFlag, legendPosition="right")
-        layersGraph.plotBarGraph(layers, nLayers, plotLabel=layers, horizontal=horizontal)
-        layersGraph.saveGraph(path+id+"-layers.png")
+        self.submitGraph(path+id+"-layers.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendFlag": legendFlag, "legendPosition": "right"},
+                         [("plotBarGraph", {"x": layers, "y": nLayers, "plotLabel": layers, "horizontal": horizontal})])
 
     # plota gráfico de rtt 
     def plotRttGraph(self, path, id, xAxis, rtts, title=None, xLabel=None, yLabel=None):
-        rttGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel)
-        rttGraph.plotLineGraph(xAxis, rtts, color="blue", plotLabel="Round Trip Time", marker=None, autoScaleY=True)
-        rttGraph.saveGraph(path+id+"-rtt.png")
+        self.submitGraph(path+id+"-rtt.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel},
+                         [("plotLineGraph", {"x": xAxis, "y": rtts, "color": "blue", "plotLabel": "Round Trip Time", "marker": None, "autoScaleY": True, "maxPoints": self.graphMaxPoints})])
 
     # plota gráfico de intervalos de chegada entre pacotes
     def plotIntervalGraph(self, path, id, xAxis, intervals, title=None, xLabel=None, yLabel=None):
-        intervalGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel)
-        intervalGraph.plotLineGraph(xAxis, intervals, color="yellow", plotLabel="Packets arrival time interval", marker=None)
-        intervalGraph.saveGraph(path+id+"-interval.png")
+        self.submitGraph(path+id+"-interval.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel},
+                         [("plotLineGraph", {"x": xAxis, "y": intervals, "color": "yellow", "plotLabel": "Packets arrival time interval", "marker": None, "maxPoints": self.graphMaxPoints})])
 
     # plota gráfico de jitter baseado em rtt
     def plotRttJitterGraph(self, path, id, xAxis, jitters, title=None, xLabel=None, yLabel=None):
-        rttJitterGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel)
-        rttJitterGraph.plotLineGraph(xAxis, jitters, color="red", plotLabel="RTT based Jitter", marker=None)
-        rttJitterGraph.saveGraph(path+id+"-rtt-jitter.png")
+        self.submitGraph(path+id+"-rtt-jitter.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel},
+                         [("plotLineGraph", {"x": xAxis, "y": jitters, "color": "red", "plotLabel": "RTT based Jitter", "marker": None, "maxPoints": self.graphMaxPoints})])
 
     # plota gráfico de jitter baseado em intervalo de chegada
     def plotIntervalJitterGraph(self, path, id, xAxis, jitters, title=None, xLabel=None, yLabel=None):       
-        intervalJitterGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel)
-        intervalJitterGraph.plotLineGraph(xAxis, jitters, color="orange", plotLabel="Arrival time interval based Jitter", marker=None)
-        intervalJitterGraph.saveGraph(path+id+"-interval-jitter.png")
+        self.submitGraph(path+id+"-interval-jitter.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel},
+                         [("plotLineGraph", {"x": xAxis, "y": jitters, "color": "orange", "plotLabel": "Arrival time interval based Jitter", "marker": None, "maxPoints": self.graphMaxPoints})])
 
     # plota histograma de rtt
     def plotRttHistogram(self, path, id, rtts, title=None, xLabel=None, yLabel=None):        
-        rttHistogram = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendFlag=False)
-        rttHistogram.plotHistogram(rtts, color="blue")
-        rttHistogram.saveGraph(path+id+"-rtt-histogram.png")
+        self.submitGraph(path+id+"-rtt-histogram.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendFlag": False},
+                         [("plotHistogram", {"data": rtts, "color": "blue"})])
     
     # plota histograma de intervalos de chegada
     def plotIntervalHistogram(self, path, id, intervals, title=None, xLabel=None, yLabel=None):       
-        intervalHistogram = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendFlag=False)
-        intervalHistogram.plotHistogram(intervals, color="yellow")
-        intervalHistogram.saveGraph(path+id+"-interval-histogram.png")
+        self.submitGraph(path+id+"-interval-histogram.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendFlag": False},
+                         [("plotHistogram", {"data": intervals, "color": "yellow"})])
 
     # plota histograma de jitter baseado em rtt
     def plotRttJitterHistogram(self, path, id, jitters, title=None, xLabel=None, yLabel=None):
-        jitterHistogram = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendFlag=False)
-        jitterHistogram.plotHistogram(jitters, color="red")
-        jitterHistogram.saveGraph(path+id+"-rtt-jitter-histogram.png")
+        self.submitGraph(path+id+"-rtt-jitter-histogram.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendFlag": False},
+                         [("plotHistogram", {"data": jitters, "color": "red"})])
 
     # plota histogram de jitter baseado em intervalo de chegada
     def plotIntervalJitterHistogram(self, path, id, jitters, title=None, xLabel=None, yLabel=None):
-        jitterHistogram = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendFlag=False)
-        jitterHistogram.plotHistogram(jitters, color="orange")
-        jitterHistogram.saveGraph(path+id+"-interval-jitter-histogram.png")
+        self.submitGraph(path+id+"-interval-jitter-histogram.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendFlag": False},
+                         [("plotHistogram", {"data": jitters, "color": "orange"})])
     
     # plota gráfico de perda de pacotes
     def plotLossGraph(self, path, id, lossStats, title=None, xLabel=None, yLabel=None):       
-        lossGraph = GraphPlotter(title=title, xLabel=xLabel, yLabel=yLabel, legendPosition="right")
-        lossGraph.plotBarGraph(["sent", "received", "lost"], lossStats, ["gray", "green", "red"], ["Sent Packets", "Received Packets", "Lost Packets"])
-        lossGraph.saveGraph(path+id+"-loss.png")
+        self.submitGraph(path+id+"-loss.png",
+                         {"title": title, "xLabel": xLabel, "yLabel": yLabel, "legendPosition": "right"},
+                         [("plotBarGraph", {"x": ["sent", "received", "lost"], "y": lossStats, "color": ["gray", "green", "red"],
+                                            "plotLabel": ["Sent Packets", "Received Packets", "Lost Packets"]})])
 
     # plota gráfico de porcentagem de perda de pacotes
     def plotLossRateGraph(self, path, id, lossRate):       
-        lossRateGraph = GraphPlotter()
-        lossRateGraph.plotPizzaGraph(["received packets", "lost packets"], [100-lossRate, lossRate], ["green", "red"])
-        lossRateGraph.saveGraph(path+id+"-loss-rate.png")
-
-    
-
-    
\ No newline at end of file
+        self.submitGraph(path+id+"-loss-rate.png",
+                         {},
+                         [("plotPizzaGraph", {"labels": ["received packets", "lost packets"], "sizes": [100-lossRate, lossRate], "colors": ["green", "red"]})])
@@ -0,0 +1 @@
+from .packet_filter import PacketFilter
\ No newline at end of file
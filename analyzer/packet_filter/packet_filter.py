@@ -0,0 +1,130 @@
+import struct
+
+# tipos de enlace (linktype) com posição da camada de rede conhecida
+LINKTYPE_NULL = 0 # loopback BSD, 4 bytes de família de endereço
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101 # IP sem camada de enlace
+LINKTYPE_RAW_OPENBSD = 12
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+VLAN_ETHERTYPES = (0x8100, 0x88A8, 0x9100)
+
+# cabeçalhos de extensão IPv6 percorridos até o protocolo de transporte
+IPV6_EXTENSIONS = (0, 43, 60)
+IPV6_FRAGMENT = 44
+
+# protocolos com portas nos 4 primeiros bytes do cabeçalho
+PORT_PROTOS = (6, 17, 132) # TCP, UDP, SCTP
+
+# filtro barato aplicado aos bytes brutos de cada registro, antes de criar objetos scapy
+# verifica tempo do cabeçalho do registro e posições fixas de ethertype, protocolo IP e portas
+class PacketFilter:
+
+    def __init__(self, start=None, end=None, etherTypes=None, ipProtos=None, ports=None):
+        self.start = start # tempo mínimo em ns (epoch), inclusivo
+        self.end = end # tempo máximo em ns (epoch), exclusivo
+        self.etherTypes = set(etherTypes) if etherTypes is not None else None # ex: {0x0800}
+        self.ipProtos = set(ipProtos) if ipProtos is not None else None # ex: {1} ICMP, {6} TCP
+        self.ports = set(ports) if ports is not None else None # porta de origem ou destino
+
+    # retorna True se o filtro precisa ler bytes do pacote (além do tempo)
+    def hasHeaderRules(self):
+        return self.etherTypes is not None or self.ipProtos is not None or self.ports is not None
+
+    # verifica somente o tempo do registro
+    def matchTime(self, time):
+        return (self.start is None or time >= self.start) and (self.end is None or time < self.end)
+
+    # retorna ethertype e posição da camada de rede, ou (None, None) se desconhecido
+    @staticmethod
+    def getNetworkLayer(raw, linkType):
+        if linkType == LINKTYPE_ETHERNET:
+            if len(raw) < 14:
+                return None, None
+
+            offset = 12
+            etherType = struct.unpack_from("!H", raw, offset)[0]
+            while etherType in VLAN_ETHERTYPES and len(raw) >= offset + 6: # tags VLAN (802.1Q / QinQ)
+                offset += 4
+                etherType = struct.unpack_from("!H", raw, offset)[0]
+
+            return etherType, offset + 2
+
+        if linkType == LINKTYPE_LINUX_SLL:
+            return (struct.unpack_from("!H", raw, 14)[0], 16) if len(raw) >= 16 else (None, None)
+
+        if linkType in (LINKTYPE_RAW, LINKTYPE_RAW_OPENBSD, LINKTYPE_IPV4, LINKTYPE_IPV6):
+            if len(raw) < 1:
+                return None, None
+            version = raw[0] >> 4
+            return (ETHERTYPE_IPV4 if version == 4 else ETHERTYPE_IPV6 if version == 6 else None), 0
+
+        if linkType == LINKTYPE_NULL:
+            if len(raw) < 4:
+                return None, None
+            family = struct.unpack_from("<I", raw, 0)[0] # ordem de bytes da máquina de captura, famílias são pequenas
+            if family > 0xFFFF:
+                family = struct.unpack_from(">I", raw, 0)[0]
+            return (ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6 if family in (24, 28, 30) else None), 4
+
+        return None, None
+
+    # retorna protocolo de transporte e posição do cabeçalho de transporte (None se fragmento não inicial)
+    @staticmethod
+    def getTransportLayer(raw, etherType, offset):
+        if etherType == ETHERTYPE_IPV4 and len(raw) >= offset + 20:
+            headerLength = (raw[offset] & 0x0F) * 4
+            fragmentOffset = struct.unpack_from("!H", raw, offset + 6)[0] & 0x1FFF
+            return raw[offset + 9], (offset + headerLength if fragmentOffset == 0 else None)
+
+        if etherType == ETHERTYPE_IPV6 and len(raw) >= offset + 40:
+            proto = raw[offset + 6]
+            position = offset + 40
+
+            while proto in IPV6_EXTENSIONS + (IPV6_FRAGMENT,) and len(raw) >= position + 8:
+                if proto == IPV6_FRAGMENT:
+                    fragmentOffset = struct.unpack_from("!H", raw, position + 2)[0] >> 3
+                    proto = raw[position]
+                    position = position + 8 if fragmentOffset == 0 else None
+                    break
+
+                proto, position = raw[position], position + (raw[position + 1] + 1) * 8
+
+            return proto, position
+
+        return None, None
+
+    # retorna True se o registro passa no filtro
+    def match(self, raw, linkType, time=None):
+        if time is not None and not self.matchTime(time):
+            return False
+
+        if not self.hasHeaderRules():
+            return True
+
+        etherType, offset = self.getNetworkLayer(raw, linkType)
+        if etherType is None:
+            return False
+
+        if self.etherTypes is not None and etherType not in self.etherTypes:
+            return False
+
+        if self.ipProtos is None and self.ports is None:
+            return True
+
+        proto, position = self.getTransportLayer(raw, etherType, offset)
+        if proto is None or (self.ipProtos is not None and proto not in self.ipProtos):
+            return False
+
+        if self.ports is not None:
+            if proto not in PORT_PROTOS or position is None or len(raw) < position + 4:
+                return False
+
+            sport, dport = struct.unpack_from("!HH", raw, position)
+            return sport in self.ports or dport in self.ports
+
+        return True
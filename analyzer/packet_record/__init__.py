@@ -0,0 +1 @@
+from .packet_record import PacketRecord, PacketTable
\ No newline at end of file
@@ -0,0 +1,285 @@
+from scapy.layers.inet import IP, TCP, UDP, ICMP
+from scapy.layers.inet6 import IPv6
+from array import array
+from decimal import Decimal
+import numpy as np
+from analyzer.prefix_trie.prefix_trie import ipToInt, intToIp
+
+# colunas numéricas da tabela: nome -> typecode do array durante a leitura
+COLUMNS = {"index": "Q", # posição do pacote na captura, usada para recarregar o pacote original
+           "time": "q", # tempo de captura em ns (epoch)
+           "length": "I", # tamanho em bytes
+           "layers": "H", # índice da sequência de camadas em layerSets
+           "src": "I", # índice do endereço de origem em addresses
+           "dst": "I", # índice do endereço de destino em addresses
+           "proto": "B", # protocolo IP (ou next header IPv6)
+           "sport": "H",
+           "dport": "H",
+           "seq": "I", # número de sequência TCP ou ICMP
+           "ack": "I",
+           "flags": "H", # flags TCP
+           "type": "B", # tipo ICMP
+           "id": "H" # id ICMP
+           }
+
+# nomes das flags TCP na ordem dos bits, mesma representação de scapy (ex: 0x12 = "SA")
+FLAG_NAMES = "FSRPAUECN"
+
+# converte flags TCP inteiras em string
+def getFlagsString(flags):
+    return "".join(name for bit, name in enumerate(FLAG_NAMES) if flags >> bit & 1)
+
+# retorna tempo de captura em ns (inteiro exato) de pacote scapy ou registro da tabela
+def getTimeNs(pkt):
+    if isinstance(pkt, PacketRecord):
+        return pkt.timeNs
+
+    time = pkt.time # EDecimal em pacotes lidos de captura, conversão exata
+
+    return int(time * 1000000000) if isinstance(time, Decimal) else round(time * 1e9)
+
+# retorna nome da camada (mesmo nome de pkt.name) a partir da classe scapy ou string
+def getLayerName(layer):
+    return layer if isinstance(layer, str) else layer._name
+
+# tabela colunar de pacotes: guarda somente os campos usados pelos analisadores em vetores numpy
+# (dezenas de bytes por pacote em vez do objeto scapy completo)
+class PacketTable:
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in COLUMNS.items()} # vetores numpy após finish()
+        self.layerSets = [] # sequências de camadas distintas, ex: ("Ethernet", "IP", "ICMP", "Raw")
+        self.layerIndex = {}
+        self.addresses = [None] # endereços distintos como inteiros de 128 bits (IPv4 mapeado em IPv6), 0 = sem endereço
+        self.addressIndex = {None: 0}
+        self.size = 0
+
+    # cria tabela a partir de pacotes scapy (iterável, os pacotes não são mantidos)
+    # indexes: posição de cada pacote na captura, padrão 0, 1, 2...
+    @classmethod
+    def fromPackets(cls, packets, indexes=None):
+        indexes = indexes if indexes is not None else range(2**63)
+
+        return cls.fromIndexedPackets(zip(indexes, packets))
+
+    # cria tabela a partir de pares (posição na captura, pacote scapy)
+    @classmethod
+    def fromIndexedPackets(cls, packets):
+        table = cls()
+
+        for i, pkt in packets:
+            table.append(pkt, int(i))
+
+        return table.finish()
+
+    # junta tabelas em uma só, na ordem recebida (camadas e endereços de cada tabela são reindexados)
+    @classmethod
+    def concat(cls, tables):
+        table = cls()
+        columns = {name: [] for name in COLUMNS}
+
+        for part in tables:
+            layerMap = np.array([table.layerIndex.setdefault(names, len(table.layerIndex)) for names in part.layerSets], dtype=np.uint16)
+            addressMap = np.array([table.getAddressIndex(address) for address in part.addresses], dtype=np.uint32)
+
+            for name, column in part.columns.items():
+                columns[name].append(layerMap[column] if name == "layers" and len(column) > 0 else
+                                     addressMap[column] if name in ("src", "dst") and len(column) > 0 else column)
+
+            table.size += len(part)
+
+        table.layerSets = list(table.layerIndex)
+        table.columns = {name: np.concatenate(parts).astype(COLUMNS[name], copy=False) if parts else np.zeros(0, dtype=COLUMNS[name])
+                         for name, parts in columns.items()}
+
+        return table
+
+    # retorna índice do endereço, adicionando ao dicionário se necessário
+    def getAddressIndex(self, address):
+        if address not in self.addressIndex:
+            self.addressIndex[address] = len(self.addresses)
+            self.addresses.append(address)
+
+        return self.addressIndex[address]
+
+    # extrai campos de um pacote scapy e adiciona uma linha
+    def append(self, pkt, index):
+        names = []
+        layer = pkt
+        while layer:
+            names.append(layer.name)
+            layer = layer.payload
+
+        names = tuple(names)
+        if names not in self.layerIndex:
+            self.layerIndex[names] = len(self.layerSets)
+            self.layerSets.append(names)
+
+        src = dst = None
+        proto = sport = dport = seq = ack = flags = icmpType = icmpId = 0
+
+        if IP in pkt:
+            src, dst, proto = ipToInt(pkt[IP].src), ipToInt(pkt[IP].dst), pkt[IP].proto
+        elif IPv6 in pkt:
+            src, dst, proto = ipToInt(pkt[IPv6].src), ipToInt(pkt[IPv6].dst), pkt[IPv6].nh
+
+        if TCP in pkt:
+            tcp = pkt[TCP]
+            sport, dport, seq, ack, flags = tcp.sport, tcp.dport, tcp.seq, tcp.ack, int(tcp.flags)
+        elif UDP in pkt:
+            sport, dport = pkt[UDP].sport, pkt[UDP].dport
+
+        if ICMP in pkt:
+            icmp = pkt[ICMP]
+            icmpType, icmpId, seq = icmp.type, icmp.id, icmp.seq
+
+        row = (index, getTimeNs(pkt), len(pkt), self.layerIndex[names], self.getAddressIndex(src), self.getAddressIndex(dst),
+               proto, sport, dport, seq, ack, flags, icmpType, icmpId)
+
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+
+        self.size += 1
+
+    # converte colunas para vetores numpy (sem cópia)
+    def finish(self):
+        self.columns = {name: np.frombuffer(column, dtype=column.typecode) if isinstance(column, array) else column
+                        for name, column in self.columns.items()}
+
+        return self
+
+    # retorna vetor de uma coluna
+    def getColumn(self, name):
+        return self.columns[name]
+
+    # retorna quantidade de pacotes por camada, na ordem em que as camadas aparecem
+    def countLayers(self):
+        counts = np.bincount(self.columns["layers"], minlength=len(self.layerSets))
+        layers = {}
+
+        for names, n in zip(self.layerSets, counts):
+            if n > 0:
+                for name in names:
+                    layers[name] = layers.get(name, 0) + int(n)
+
+        return layers
+
+    # retorna total de bytes
+    def getTotalBytes(self):
+        return int(self.columns["length"].sum(dtype=np.int64))
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield PacketRecord(self, i)
+
+    # índice inteiro retorna registro, fatia retorna nova tabela (vetores são views, sem cópia)
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            table = PacketTable()
+            table.layerSets, table.layerIndex = self.layerSets, self.layerIndex
+            table.addresses, table.addressIndex = self.addresses, self.addressIndex
+            table.columns = {name: column[key] for name, column in self.columns.items()}
+            table.size = len(table.columns["index"])
+            return table
+
+        if key < 0:
+            key += self.size
+        if key < 0 or key >= self.size:
+            raise IndexError("packet index out of range")
+
+        return PacketRecord(self, key)
+
+# visão de um pacote da tabela com a mesma interface de acesso de scapy usada pelos analisadores:
+# TCP in pkt, pkt[TCP].seq, pkt[IP].src, pkt[ICMP].type, pkt.time, len(pkt)
+class PacketRecord:
+    __slots__ = ("table", "i")
+
+    def __init__(self, table, i):
+        self.table = table
+        self.i = i
+
+    def getValue(self, column):
+        return self.table.columns[column][self.i].item()
+
+    # camadas do pacote
+    @property
+    def layers(self):
+        return self.table.layerSets[self.getValue("layers")]
+
+    def __contains__(self, layer):
+        return getLayerName(layer) in self.layers
+
+    # campos de todas as camadas ficam no próprio registro
+    def __getitem__(self, layer):
+        if layer not in self:
+            raise IndexError(f"Layer [{getLayerName(layer)}] not found")
+
+        return self
+
+    def __len__(self):
+        return self.getValue("length")
+
+    @property
+    def index(self):
+        return self.getValue("index")
+
+    # tempo em s, mesma unidade de pkt.time em scapy
+    @property
+    def time(self):
+        return self.getValue("time") / 1e9
+
+    @property
+    def timeNs(self):
+        return self.getValue("time")
+
+    # endereços como string, mesma representação de scapy
+    @property
+    def src(self):
+        return intToIp(self.srcInt)
+
+    @property
+    def dst(self):
+        return intToIp(self.dstInt)
+
+    @property
+    def srcInt(self):
+        return self.table.addresses[self.getValue("src")]
+
+    @property
+    def dstInt(self):
+        return self.table.addresses[self.getValue("dst")]
+
+    @property
+    def proto(self):
+        return self.getValue("proto")
+
+    @property
+    def sport(self):
+        return self.getValue("sport")
+
+    @property
+    def dport(self):
+        return self.getValue("dport")
+
+    @property
+    def seq(self):
+        return self.getValue("seq")
+
+    @property
+    def ack(self):
+        return self.getValue("ack")
+
+    @property
+    def flags(self):
+        return getFlagsString(self.getValue("flags"))
+
+    @property
+    def type(self):
+        return self.getValue("type")
+
+    @property
+    def id(self):
+        return self.getValue("id")
@@ -0,0 +1 @@
+from .pcap_index import PcapIndex
\ No newline at end of file
@@ -0,0 +1,283 @@
+import numpy as np
+import struct
+import os
+
+# magic numbers do formato pcap clássico: (ordem de bytes, resolução em ns)
+MAGICS = {b"\xd4\xc3\xb2\xa1": ("<", False),
+          b"\xa1\xb2\xc3\xd4": (">", False),
+          b"\x4d\x3c\xb2\xa1": ("<", True),
+          b"\xa1\xb2\x3c\x4d": (">", True)
+          }
+
+GLOBAL_HEADER_SIZE = 24
+RECORD_HEADER_SIZE = 16
+
+# importa somente as camadas de enlace, rede e transporte dissecadas pelos analisadores, na primeira decodificação:
+# leitura de bytes brutos (índice, filtros, correlação, microrajadas) não paga o custo de importação
+# tipos de enlace registrados em conf.l2types: l2 (Ethernet, loopback BSD, Linux SLL), inet/inet6 (IP sem enlace, IPv4, IPv6)
+# camadas de aplicação (DNS, NTP etc.) não são carregadas e aparecem como Raw
+# retorna configuração (tipos de enlace), camada Raw e EDecimal
+def loadLayers():
+    import scapy.layers.l2
+    import scapy.layers.inet
+    import scapy.layers.inet6
+    from scapy.config import conf
+    from scapy.packet import Raw
+    from scapy.utils import EDecimal
+
+    return conf, Raw, EDecimal
+
+# índice persistente (arquivo auxiliar ao lado da captura) com posição, tempo e tamanho de cada pacote
+# construído uma vez lendo somente os cabeçalhos dos registros, permite acesso direto a qualquer pacote ou janela de tempo
+class PcapIndex:
+
+    def __init__(self, path, indexPath=None):
+        self.path = path
+        self.indexPath = indexPath or path + ".idx.npz"
+        self.endian, self.nsResolution, self.linkType = self.readGlobalHeader(path)
+        self.offsets = np.zeros(0, dtype=np.int64) # posição do cabeçalho de cada registro no arquivo
+        self.times = np.zeros(0, dtype=np.int64) # tempo de captura em ns
+        self.lengths = np.zeros(0, dtype=np.uint32) # bytes capturados
+        self.wireLengths = np.zeros(0, dtype=np.uint32) # tamanho original do pacote
+        self.end = GLOBAL_HEADER_SIZE # posição após o último registro completo
+        self.sorted = True # registros em ordem crescente de tempo
+
+    # abre índice da captura: carrega arquivo auxiliar válido, estende se a captura cresceu ou constrói do zero
+    @classmethod
+    def open(cls, path, indexPath=None, save=True):
+        index = cls(path, indexPath)
+
+        if not index.load():
+            index.build()
+        elif os.path.getsize(path) > index.end:
+            index.update()
+        else:
+            return index
+
+        if save:
+            index.save()
+
+        return index
+
+    # lê cabeçalho global da captura: retorna ordem de bytes, resolução em ns e tipo de enlace
+    @staticmethod
+    def readGlobalHeader(path):
+        with open(path, "rb") as f:
+            header = f.read(GLOBAL_HEADER_SIZE)
+
+        if len(header) < GLOBAL_HEADER_SIZE:
+            raise ValueError(f"{path} is too short to be a pcap capture")
+
+        if header[:4] == b"\x0a\x0d\x0d\x0a":
+            raise ValueError(f"{path} is pcapng, only classic pcap captures can be indexed")
+
+        if header[:4] not in MAGICS:
+            raise ValueError(f"{path} is not a pcap capture")
+
+        endian, nsResolution = MAGICS[header[:4]]
+        linkType = struct.unpack(endian + "I", header[20:24])[0]
+
+        return endian, nsResolution, linkType
+
+    # retorna tempo em ns do primeiro registro da captura (None se vazia)
+    def readFirstTime(self):
+        with open(self.path, "rb") as f:
+            f.seek(GLOBAL_HEADER_SIZE)
+            header = f.read(RECORD_HEADER_SIZE)
+
+        if len(header) < RECORD_HEADER_SIZE:
+            return None
+
+        sec, frac = struct.unpack(self.endian + "II", header[:8])
+
+        return sec * 1000000000 + frac * (1 if self.nsResolution else 1000)
+
+    # percorre cabeçalhos de registros a partir de start, retorna vetores e posição após o último registro completo
+    def scan(self, start):
+        offsets, times, lengths, wireLengths = [], [], [], []
+        unpack = struct.Struct(self.endian + "IIII").unpack_from
+        scale = 1 if self.nsResolution else 1000
+        size = os.path.getsize(self.path)
+        position = start
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            while position + RECORD_HEADER_SIZE <= size:
+                header = f.read(RECORD_HEADER_SIZE)
+                if len(header) < RECORD_HEADER_SIZE:
+                    break
+
+                sec, frac, capLength, wireLength = unpack(header)
+                if position + RECORD_HEADER_SIZE + capLength > size: # registro incompleto (captura ainda sendo escrita)
+                    break
+
+                offsets.append(position)
+                times.append(sec * 1000000000 + frac * scale)
+                lengths.append(capLength)
+                wireLengths.append(wireLength)
+
+                position += RECORD_HEADER_SIZE + capLength
+                f.seek(position)
+
+        return (np.array(offsets, dtype=np.int64), np.array(times, dtype=np.int64),
+                np.array(lengths, dtype=np.uint32), np.array(wireLengths, dtype=np.uint32), position)
+
+    # constrói índice completo
+    def build(self):
+        self.offsets, self.times, self.lengths, self.wireLengths, self.end = self.scan(GLOBAL_HEADER_SIZE)
+        self.sorted = bool(np.all(np.diff(self.times) >= 0))
+
+        return self
+
+    # adiciona ao índice registros escritos após a última leitura
+    def update(self):
+        offsets, times, lengths, wireLengths, self.end = self.scan(self.end)
+
+        if len(times) > 0 and len(self.times) > 0 and times[0] < self.times[-1]:
+            self.sorted = False
+
+        self.offsets = np.concatenate((self.offsets, offsets))
+        self.times = np.concatenate((self.times, times))
+        self.lengths = np.concatenate((self.lengths, lengths))
+        self.wireLengths = np.concatenate((self.wireLengths, wireLengths))
+        self.sorted = self.sorted and bool(np.all(np.diff(times) >= 0))
+
+        return len(times)
+
+    # grava índice no arquivo auxiliar
+    def save(self):
+        try:
+            with open(self.indexPath, "wb") as f:
+                np.savez(f, offsets=self.offsets, times=self.times, lengths=self.lengths, wireLengths=self.wireLengths,
+                         meta=np.array([self.end, self.linkType, int(self.nsResolution), int(self.sorted)], dtype=np.int64))
+        except OSError as e:
+            print(f"Index could not be saved: {e}")
+
+    # carrega índice do arquivo auxiliar, retorna False se não existir ou não corresponder à captura
+    def load(self):
+        if not os.path.isfile(self.indexPath):
+            return False
+
+        try:
+            with np.load(self.indexPath) as data:
+                end, linkType, nsResolution, isSorted = data["meta"].tolist()
+                offsets, times, lengths, wireLengths = data["offsets"], data["times"], data["lengths"], data["wireLengths"]
+        except Exception:
+            return False
+
+        # captura substituída, truncada ou com outro cabeçalho
+        if os.path.getsize(self.path) < end or linkType != self.linkType or bool(nsResolution) != self.nsResolution:
+            return False
+
+        # captura rotacionada: primeiro registro diferente
+        if len(times) > 0 and self.readFirstTime() != int(times[0]):
+            return False
+
+        self.offsets, self.times, self.lengths, self.wireLengths = offsets, times, lengths, wireLengths
+        self.end, self.sorted = end, bool(isSorted)
+
+        return True
+
+    def __len__(self):
+        return len(self.offsets)
+
+    # retorna índices dos registros com tempo em [start, end) ns
+    def findTime(self, start=None, end=None):
+        if self.sorted:
+            i = np.searchsorted(self.times, start, "left") if start is not None else 0
+            j = np.searchsorted(self.times, end, "left") if end is not None else len(self)
+            return np.arange(i, max(i, j))
+
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.times >= start
+        if end is not None:
+            mask &= self.times < end
+
+        return np.nonzero(mask)[0]
+
+    # retorna índices dos registros na janela [start, end) em s, relativa ao primeiro pacote da captura
+    def findWindow(self, start=None, end=None):
+        if len(self) == 0:
+            return np.arange(0)
+
+        first = int(self.times.min())
+
+        return self.findTime(first + int(start * 1e9) if start is not None else None,
+                             first + int(end * 1e9) if end is not None else None)
+
+    # lê registros pelos índices, buscando no arquivo somente quando não são consecutivos
+    # retorna (índice, tempo em ns, tamanho original, bytes)
+    def iterRecords(self, indexes=None):
+        indexes = range(len(self)) if indexes is None else indexes
+
+        with open(self.path, "rb") as f:
+            position = -1
+            for i in indexes:
+                offset = int(self.offsets[i])
+                if offset != position:
+                    f.seek(offset + RECORD_HEADER_SIZE)
+                else:
+                    f.read(RECORD_HEADER_SIZE)
+
+                raw = f.read(int(self.lengths[i]))
+                position = offset + RECORD_HEADER_SIZE + len(raw)
+
+                yield int(i), int(self.times[i]), int(self.wireLengths[i]), raw
+
+    # lê um único registro
+    def readRecord(self, i):
+        return next(self.iterRecords([i]))
+
+    # lê registros em sequência direto da captura, sem índice: (posição, tempo em ns, tamanho original, bytes)
+    # para no primeiro registro incompleto (captura ainda sendo escrita)
+    def streamRecords(self):
+        unpack = struct.Struct(self.endian + "IIII").unpack
+        scale = 1 if self.nsResolution else 1000
+
+        with open(self.path, "rb") as f:
+            f.seek(GLOBAL_HEADER_SIZE)
+            i = 0
+            while True:
+                header = f.read(RECORD_HEADER_SIZE)
+                if len(header) < RECORD_HEADER_SIZE:
+                    break
+
+                sec, frac, capLength, wireLength = unpack(header)
+                raw = f.read(capLength)
+                if len(raw) < capLength:
+                    break
+
+                yield i, sec * 1000000000 + frac * scale, wireLength, raw
+                i += 1
+
+    # decodifica bytes de um registro em pacote scapy, de acordo com o tipo de enlace da captura
+    def decode(self, raw, time, wireLength=None):
+        return self.decodeRecord(raw, time, wireLength, self.linkType)
+
+    # decodifica bytes de um registro com tipo de enlace explícito (usado fora do índice, ex: processos de decodificação)
+    @staticmethod
+    def decodeRecord(raw, time, wireLength, linkType):
+        conf, Raw, EDecimal = loadLayers()
+        layer = conf.l2types.get(linkType, Raw)
+
+        try:
+            pkt = layer(raw)
+        except Exception:
+            pkt = Raw(raw)
+
+        pkt.time = EDecimal(time) / 1000000000
+        pkt.wirelen = wireLength
+
+        return pkt
+
+    # lê e decodifica pacote i
+    def readPacket(self, i):
+        _, time, wireLength, raw = self.readRecord(i)
+
+        return self.decode(raw, time, wireLength)
+
+    # lê e decodifica pacotes pelos índices
+    def iterPackets(self, indexes=None):
+        for _, time, wireLength, raw in self.iterRecords(indexes):
+            yield self.decode(raw, time, wireLength)
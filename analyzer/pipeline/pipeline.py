@@ -0,0 +1,110 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import threading
+import queue
+from analyzer.packet_record import PacketTable
+from analyzer.pcap_index import PcapIndex
+
+# fim dos registros na fila de leitura
+END = None
+
+# pipeline produtor-consumidor: leitura antecipada em uma thread, decodificação em processos paralelos e agregação,
+# ligados por filas limitadas (leitura para quando a decodificação está atrasada e vice-versa)
+# com leitura e decodificação sobrepostas o tempo total se aproxima do maior dos dois em vez da soma
+class Pipeline:
+
+    def __init__(self, records, linkType, packetFilter=None, chunkSize=2048, workers=None, queueSize=8):
+        self.records = records # iterável de registros brutos (posição, tempo em ns, tamanho original, bytes)
+        self.linkType = linkType
+        self.packetFilter = packetFilter if packetFilter is not None and packetFilter.hasHeaderRules() else None
+        self.chunkSize = chunkSize # registros por bloco enviado à decodificação
+        self.workers = workers # processos de decodificação (1 = decodifica na thread principal)
+        self.queueSize = queueSize # blocos lidos à frente e blocos em decodificação ao mesmo tempo
+        self.stop = threading.Event()
+
+    # cria pipeline para uma captura: registros selecionados do índice ou leitura sequencial do arquivo
+    @classmethod
+    def fromCapture(cls, path, index=None, indexes=None, **options):
+        if index is not None:
+            return cls(index.iterRecords(indexes), index.linkType, **options)
+
+        reader = PcapIndex(path)
+
+        return cls(reader.streamRecords(), reader.linkType, **options)
+
+    # produtor: lê registros, aplica filtro de cabeçalhos e envia blocos para a fila
+    def read(self, chunks):
+        try:
+            chunk = []
+            for record in self.records:
+                if self.packetFilter is not None and not self.packetFilter.match(record[3], self.linkType):
+                    continue
+
+                chunk.append(record)
+                if len(chunk) >= self.chunkSize:
+                    if not self.put(chunks, chunk):
+                        return
+                    chunk = []
+
+            if chunk:
+                self.put(chunks, chunk)
+        except Exception as e:
+            self.put(chunks, e)
+        finally:
+            self.put(chunks, END)
+
+    # coloca item na fila limitada, desistindo se o pipeline foi interrompido
+    def put(self, chunks, item):
+        while not self.stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    # executa o pipeline, cada tabela decodificada é entregue em ordem ao consumidor
+    # sem consumidor, retorna todas as tabelas juntas
+    def run(self, consumer=None):
+        tables = []
+        collect = consumer is None
+        consumer = tables.append if collect else consumer
+        chunks = queue.Queue(maxsize=self.queueSize)
+        reader = threading.Thread(target=self.read, args=(chunks,), daemon=True)
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers != 1 else None
+        pending = deque()
+
+        reader.start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if chunk is END:
+                    break
+
+                if executor is None:
+                    consumer(decodeChunk((chunk, self.linkType)))
+                    continue
+
+                pending.append(executor.submit(decodeChunk, (chunk, self.linkType)))
+                if len(pending) >= self.queueSize: # limite de blocos em decodificação
+                    consumer(pending.popleft().result())
+
+            while pending:
+                consumer(pending.popleft().result())
+        finally:
+            self.stop.set()
+            reader.join()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        return PacketTable.concat(tables) if collect else None
+
+# decodifica bloco de registros brutos em tabela compacta (executado em processo separado)
+def decodeChunk(args):
+    records, linkType = args
+
+    return PacketTable.fromIndexedPackets((i, PcapIndex.decodeRecord(raw, time, wireLength, linkType))
+                                          for i, time, wireLength, raw in records)
@@ -0,0 +1 @@
+from .prefix_trie import PrefixTrie
\ No newline at end of file
@@ -0,0 +1,117 @@
+import socket
+
+# endereços IP como inteiros de 128 bits: IPv6 direto, IPv4 mapeado em ::ffff:0:0/96 (mesmo espaço para as duas versões)
+IPV4_MAPPED = 0xFFFF << 32
+IPV4_MASK = 0xFFFFFFFF
+
+# converte endereço IPv4 ou IPv6 (string) em inteiro, None se não houver endereço
+def ipToInt(address):
+    if address is None:
+        return None
+
+    if ":" in address:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET6, address), "big")
+
+    return IPV4_MAPPED | int.from_bytes(socket.inet_aton(address), "big")
+
+# retorna True se o inteiro é um endereço IPv4 (mapeado)
+def isIpv4(value):
+    return value >> 32 == 0xFFFF
+
+# converte inteiro em endereço IPv4 ou IPv6 (string), usado somente na apresentação
+def intToIp(value):
+    if value is None:
+        return None
+
+    if isIpv4(value):
+        return socket.inet_ntoa((value & IPV4_MASK).to_bytes(4, "big"))
+
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, "big"))
+
+# retorna versão, bits do endereço na sua versão (32 ou 128) e quantidade de bits
+def getAddressBits(value):
+    if isIpv4(value):
+        return 4, value & IPV4_MASK, 32
+
+    return 6, value, 128
+
+# converte prefixo ("10.0.0.0/8", "2001:db8::/32" ou endereço sem tamanho) em (versão, bits do prefixo, tamanho)
+def parsePrefix(prefix):
+    address, _, length = prefix.partition("/")
+    version, bits, size = getAddressBits(ipToInt(address))
+    length = int(length) if length else size
+
+    if length < 0 or length > size:
+        raise ValueError(f"Invalid prefix length: {prefix}")
+
+    return version, bits >> (size - length), length
+
+# formata prefixo a partir de (versão, bits do prefixo, tamanho)
+def formatPrefix(version, bits, length):
+    size = 32 if version == 4 else 128
+    value = bits << (size - length) if length > 0 else 0
+
+    return f"{intToIp(IPV4_MAPPED | value if version == 4 else value)}/{length}"
+
+# retorna prefixo de tamanho fixo que contém o endereço (ex: /24), como string
+def getPrefix(value, length4=24, length6=64):
+    version, bits, size = getAddressBits(value)
+    length = min(length4 if version == 4 else length6, size)
+
+    return formatPrefix(version, bits >> (size - length), length)
+
+# árvore binária de prefixos IP (uma raiz por versão) para busca do prefixo mais longo que contém um endereço
+# cada nó é uma lista [filho 0, filho 1, (prefixo, valor) se algum prefixo termina no nó]
+class PrefixTrie:
+
+    def __init__(self):
+        self.roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size = 0
+
+    # cria árvore a partir de lista de prefixos ou dicionário prefixo -> valor (ex: prefixo -> AS)
+    @classmethod
+    def fromPrefixes(cls, prefixes):
+        trie = cls()
+        items = prefixes.items() if isinstance(prefixes, dict) else ((prefix, None) for prefix in prefixes)
+
+        for prefix, value in items:
+            trie.insert(prefix, value)
+
+        return trie
+
+    # adiciona prefixo com valor associado
+    def insert(self, prefix, value=None):
+        version, bits, length = parsePrefix(prefix)
+        node = self.roots[version]
+
+        for i in range(length - 1, -1, -1):
+            bit = bits >> i & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+
+        if node[2] is None:
+            self.size += 1
+        node[2] = (formatPrefix(version, bits, length), value)
+
+    # retorna (prefixo, valor) do prefixo mais longo que contém o endereço (inteiro ou string), None se nenhum
+    def lookup(self, address):
+        address = ipToInt(address) if isinstance(address, str) else address
+        version, bits, size = getAddressBits(address)
+        node = self.roots[version]
+        match = node[2]
+
+        for i in range(size - 1, -1, -1):
+            node = node[bits >> i & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                match = node[2]
+
+        return match
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, address):
+        return self.lookup(address) is not None
@@ -0,0 +1 @@
+from .results_store import ResultsStore
\ No newline at end of file
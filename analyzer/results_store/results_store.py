@@ -0,0 +1,111 @@
+import sqlite3
+import json
+import time
+
+# tabelas e índices: uma linha por execução e uma linha por métrica numérica (capture, janela, métrica, valor)
+# consultas de tendência (ex: rtt.p99 de h1-h3 no último mês) usam o índice (capture, metric, time) sem ler as capturas
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    analyzer TEXT,
+    options TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    capture TEXT NOT NULL,
+    time REAL NOT NULL,
+    end REAL,
+    window REAL,
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_capture_metric_time ON metrics (capture, metric, time);
+CREATE INDEX IF NOT EXISTS metrics_metric_time ON metrics (metric, time);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run);
+CREATE INDEX IF NOT EXISTS runs_time ON runs (time);
+"""
+
+# histórico de resultados dos analisadores em SQLite, entre execuções
+# cada linha de resumo (getSummary(), follow(), CaptureSet) vira uma linha por métrica numérica; time é o início da captura ou janela
+# (epoch s) quando conhecido, senão o tempo da execução; window é o tamanho da janela em s (None = captura inteira)
+# linhas acumuladas em memória e gravadas em lotes de batchSize, cada lote em uma única transação
+class ResultsStore:
+
+    def __init__(self, path, batchSize=1000):
+        self.path = path
+        self.batchSize = batchSize
+        self.pending = [] # linhas ainda não gravadas
+        self.runTimes = {} # execução -> tempo, usado nas linhas sem tempo dos pacotes
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL") # leitores (dashboards) não bloqueiam a gravação
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    # registra execução, retorna id usado nas linhas de métricas
+    def startRun(self, analyzer=None, options=None, runTime=None):
+        runTime = runTime if runTime is not None else time.time()
+
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO runs (time, analyzer, options) VALUES (?, ?, ?)",
+                                             (runTime, analyzer, json.dumps(options, sort_keys=True, default=str) if options is not None else None))
+        self.runTimes[cursor.lastrowid] = runTime
+
+        return cursor.lastrowid
+
+    # adiciona métricas numéricas de uma linha de resumo (id da captura em metrics["id"]), grava ao completar um lote
+    def addRow(self, run, metrics, start=None, end=None, window=None):
+        if start is None:
+            start = self.runTimes[run]
+
+        for metric, value in metrics.items():
+            if metric != "id" and isinstance(value, (int, float)) and value == value: # sem textos e NaN
+                self.pending.append((run, str(metrics.get("id")), start, end, window, metric, float(value)))
+
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    # grava linhas pendentes em uma transação
+    def flush(self):
+        if not self.pending:
+            return
+
+        with self.connection:
+            self.connection.executemany("INSERT INTO metrics (run, capture, time, end, window, metric, value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                        self.pending)
+        self.pending = []
+
+    # retorna linhas (tempo, fim, janela, valor, execução) de uma métrica, em ordem de tempo
+    # capture None = todas as capturas; since/until em epoch s; window None = resumos da captura inteira, "all" = qualquer janela
+    def query(self, metric, capture=None, since=None, until=None, window=None):
+        self.flush()
+        conditions, parameters = ["metric = ?"], [metric]
+
+        for condition, value in (("capture = ?", capture), ("time >= ?", since), ("time < ?", until)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        if window is None:
+            conditions.append("window IS NULL")
+        elif window != "all":
+            conditions.append("window = ?")
+            parameters.append(window)
+
+        cursor = self.connection.execute(f"SELECT capture, time, end, window, value, run FROM metrics WHERE {' AND '.join(conditions)} "
+                                         "ORDER BY time", parameters)
+
+        return [dict(zip(("capture", "time", "end", "window", "value", "run"), row)) for row in cursor]
+
+    # grava pendentes e fecha o banco
+    def close(self):
+        if self.connection is not None:
+            self.flush()
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
@@ -0,0 +1 @@
+from .sampler import Sampler
\ No newline at end of file
@@ -0,0 +1,151 @@
+from statistics import NormalDist
+import numpy as np
+
+METHODS = ["systematic", "random", "time"]
+
+# amostragem de registros da captura antes da decodificação (pacotes não amostrados nunca são lidos nem dissecados)
+# e estimativas escaladas para a captura inteira com intervalo de confiança
+# systematic: 1 a cada every registros; random: cada registro com probabilidade rate (seed reproduzível);
+# time: fatias de sliceTime s, 1 a cada every fatias (amostragem por conglomerados no tempo, preserva pares requisição/resposta)
+# com chaves por registro (ex: id+seq ICMP, fluxo TCP), systematic e random sorteiam chaves em vez de pacotes: pares requisição/resposta
+# ficam juntos na amostra e as estimativas usam a variância de conglomerados
+class Sampler:
+
+    def __init__(self, method="systematic", every=None, rate=None, seed=None, sliceTime=None, confidence=0.95):
+        if method not in METHODS:
+            raise ValueError(f"Unknown sampling method: {method}")
+
+        if method in ("systematic", "time") and (every is None or every < 1):
+            raise ValueError(f"Sampling method {method} requires every >= 1")
+
+        if method == "random" and (rate is None or not 0 < rate <= 1):
+            raise ValueError("Random sampling requires 0 < rate <= 1")
+
+        if method == "time" and (sliceTime is None or sliceTime <= 0):
+            raise ValueError("Time sampling requires sliceTime > 0")
+
+        self.method = method
+        self.every = every
+        self.rate = rate if method == "random" else 1/every # fração esperada de registros amostrados
+        self.seed = seed
+        self.sliceTime = sliceTime
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.populationSize = 0 # registros antes da amostragem
+        self.sampleSize = 0 # registros amostrados
+        self.span = 0 # duração da captura em ns (antes da amostragem)
+        self.origin = 0 # tempo do primeiro registro em ns, início da primeira fatia
+        self.nSlices = 0 # total de fatias de tempo da captura
+        self.sampledSlices = np.zeros(0, dtype=np.int64) # fatias amostradas
+        self.sample = np.zeros(0, dtype=np.int64) # índices amostrados
+        self.keys = None # chave (conglomerado) de cada registro amostrado, None = amostragem por pacote
+
+    # cria amostrador sem amostra com a mesma configuração (um por captura)
+    def new(self):
+        return Sampler(self.method, self.every, self.rate if self.method == "random" else None, self.seed, self.sliceTime, self.confidence)
+
+    # configuração, usada na identidade de parciais
+    def __repr__(self):
+        return (f"Sampler(method={self.method!r}, every={self.every}, rate={self.rate}, seed={self.seed}, sliceTime={self.sliceTime}, "
+                f"confidence={self.confidence})")
+
+    # retorna índices amostrados a partir dos índices dos registros e seus tempos em ns
+    # keys: chave inteira de 32 bits de cada registro (mesma chave = mesmo conglomerado), ignorada na amostragem por tempo
+    def select(self, indexes, times, keys=None):
+        self.populationSize = len(indexes)
+        self.keys = None
+        if len(indexes) == 0:
+            return indexes
+
+        self.origin = int(times.min())
+        self.span = int(times.max()) - self.origin
+        keys = np.asarray(keys, dtype=np.uint64) if keys is not None and self.method != "time" else None
+
+        if self.method == "systematic" and keys is not None:
+            start = np.random.default_rng(self.seed).integers(self.every) if self.seed is not None else 0
+            selected = keys % self.every == start
+            sample = indexes[selected]
+
+        elif self.method == "systematic":
+            start = np.random.default_rng(self.seed).integers(self.every) if self.seed is not None else 0
+            sample = indexes[start::self.every]
+
+        elif keys is not None:
+            # chave embaralhada com sal da semente e levada a [0, 1)
+            salt = np.uint64(np.random.default_rng(self.seed).integers(2**32) if self.seed is not None else 0)
+            selected = ((keys ^ salt) * np.uint64(0x9E3779B1) & np.uint64(0xFFFFFFFF)) / 2**32 < self.rate
+            sample = indexes[selected]
+
+        elif self.method == "random":
+            sample = indexes[np.random.default_rng(self.seed).random(len(indexes)) < self.rate]
+
+        else:
+            slices = self.getSlices(times)
+            self.nSlices = int(slices.max()) + 1
+            start = np.random.default_rng(self.seed).integers(self.every) if self.seed is not None else 0
+            self.sampledSlices = np.arange(start, self.nSlices, self.every)
+            sample = indexes[slices % self.every == start]
+
+        self.sampleSize = len(sample)
+        self.sample = np.asarray(sample)
+        if keys is not None:
+            self.keys = keys[selected]
+
+        return sample
+
+    # retorna fatia de tempo de cada tempo em ns
+    def getSlices(self, times):
+        return (np.asarray(times, dtype=np.int64) - self.origin) // int(self.sliceTime * 1e9)
+
+    # retorna fração de registros efetivamente amostrada
+    def getSamplingRate(self):
+        return self.sampleSize/self.populationSize if self.populationSize > 0 else 0
+
+    # estima total da captura a partir de um valor por pacote amostrado (1 para contagem, bytes, indicador de camada)
+    # times: tempos em ns dos pacotes (amostragem por tempo), positions: índices dos registros dos pacotes (amostragem por chave)
+    # retorna (estimativa, limite inferior, limite superior)
+    def estimateTotal(self, values, times=None, positions=None):
+        values = np.asarray(values, dtype=float)
+
+        if self.method == "time":
+            # total por fatia amostrada (fatias sem pacotes contam como 0), estimador de conglomerados
+            # fatias escolhidas de forma sistemática: variância pelas diferenças sucessivas entre fatias vizinhas (tendência no tempo
+            # não infla o intervalo como na variância de amostra aleatória simples)
+            m = len(self.sampledSlices)
+            if m == 0:
+                return 0, 0, 0
+
+            slices = np.searchsorted(self.sampledSlices, self.getSlices(times))
+            totals = np.bincount(slices, weights=values, minlength=m)
+            estimate = self.nSlices * totals.mean()
+            variance = self.nSlices**2 * (1 - m/self.nSlices) * np.sum(np.diff(totals)**2) / (2 * m * (m - 1)) if m > 1 else 0
+
+        elif self.keys is not None:
+            # conglomerados (chaves) incluídos com probabilidade rate: total de cada conglomerado amostrado
+            keys = self.keys[np.searchsorted(self.sample, positions)]
+            _, clusters = np.unique(keys, return_inverse=True)
+            totals = np.bincount(clusters, weights=values)
+            estimate = values.sum() / self.rate
+            variance = (1 - self.rate) / self.rate**2 * np.sum(totals**2)
+        else:
+            rate = self.getSamplingRate()
+            if rate == 0:
+                return 0, 0, 0
+
+            estimate = values.sum() / rate
+            variance = (1 - rate) / rate**2 * np.sum(values**2)
+
+        margin = self.z * np.sqrt(variance)
+
+        return float(estimate), float(max(estimate - margin, 0)), float(estimate + margin)
+
+    # estima média a partir das amostras (ex: rtt), retorna (média, limite inferior, limite superior), None sem amostras
+    def estimateMean(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return None
+
+        mean = values.mean()
+        margin = self.z * values.std(ddof=1)/np.sqrt(len(values)) if len(values) > 1 else 0
+
+        return float(mean), float(mean - margin), float(mean + margin)
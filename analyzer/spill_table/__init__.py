@@ -0,0 +1 @@
+from .spill_table import SpillTable
\ No newline at end of file
@@ -0,0 +1,146 @@
+from operator import itemgetter
+import tempfile
+import pickle
+import shutil
+import heapq
+import os
+
+ENTRY_BYTES = 300 # memória estimada por entrada (tupla de inteiros + entrada no dicionário), usada para converter o orçamento em entradas
+RUN_BATCH = 1024 # entradas por bloco gravado, memória da leitura de cada trecho
+MAX_RUNS = 64 # trechos em disco antes de combinar todos em um só, limita memória do merge a MAX_RUNS * RUN_BATCH entradas
+
+# tabela chave -> valor para agregações por chave com memória limitada (ex: chaves de segmentos TCP, contagem de retransmissões)
+# ao atingir memoryBudget (MB) as entradas são gravadas em disco como trecho ordenado por chave e a tabela em memória recomeça;
+# a leitura combina os trechos com merge externo, valores da mesma chave são combinados com combine (None = último valor)
+# sem trechos em disco a ordem é a de inserção, com trechos é a ordem das chaves (chaves devem ser comparáveis, ex: tuplas de inteiros)
+class SpillTable:
+
+    def __init__(self, combine=None, memoryBudget=None, directory=None):
+        self.combine = combine # função (valor anterior, valor novo) -> valor
+        self.maxEntries = max(int(memoryBudget * 2**20 / ENTRY_BYTES), 1) if memoryBudget is not None else None # None = nunca grava em disco
+        self.directory = directory # diretório dos trechos (None = diretório temporário do sistema)
+        self.entries = {}
+        self.runs = [] # arquivos dos trechos ordenados, do mais antigo ao mais novo
+        self.tmpDir = None
+        self.nRuns = 0 # trechos gravados, numera os arquivos
+
+    # adiciona valor à chave, combinando com o valor existente
+    def add(self, key, value):
+        if self.combine is not None and key in self.entries:
+            value = self.combine(self.entries[key], value)
+        self.entries[key] = value
+
+        if self.maxEntries is not None and len(self.entries) >= self.maxEntries:
+            self.spill()
+
+    # grava entradas em memória como trecho ordenado e libera a memória
+    def spill(self):
+        if not self.entries:
+            return
+
+        self.runs.append(self.writeRun(iter(sorted(self.entries.items(), key=itemgetter(0)))))
+        self.entries = {}
+
+        if len(self.runs) >= MAX_RUNS:
+            runs = self.runs
+            self.runs = [self.writeRun(self.mergeRuns(runs))]
+            for path in runs:
+                os.remove(path)
+
+    # grava trecho ordenado em blocos, retorna caminho
+    def writeRun(self, items):
+        if self.tmpDir is None:
+            self.tmpDir = tempfile.mkdtemp(prefix="spill-", dir=self.directory)
+
+        path = os.path.join(self.tmpDir, f"run-{self.nRuns}.pkl")
+        self.nRuns += 1
+        with open(path, "wb") as f:
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) == RUN_BATCH:
+                    pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return path
+
+    # lê trecho em sequência, um bloco por vez
+    @staticmethod
+    def readRun(path):
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                yield from batch
+
+    # merge externo de trechos ordenados (e opcionalmente das entradas em memória), combinando valores da mesma chave
+    # trechos mais novos vêm depois no empate, então combine recebe os valores na ordem de inserção
+    def mergeRuns(self, runs, entries=None):
+        streams = [self.readRun(path) for path in runs]
+        if entries:
+            streams.append(iter(sorted(entries.items(), key=itemgetter(0))))
+
+        current = None
+        for key, value in heapq.merge(*streams, key=itemgetter(0)):
+            if current is not None and key == current[0]:
+                current = (key, self.combine(current[1], value) if self.combine is not None else value)
+                continue
+            if current is not None:
+                yield current
+            current = (key, value)
+
+        if current is not None:
+            yield current
+
+    # retorna pares (chave, valor) com todas as chaves
+    def items(self):
+        if not self.runs:
+            return iter(self.entries.items())
+
+        return self.mergeRuns(self.runs, self.entries)
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def __iter__(self):
+        return self.keys()
+
+    # quantidade de chaves distintas (com trechos em disco, percorre o merge)
+    def __len__(self):
+        if not self.runs:
+            return len(self.entries)
+
+        return sum(1 for _ in self.items())
+
+    # retorna valor da chave (com trechos em disco, percorre o merge até a chave)
+    def get(self, key, default=None):
+        if not self.runs:
+            return self.entries.get(key, default)
+
+        for itemKey, value in self.items():
+            if itemKey == key:
+                return value
+            if itemKey > key:
+                break
+
+        return default
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    # remove trechos em disco
+    def close(self):
+        if self.tmpDir is not None:
+            shutil.rmtree(self.tmpDir, ignore_errors=True)
+            self.tmpDir = None
+        self.runs = []
+
+    def __del__(self):
+        self.close()
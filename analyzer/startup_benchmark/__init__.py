@@ -0,0 +1 @@
+from .startup_benchmark import StartupBenchmark
\ No newline at end of file
@@ -0,0 +1,4 @@
+import sys
+from analyzer.startup_benchmark.startup_benchmark import main
+
+sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,116 @@
+import argparse
+import subprocess
+import statistics
+import json
+import time
+import sys
+
+# módulos medidos por padrão: linha de comando e analisadores usados pelos scripts dos projetos
+MODULES = ["analyzer.cli.cli",
+           "analyzer.packet_analyzer",
+           "analyzer.icmp_analyzer",
+           "analyzer.tcp_analyzer",
+           "analyzer.microburst_analyzer"
+           ]
+
+# módulos pesados que a importação do pacote não deve carregar (importados somente ao decodificar, plotar ou gravar parquet)
+HEAVY = ["matplotlib", "scapy.all", "scapy.layers.all", "pandas", "pyarrow"]
+
+# mede o tempo de importação de módulos do pacote, cada repetição em um interpretador novo (sem cache de módulos)
+# tempo total (processo inteiro, descontado o interpretador vazio), tempo de importação do módulo (-X importtime),
+# módulos que mais custam e módulos pesados carregados
+class StartupBenchmark:
+
+    def __init__(self, modules=None, repeat=5, python=None):
+        self.modules = modules or MODULES
+        self.repeat = repeat
+        self.python = python or sys.executable
+        self.rows = None
+
+    # executa código em interpretador novo: retorna tempo total em s e saídas padrão e de erro
+    def runPython(self, code):
+        start = time.perf_counter()
+        result = subprocess.run([self.python, "-X", "importtime", "-c", code], capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+
+        return elapsed, result.stdout, result.stderr
+
+    # lê linhas do -X importtime: módulo -> (tempo próprio, tempo acumulado) em ms
+    @staticmethod
+    def parseImportTime(text):
+        times = {}
+
+        for line in text.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = (int(own) / 1e3, int(cumulative) / 1e3)
+
+        return times
+
+    # mede um módulo: medianas dos tempos, 5 módulos com maior tempo próprio e módulos pesados carregados
+    def measure(self, module, baseline=0.0):
+        code = f"import sys, json, {module}; print(json.dumps([name for name in {HEAVY!r} if name in sys.modules]))"
+        walls, imports = [], []
+
+        for _ in range(self.repeat):
+            wall, stdout, stderr = self.runPython(code)
+            times = self.parseImportTime(stderr)
+            walls.append(wall - baseline)
+            imports.append(times.get(module, (0, 0))[1])
+
+        top = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:5]
+
+        return {"module": module,
+                "wall": statistics.median(walls) * 1e3, # ms
+                "import": statistics.median(imports),
+                "heavy": ",".join(json.loads(stdout)),
+                "top": ",".join(f"{name}:{own:.0f}ms" for name, (own, _) in top)
+                }
+
+    # mede todos os módulos, descontando o tempo do interpretador vazio
+    def run(self):
+        baseline = statistics.median(self.runPython("pass")[0] for _ in range(self.repeat))
+        self.rows = [self.measure(module, baseline) for module in self.modules]
+
+        return self.rows
+
+    # imprime tempos de cada módulo
+    def printMetrics(self):
+        for row in self.rows if self.rows is not None else self.run():
+            print(f"{row['module']}: {row['wall']:.0f} ms (import {row['import']:.0f} ms)")
+            print(f"  heavy modules loaded: {row['heavy'] or 'none'}")
+            print(f"  slowest: {row['top']}")
+        print()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="analyzer.startup_benchmark", description="Measure the import time of analyzer modules")
+    parser.add_argument("modules", nargs="*", help="modules to import (default: command line and analyzers)")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--max-import", type=float, default=None, metavar="MS",
+                        help="fail (exit code 1) if a module takes longer than MS to import or loads a heavy module")
+    parser.add_argument("-o", "--output", default=None, help="write the results as json")
+    args = parser.parse_args(argv)
+
+    benchmark = StartupBenchmark(args.modules, repeat=args.repeat)
+    try:
+        rows = benchmark.run()
+    except RuntimeError as e:
+        print(f"Import failed: {e}")
+        return 1
+    benchmark.printMetrics()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+    if args.max_import is not None:
+        slow = [row["module"] for row in rows if row["import"] > args.max_import or row["heavy"]]
+        if slow:
+            print(f"Startup budget of {args.max_import:.0f} ms exceeded: {', '.join(slow)}")
+            return 1
+
+    return 0
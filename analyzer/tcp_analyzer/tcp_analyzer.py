@@ -1,13 +1,49 @@
-from scapy.all import TCP
+from scapy.layers.inet import TCP
 import numpy as np
+import operator
 from analyzer.packet_analyzer import PacketAnalyzer
+from analyzer.packet_analyzer.packet_analyzer import SERIES_NAMES
 from analyzer.ip_analyzer import IpAnalyzer
+from analyzer.prefix_trie.prefix_trie import ipToInt, intToIp
+from analyzer.histogram import Histogram
+from analyzer.packet_filter import PacketFilter
+from analyzer.packet_filter.packet_filter import ETHERTYPE_IPV4, ETHERTYPE_IPV6
+
+# estado agregado (follow, parciais): números de sequência recentes guardados por fluxo, retransmissões mais antigas contam como novas
+SEQ_WINDOW = 1024
+# fluxos e SYNs sem resposta sem pacotes há mais de FLOW_TIMEOUT s são descartados do estado (verificado a cada EXPIRE_PACKETS pacotes TCP)
+FLOW_TIMEOUT = 120
+EXPIRE_PACKETS = 4096
 
 # analisador de camada TCP
 class TcpAnalyzer(PacketAnalyzer):
+    defaultFilter = PacketFilter(ipProtos={6}) # somente TCP, demais pacotes descartados antes da decodificação
+
+    sampleByKey = True
+
+    def __init__(self, id=None, packetsMargin=None, path=None, **options):
+        super().__init__(id, packetsMargin, path, **options)
+
+    # chave de amostragem: conexão (endereços e portas nos dois sentidos), SYN e SYN-ACK e retransmissões ficam na mesma amostra
+    # override
+    @staticmethod
+    def getSampleKey(raw, linkType):
+        etherType, offset = PacketFilter.getNetworkLayer(raw, linkType)
+        proto, position = PacketFilter.getTransportLayer(raw, etherType, offset)
 
-    def __init__(self, id=None, packetsMargin=None, path=None):
-        super().__init__(id, packetsMargin, path)
+        if proto != 6 or position is None or len(raw) < position + 4:
+            return None
+
+        if etherType == ETHERTYPE_IPV4:
+            src, dst = raw[offset + 12:offset + 16], raw[offset + 16:offset + 20]
+        elif etherType == ETHERTYPE_IPV6:
+            src, dst = raw[offset + 8:offset + 24], raw[offset + 24:offset + 40]
+        else:
+            return None
+
+        endpoints = sorted((bytes(src) + bytes(raw[position:position + 2]), bytes(dst) + bytes(raw[position + 2:position + 4])))
+
+        return endpoints[0] + endpoints[1]
 
     # retorna TCP source port
     def getTcpSport(self, pkt):
@@ -64,26 +100,30 @@ class TcpAnalyzer(PacketAnalyzer):
 
         return sorted(list(seqsSet)) if seqsSet else []
 
-    # retorna pares tuplas com atributos TCP e IP e pacote equivalente para cada pacote TCP
+    # retorna tabela (SpillTable) de tuplas com atributos TCP e IP (endereços inteiros) e posição do pacote equivalente para cada pacote TCP
     def getTcpKeys(self):
-        tcpKeys = {}
-        for pkt in self.getPackets():
+        tcpKeys = self.newKeyTable()
+        for i, pkt in enumerate(self.getPackets()):
             if TCP in pkt:
                 key = (
-                    IpAnalyzer.getSrcIp(pkt),
-                    IpAnalyzer.getDstIp(pkt),
+                    IpAnalyzer.getSrcIpInt(pkt),
+                    IpAnalyzer.getDstIpInt(pkt),
                     self.getTcpSport(pkt),
                     self.getTcpDport(pkt),
                     self.getTcpSeq(pkt)
                 )
-                tcpKeys[key] = pkt
+                tcpKeys.add(key, i)
 
         return tcpKeys
     
-    # retorna pacote filtrado por chave
+    # retorna pacote filtrado por chave, endereços como string ou inteiro
     # override
     def getPacketByKey(self, key):
-        return self.getTcpKeys().get(key)
+        src, dst = (ipToInt(address) if isinstance(address, str) else address for address in key[:2])
+
+        position = self.getTcpKeys().get((src, dst) + tuple(key[2:]))
+
+        return self.getPacket(position) if position is not None else None
     
     # retorna estatísticas de RTT baseado no handshake SYN ↔ SYN+ACK
     # override
@@ -91,12 +131,13 @@ class TcpAnalyzer(PacketAnalyzer):
         # dicionário para armazenar timestamp de SYNs:
         synTimes = {}
         rtts = []
+        histogram = Histogram.forTimes() # preenchido a cada rtt calculado
 
         for pkt in self.getPackets():
             if TCP in pkt:
                 flags = self.getTcpFlags(pkt)
-                src = IpAnalyzer.getSrcIp(pkt)
-                dst = IpAnalyzer.getDstIp(pkt)
+                src = IpAnalyzer.getSrcIpInt(pkt)
+                dst = IpAnalyzer.getDstIpInt(pkt)
                 sport = self.getTcpSport(pkt)
                 dport = self.getTcpDport(pkt)
                 seq = self.getTcpSeq(pkt)
@@ -104,7 +145,7 @@ class TcpAnalyzer(PacketAnalyzer):
                 # SYN sem ACK
                 if flags == "S":
                     key = (src, dst, sport, dport, seq)
-                    synTimes[key] = self.getTime(pkt)
+                    synTimes[key] = self.getTimeNs(pkt)
 
                 # SYN+ACK
                 elif flags == "SA":
@@ -113,8 +154,9 @@ class TcpAnalyzer(PacketAnalyzer):
                     # chave reversa do SYN original
                     revKey = (dst, src, dport, sport, ackNum)
                     if revKey in synTimes:
-                        rtt = self.getTimeDiff(self.getPacketByKey(revKey), pkt)
+                        rtt = (self.getTimeNs(pkt) - synTimes[revKey]) / 1e6
                         rtts.append(rtt)
+                        histogram.add(rtt)
 
         mean = np.mean(rtts) if rtts else 0
         std = np.std(rtts) if rtts else 0
@@ -125,6 +167,7 @@ class TcpAnalyzer(PacketAnalyzer):
 
         return {
             "rtts": rtts,
+            "histogram": histogram,
             "mean": mean,
             "std": std,
             "max": maximum,
@@ -143,9 +186,9 @@ class TcpAnalyzer(PacketAnalyzer):
         syn_times = []
         for pkt in self.getPackets():
             if TCP in pkt and self.getTcpFlags(pkt) == "S":
-                syn_times.append(self.getTime(pkt))
+                syn_times.append(self.getTimeNs(pkt))
 
-        intervals = np.diff(np.array(syn_times)) if len(syn_times) > 1 else np.array([])
+        intervals = np.diff(np.array(syn_times, dtype=np.int64)) / 1e6 if len(syn_times) > 1 else np.array([]) # ns -> ms
         mean = np.mean(intervals) if intervals.size > 0 else 0
         std = np.std(intervals) if intervals.size > 0 else 0
         maximum = np.max(intervals) if intervals.size > 0 else 0
@@ -155,6 +198,7 @@ class TcpAnalyzer(PacketAnalyzer):
 
         return {
             "intervals": intervals,
+            "histogram": Histogram.forTimes().fill(intervals),
             "mean": mean,
             "std": std,
             "max": maximum,
@@ -167,22 +211,26 @@ class TcpAnalyzer(PacketAnalyzer):
     # override
     def getLossStats(self):
         total = 0
-        seq_counts = {}
+        seq_counts = self.newKeyTable(operator.add)
         for pkt in self.getPackets():
             if TCP in pkt:
                 total += 1
                 key = (
-                    IpAnalyzer.getSrcIp(pkt),
-                    IpAnalyzer.getDstIp(pkt),
+                    IpAnalyzer.getSrcIpInt(pkt),
+                    IpAnalyzer.getDstIpInt(pkt),
                     pkt[TCP].sport,
                     pkt[TCP].dport,
                     pkt[TCP].seq
                 )
-                seq_counts[key] = seq_counts.get(key, 0) + 1
-
-        # retransmissões ocorrem quando count > 1 para um mesmo key
-        retransmissions = sum(count - 1 for count in seq_counts.values() if count > 1)
-        received_unique = len(seq_counts)
+                seq_counts.add(key, 1)
+
+        # retransmissões ocorrem quando count > 1 para um mesmo key, contagens lidas em uma única passada (merge externo)
+        retransmissions = 0
+        received_unique = 0
+        for count in seq_counts.values():
+            retransmissions += count - 1
+            received_unique += 1
+        seq_counts.close()
         loss_rate = (retransmissions * 100) / total if total > 0 else 0
 
         return {
@@ -192,6 +240,112 @@ class TcpAnalyzer(PacketAnalyzer):
             "lossRate": loss_rate
         }
 
+    # estado agregado TCP: SYNs pendentes, números de sequência recentes por fluxo e séries de rtt do handshake e intervalo entre SYNs
+    # tamanho limitado pelos fluxos ativos (não cresce com o total de segmentos da captura)
+    # override
+    def newState(self):
+        state = super().newState()
+        state.update({"synTimes": {}, # SYN sem SYN-ACK -> tempo em ns
+                      "lastSyn": None,
+                      "total": 0,
+                      "unique": 0,
+                      "flows": {}, # (src, dst, sport, dport) -> [tempo do último pacote em ns, {seq: None} dos SEQ_WINDOW mais recentes]
+                      "rtt": self.newSeries(),
+                      "interval": self.newSeries()
+                      })
+
+        return state
+
+    # override
+    def updateState(self, state, pkt):
+        super().updateState(state, pkt)
+
+        if TCP not in pkt:
+            return
+
+        flags = self.getTcpFlags(pkt)
+        src = IpAnalyzer.getSrcIpInt(pkt)
+        dst = IpAnalyzer.getDstIpInt(pkt)
+        sport = self.getTcpSport(pkt)
+        dport = self.getTcpDport(pkt)
+        seq = self.getTcpSeq(pkt)
+        time = self.getTimeNs(pkt)
+        key = (src, dst, sport, dport, seq)
+
+        anomalies = state["anomalies"]
+        flow = state["flows"].setdefault(key[:4], [time, {}])
+        retransmission = seq in flow[1]
+
+        flow[0] = time
+        flow[1][seq] = None
+        if len(flow[1]) > SEQ_WINDOW:
+            del flow[1][next(iter(flow[1]))] # mais antigo
+
+        state["total"] += 1
+        state["unique"] += not retransmission
+        if state["total"] % EXPIRE_PACKETS == 0:
+            self.expireState(state, time)
+
+        if anomalies is not None:
+            anomalies.updateLoss(time, int(retransmission)) # retransmissões seguidas sem segmento novo formam uma rajada
+
+        if flags == "S":
+            state["synTimes"][key] = time
+            if state["lastSyn"] is not None:
+                interval = (time - state["lastSyn"]) / 1e6
+                self.addSample(state["interval"], interval)
+                if anomalies is not None:
+                    anomalies.update("interval", time, interval)
+            state["lastSyn"] = time
+
+        elif flags == "SA":
+            revKey = (dst, src, dport, sport, self.getTcpAck(pkt) - 1)
+            if revKey in state["synTimes"]:
+                rtt = (time - state["synTimes"][revKey]) / 1e6 # SYN-ACK repetido também é medido (mesmo que getRttStats)
+                self.addSample(state["rtt"], rtt)
+                if anomalies is not None:
+                    anomalies.update("rtt", time, rtt)
+
+    # descarta do estado fluxos e SYNs sem pacotes há mais de FLOW_TIMEOUT s
+    @staticmethod
+    def expireState(state, time):
+        limit = time - FLOW_TIMEOUT * 10**9
+        state["flows"] = {key: flow for key, flow in state["flows"].items() if flow[0] >= limit}
+        state["synTimes"] = {key: synTime for key, synTime in state["synTimes"].items() if synTime >= limit}
+
+    # override
+    def getStateMetrics(self, state):
+        metrics = super().getStateMetrics(state)
+        metrics.update(self.getSeriesMetrics("rtt", state["rtt"]))
+        metrics.update(self.getSeriesMetrics("interval", state["interval"]))
+
+        total = state["total"]
+        unique = state["unique"]
+        metrics.update({"loss.totalPackets": total,
+                        "loss.uniquePackets": unique,
+                        "loss.retransmissions": total - unique,
+                        "loss.lossRate": ((total - unique) * 100)/total if total > 0 else 0
+                        })
+
+        return metrics
+
+    # override
+    def getPartial(self, state):
+        partial = super().getPartial(state)
+        del partial["synTimes"], partial["flows"]
+
+        return partial
+
+    # override
+    def mergeState(self, state, other):
+        super().mergeState(state, other)
+        state["total"] += other["total"]
+        state["unique"] += other["unique"]
+        self.mergeSeries(state["rtt"], other["rtt"])
+        self.mergeSeries(state["interval"], other["interval"])
+
+        return state
+
     # imprime métricas TCP
     # override
     def printGeneralMetrics(self):
@@ -204,7 +358,7 @@ class TcpAnalyzer(PacketAnalyzer):
 
         print("TCP keys (src, dst, sport, dport, seq):")
         for key in keys:
-            print(key)
+            print((intToIp(key[0]), intToIp(key[1])) + key[2:])
 
         return super().printGeneralMetrics(id, totalPackets, totalBytes, layers, throughput)
 
@@ -234,6 +388,12 @@ class TcpAnalyzer(PacketAnalyzer):
 
         return super().printIntervalMetrics(layer, mean, std, maximum, minimum, error, cv)
 
+    # override
+    def printBootstrapMetrics(self, bootstrap=None):
+        layer = "TCP"
+        for name, intervals in self.getBootstrapStats(bootstrap).items():
+            super().printBootstrapMetrics(layer, SERIES_NAMES[name], intervals)
+
     # override
     def printLossMetrics(self):
         layer = "TCP"
@@ -279,7 +439,7 @@ class TcpAnalyzer(PacketAnalyzer):
     # override
     def plotRttHistogram(self, path):
         id = self.getId()
-        rtts = self.getRttStats().get("rtts")
+        rtts = self.getRttStats().get("histogram")
         title = None
         xLabel = "RTT (ms)"
         yLabel = "Frequency"
@@ -288,7 +448,7 @@ class TcpAnalyzer(PacketAnalyzer):
     # override
     def plotIntervalHistogram(self, path):
         id = self.getId()
-        intervals = self.getIntervalStats().get("intervals")
+        intervals = self.getIntervalStats().get("histogram")
         title = None
         xLabel = "Interval (ms)"
         yLabel = "Frequency"
@@ -1,4 +1,5 @@
 from analyzer.icmp_analyzer import IcmpAnalyzer
+from analyzer.graph_plotter import GraphPlotter
 
 # imprime métricas e salva gráficos de todas capturas da lista
 def makeAllOutput(captures):
@@ -12,6 +13,7 @@ def makeAllOutput(captures):
         captures[i].printIntervalJitterMetrics()
         captures[i].printLossMetrics()
 
+        captures[i].deferGraphs() # gráficos renderizados em lote no final
         captures[i].plotLayersGraph(path)
         captures[i].plotRttGraph(path)
         captures[i].plotIntervalGraph(path)
@@ -24,6 +26,13 @@ def makeAllOutput(captures):
         captures[i].plotLossGraph(path)
         captures[i].plotLossRateGraph(path)
 
+    # renderiza gráficos de todas capturas em processos paralelos
+    jobs = []
+    for capture in captures:
+        jobs += capture.getGraphJobs()
+
+    GraphPlotter.renderJobs(jobs)
+
 if __name__ == "__main__":
 
     path1 = "capture/h1-h3.pcap"
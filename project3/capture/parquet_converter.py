@@ -1,34 +1,41 @@
 import pandas as pd
 from scapy.all import PcapReader
 
-# leitura PCAP e extração dos campos
-records = [] # lista de dicionarios com registros de pacotes
+# mapeia número de protocolo para nome
+protoMap = {6: "TCP", 17: "UDP", 1: "ICMP"}
+
+# leitura PCAP e extração dos campos, uma lista por coluna
+timestamps = [] # timestamp em ns desde epoch
+sizes = [] # tamanho do pacote em bytes
+types = [] # nome do protocolo
+sports = [] # porta de origem TCP/UDP
+dports = [] # porta de destino TCP/UDP
 packets = PcapReader("200701011800.dump")
 
 for pkt in packets:
-    ts = pkt.time # timestamp
-    length = len(pkt) # tamanho do pacote em bytes
     protoNum = pkt["IP"].proto if pkt.haslayer("IP") else None # número do protocolo
+    transport = pkt["IP"].payload if protoNum in (6, 17) else None # camada TCP/UDP
 
-    # mapeia número de protocolo para nome
-    protoMap = {6: "TCP", 17: "UDP", 1: "ICMP"}
-    protoName = protoMap.get(protoNum, str(protoNum) if protoNum is not None else None) # nome do protocolo
+    timestamps.append(int(pkt.time * 10**9)) # sem passar por float, mantém resolução de ns
+    sizes.append(len(pkt))
+    types.append(protoMap.get(protoNum, str(protoNum) if protoNum is not None else None))
+    sports.append(getattr(transport, "sport", None))
+    dports.append(getattr(transport, "dport", None))
 
-    records.append({
-        "timestamp": ts,
-        "size": length,
-        "type": protoName,
-    })
+packets.close()
 
-# cria DataFrame e converte timestamp
-df = pd.DataFrame(records) # converte em dataframe, cada dicionario é uma linha com valores e cada chave é uma coluna
-df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce') # converte string para float
-df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")  # converte de epoch
+# cria DataFrame com tipos compactos: timestamp nativo, protocolo como categoria (dicionário no parquet),
+# tamanho e portas com a menor largura de inteiro
+df = pd.DataFrame({
+    "timestamp": pd.to_datetime(timestamps, unit="ns"),
+    "size": pd.to_numeric(pd.Series(sizes), downcast="unsigned"),
+    "type": pd.Categorical(types),
+    "sport": pd.array(sports, dtype="UInt16"), # nulo em pacotes sem TCP/UDP
+    "dport": pd.array(dports, dtype="UInt16"),
+})
 
 # filtra somente pacotes que interessam
 #df = df[df["type"].isin(["TCP","UDP"])]
 
 # grava em parquet com pyarrow
 df.to_parquet("capture.parquet", engine="pyarrow", compression="snappy", index=False)
-
-packets.close()
@@ -14,8 +14,13 @@ print(df.head(10))
 print("\nTipos de dados por coluna:")
 print(df.dtypes)
 
-# Converter para datetime se ainda não estiver
-df['timestamp'] = pd.to_datetime(df['timestamp'])
+# Arquivos gerados por versões antigas do conversor: converter uma única vez para os tipos compactos
+if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+if df['type'].dtype == object:
+    df['type'] = df['type'].astype('category')
+if df['size'].dtype == 'int64':
+    df['size'] = pd.to_numeric(df['size'], downcast='unsigned')
 '''
 # Criar gráfico de distribuição do tamanho dos pacotes por tipo de protocolo
 plt.figure(figsize=(10, 6), dpi=300)
@@ -53,15 +58,16 @@ def graficar_tcp(df, output_file='tcp_tamanho_distribuicao.png'):
         print("❌ O DataFrame não contém as colunas necessárias.")
         return
 
-    df_tcp = df[df['type'] == 'TCP']
+    # Somente a coluna de tamanhos dos pacotes TCP (sem copiar o DataFrame inteiro)
+    tcp_sizes = df.loc[df['type'] == 'TCP', 'size']
 
-    if df_tcp.empty:
+    if tcp_sizes.empty:
         print("Nenhum pacote TCP encontrado no DataFrame.")
         return
 
     # Gerar gráfico
     plt.figure(figsize=(10, 6), dpi=300)
-    plt.hist(df_tcp['size'], bins=50, color='skyblue', edgecolor='black', alpha=0.7)
+    plt.hist(tcp_sizes, bins=50, color='skyblue', edgecolor='black', alpha=0.7)
     plt.title("Distribuição do tamanho dos pacotes TCP")
     plt.xlabel("Tamanho do pacote (bytes)")
     plt.ylabel("Frequência")
@@ -72,8 +78,5 @@ def graficar_tcp(df, output_file='tcp_tamanho_distribuicao.png'):
     print(f"Gráfico TCP salvo como: {output_file}")
 
 
-# Garantir que a coluna timestamp está no formato datetime, se necessário
-df['timestamp'] = pd.to_datetime(df['timestamp'])
-
 # Chamar a função para gerar gráfico apenas para pacotes TCP
 #graficar_tcp(df)
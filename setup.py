@@ -4,4 +4,8 @@ setup(
   name="analyzer",
   version="0.1",
   packages=find_packages(),
+  entry_points={
+    # comando analyzer: analisa capturas e gera métricas em json/csv/parquet
+    "console_scripts": ["analyzer=analyzer.cli:main"],
+  },
 )
@@ -0,0 +1,68 @@
+import random
+import pytest
+from scapy.layers.l2 import Ether
+from scapy.layers.inet import IP, ICMP, TCP
+from scapy.packet import Raw
+from scapy.utils import wrpcap
+
+# início das capturas de teste (epoch s)
+START = 1_700_000_000
+
+# pings de 10.0.0.1 para 10.0.0.3 a cada 0.1 s, uma resposta perdida a cada 17 requisições
+def makePings(count=200, start=START, seed=1):
+    rng = random.Random(seed)
+    packets = []
+
+    for seq in range(count):
+        request = Ether()/IP(src="10.0.0.1", dst="10.0.0.3")/ICMP(type=8, id=7, seq=seq)/Raw(b"x" * 56)
+        request.time = start + seq * 0.1
+        packets.append(request)
+
+        if seq % 17 != 5:
+            reply = Ether()/IP(src="10.0.0.3", dst="10.0.0.1")/ICMP(type=0, id=7, seq=seq)/Raw(b"x" * 56)
+            reply.time = request.time + 0.002 + rng.random() * 0.001
+            packets.append(reply)
+
+    return packets
+
+# conexões TCP de 10.0.0.1 para 10.0.0.2:8080 a cada 0.2 s: handshake, segments segmentos de dados e um segmento retransmitido
+# a cada 5 conexões
+def makeConnections(count=100, segments=3, start=START, seed=1):
+    rng = random.Random(seed)
+    packets = []
+
+    for n in range(count):
+        sport, seq = 40000 + n, 1000 * n + 1
+        time = start + n * 0.2
+        syn = Ether()/IP(src="10.0.0.1", dst="10.0.0.2")/TCP(sport=sport, dport=8080, flags="S", seq=seq)
+        syn.time = time
+        synAck = Ether()/IP(src="10.0.0.2", dst="10.0.0.1")/TCP(sport=8080, dport=sport, flags="SA", seq=5000, ack=seq + 1)
+        synAck.time = time + 0.0005 + rng.random() * 0.0003
+        packets += [syn, synAck]
+
+        for i in range(segments):
+            data = Ether()/IP(src="10.0.0.1", dst="10.0.0.2")/TCP(sport=sport, dport=8080, flags="PA", seq=seq + 1 + 100 * i,
+                                                                 ack=5001)/Raw(b"d" * 100)
+            data.time = synAck.time + 0.001 * (i + 1)
+            packets.append(data)
+
+            if n % 5 == 0 and i == 0:
+                retransmission = data.copy()
+                retransmission.time = data.time + 0.0005
+                packets.append(retransmission)
+
+    return sorted(packets, key=lambda pkt: pkt.time)
+
+# grava pacotes em captura .pcap (append = acrescenta ao final, captura em crescimento)
+def writeCapture(path, packets, append=False):
+    wrpcap(str(path), packets, append=append)
+
+    return str(path)
+
+@pytest.fixture
+def icmpCapture(tmp_path):
+    return writeCapture(tmp_path / "icmp.pcap", makePings())
+
+@pytest.fixture
+def tcpCapture(tmp_path):
+    return writeCapture(tmp_path / "tcp.pcap", makeConnections())
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from analyzer.bootstrap import Bootstrap
+
+def test_noSamplesHasNoIntervals():
+    assert Bootstrap(resamples=100).getIntervals([]) is None
+
+def test_seedIsReproducible():
+    data = np.random.default_rng(1).exponential(size=300)
+
+    assert Bootstrap(resamples=500, seed=7, workers=1).getIntervals(data) == Bootstrap(resamples=500, seed=7, workers=1).getIntervals(data)
+
+def test_intervalsContainEstimates():
+    data = np.random.default_rng(2).lognormal(size=1000)
+    intervals = Bootstrap(resamples=1000, seed=1, workers=1).getIntervals(data)
+
+    assert intervals["method"] == "exact"
+    for name in ("mean", "median", "p99"):
+        assert intervals[f"{name}.low"] <= intervals[name] <= intervals[f"{name}.high"]
+    assert intervals["mean"] == pytest.approx(np.mean(data))
+
+def test_meanIntervalCoverage():
+    rng = np.random.default_rng(3)
+    trials, covered = 100, 0
+
+    for trial in range(trials):
+        intervals = Bootstrap(resamples=500, seed=trial, workers=1).getIntervals(rng.exponential(size=200)) # média 1
+        covered += intervals["mean.low"] <= 1.0 <= intervals["mean.high"]
+
+    assert covered / trials > 0.85
+
+def test_binnedMatchesExact():
+    data = np.random.default_rng(4).lognormal(size=20000)
+    exact = Bootstrap(resamples=2000, seed=1, workers=1).getIntervals(data)
+    binned = Bootstrap(resamples=2000, seed=1, workers=1, exactLimit=0).getIntervals(data)
+
+    assert binned["method"] == "binned"
+    for name in ("mean", "median", "p99"):
+        width = exact[f"{name}.high"] - exact[f"{name}.low"]
+        assert binned[name] == exact[name]
+        assert binned[f"{name}.low"] == pytest.approx(exact[f"{name}.low"], abs=0.25 * width)
+        assert binned[f"{name}.high"] == pytest.approx(exact[f"{name}.high"], abs=0.25 * width)
+
+def test_binsKeepDistinctValues():
+    data = np.repeat([0.5, 1.0, 2.0], [10, 20, 30])
+    values, counts = Bootstrap(bins=16).getBins(data)
+
+    assert np.array_equal(values, [0.5, 1.0, 2.0])
+    assert np.array_equal(counts, [10, 20, 30])
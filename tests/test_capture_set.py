@@ -0,0 +1,87 @@
+import pickle
+import numpy as np
+import pytest
+from conftest import makePings, makeConnections, writeCapture
+from analyzer.capture_set import CaptureSet
+from analyzer.icmp_analyzer import IcmpAnalyzer
+from analyzer.tcp_analyzer import TcpAnalyzer
+from analyzer.histogram import Histogram
+
+ANALYZERS = [(IcmpAnalyzer, makePings), (TcpAnalyzer, makeConnections)]
+
+# métricas que não dependem da continuidade entre capturas (intervalos e jitter entre a última amostra de uma captura e a
+# primeira da seguinte não são combinados)
+MERGED_KEYS = ["totalPackets", "totalBytes", "totalTime", "throughput", "rtt.n", "rtt.mean", "rtt.std", "rtt.min", "rtt.max",
+               "rtt.p50", "rtt.p90", "rtt.p99"]
+
+# retorna True se o pacote é resposta (echo reply ou SYN-ACK)
+def isReply(pkt):
+    return pkt.haslayer("ICMP") and pkt["ICMP"].type == 0 or pkt.haslayer("TCP") and pkt["TCP"].flags == "SA"
+
+# divide pacotes em partes sem separar pares requisição/resposta (corte antes de um pacote que não é resposta)
+def splitPackets(packets, parts):
+    cuts = [0]
+    for n in range(1, parts):
+        cut = len(packets) * n // parts
+        while isReply(packets[cut]):
+            cut += 1
+        cuts.append(cut)
+
+    return [packets[start:end] for start, end in zip(cuts, cuts[1:] + [len(packets)])]
+
+@pytest.mark.parametrize("analyzerClass, makePackets", ANALYZERS)
+def test_mergedPartialsMatchFullCapture(tmp_path, analyzerClass, makePackets):
+    packets = makePackets()
+    paths = [writeCapture(tmp_path / f"part{n}.pcap", part) for n, part in enumerate(splitPackets(packets, 3))]
+    full = writeCapture(tmp_path / "full.pcap", packets)
+
+    summary = CaptureSet(analyzerClass, paths, cacheDir=str(tmp_path / "cache"), workers=1).getSummary()
+    capture = analyzerClass(id="full", path=full, index=True)
+    expected = capture.getStateMetrics(capture.getState())
+
+    for key in MERGED_KEYS + [key for key in expected if key.startswith(("layers.", "loss."))]:
+        assert summary[key] == pytest.approx(expected[key]), key
+
+@pytest.mark.parametrize("analyzerClass, makePackets", ANALYZERS)
+def test_cachedPartialsMatchComputed(tmp_path, analyzerClass, makePackets):
+    paths = [writeCapture(tmp_path / f"part{n}.pcap", part) for n, part in enumerate(splitPackets(makePackets(), 2))]
+    cacheDir = str(tmp_path / "cache")
+
+    computed = CaptureSet(analyzerClass, paths, cacheDir=cacheDir, workers=1)
+    computed.getPartials()
+    cached = CaptureSet(analyzerClass, paths, cacheDir=cacheDir, workers=1)
+
+    assert all(cached.loadPartial(path) is not None for path in paths)
+    assert cached.getTable() == computed.getTable()
+    assert cached.getSummary() == computed.getSummary()
+
+@pytest.mark.parametrize("analyzerClass, makePackets, pending", [(IcmpAnalyzer, makePings, ("requests", "received")),
+                                                                (TcpAnalyzer, makeConnections, ("synTimes", "flows"))])
+def test_partialsDropPendingTables(tmp_path, analyzerClass, makePackets, pending):
+    path = writeCapture(tmp_path / "capture.pcap", makePackets())
+    captureSet = CaptureSet(analyzerClass, [path], cacheDir=str(tmp_path / "cache"), workers=1)
+    partial = captureSet.getPartials()[path]
+
+    assert not any(key in partial for key in pending)
+    assert len(pickle.dumps(partial)) < 4096
+
+def test_histogramPickleKeepsCountsAndBins():
+    histogram = Histogram.forTimes().fill([1e-5, 0.3, 1.0, 5.0, 5.0, 2e6])
+    restored = pickle.loads(pickle.dumps(histogram))
+
+    assert np.array_equal(restored.edges, histogram.edges)
+    assert np.array_equal(restored.counts, histogram.counts)
+    assert (restored.underflow, restored.overflow, restored.n) == (histogram.underflow, histogram.overflow, histogram.n)
+    assert restored.getQuantile(0.5) == histogram.getQuantile(0.5)
+    assert len(pickle.dumps(histogram)) < len(pickle.dumps(histogram.toDict()))
+
+def test_mergedHistogramMatchesSingleFill():
+    values = np.random.default_rng(1).lognormal(size=300)
+    merged = Histogram.forTimes()
+    for part in np.array_split(values, 3):
+        merged.merge(pickle.loads(pickle.dumps(Histogram.forTimes().fill(part))))
+
+    full = Histogram.forTimes().fill(values)
+
+    assert np.array_equal(merged.counts, full.counts)
+    assert merged.getQuantile(0.99) == full.getQuantile(0.99)
@@ -0,0 +1,73 @@
+import pytest
+from scapy.layers.inet import IP
+from conftest import makePings, makeConnections, writeCapture, START
+from analyzer.icmp_analyzer import IcmpAnalyzer
+from analyzer.tcp_analyzer import TcpAnalyzer
+from analyzer.tcp_analyzer.tcp_analyzer import SEQ_WINDOW, FLOW_TIMEOUT, EXPIRE_PACKETS
+from analyzer.prefix_trie.prefix_trie import ipToInt
+
+ANALYZERS = [(IcmpAnalyzer, makePings), (TcpAnalyzer, makeConnections)]
+
+# métricas de uma passada pela captura inteira (estado agregado sem follow)
+def getFullMetrics(analyzerClass, path):
+    capture = analyzerClass(id="capture", path=path, index=True)
+
+    return capture.getStateMetrics(capture.getState())
+
+@pytest.mark.parametrize("analyzerClass, makePackets", ANALYZERS)
+def test_followResumeMatchesFullRun(tmp_path, analyzerClass, makePackets):
+    packets = makePackets()
+    path = writeCapture(tmp_path / "growing.pcap", packets[:len(packets) * 3 // 5])
+
+    analyzerClass(id="capture", path=path).follow() # checkpoint no meio de pares requisição/resposta
+    writeCapture(path, packets[len(packets) * 3 // 5:], append=True)
+    resumed = analyzerClass(id="capture", path=path).follow()
+
+    assert resumed == getFullMetrics(analyzerClass, path)
+
+@pytest.mark.parametrize("analyzerClass, makePackets", ANALYZERS)
+def test_followWithoutNewPacketsKeepsMetrics(tmp_path, analyzerClass, makePackets):
+    path = writeCapture(tmp_path / "capture.pcap", makePackets())
+    first = analyzerClass(id="capture", path=path).follow()
+
+    assert analyzerClass(id="capture", path=path).follow() == first
+
+def test_followRestartsOnRotatedCapture(tmp_path):
+    path = writeCapture(tmp_path / "capture.pcap", makePings(100))
+    IcmpAnalyzer(id="capture", path=path).follow()
+
+    writeCapture(path, makePings(50, start=START + 3600)) # nova captura no mesmo caminho
+    metrics = IcmpAnalyzer(id="capture", path=path).follow()
+
+    assert metrics["loss.sent"] == 50
+
+def test_followMatchesSummary(icmpCapture):
+    metrics = IcmpAnalyzer(id="capture", path=icmpCapture).follow()
+    summary = IcmpAnalyzer(id="capture", path=icmpCapture).getSummary(rtt=True, loss=True, layers=True)
+
+    for key in ("totalPackets", "totalBytes", "rtt.n", "rtt.min", "rtt.max", "loss.sent", "loss.received", "layers.ICMP"):
+        assert metrics[key] == pytest.approx(summary[key])
+
+def test_tcpStateKeepsRecentSequenceNumbers(tcpCapture):
+    capture = TcpAnalyzer(id="capture", path=tcpCapture, index=True)
+    state = capture.getState()
+    summary = capture.getSummary(loss=True)
+
+    assert state["total"] - state["unique"] == summary["loss.retransmissions"]
+    assert all(len(flow[1]) <= SEQ_WINDOW for flow in state["flows"].values())
+
+def test_tcpStateExpiresIdleFlows(tmp_path):
+    idle = makeConnections(10)
+    for pkt in idle: # conexões de outro cliente, sem pacotes depois da primeira rajada
+        if pkt[IP].src == "10.0.0.1":
+            pkt[IP].src = "10.0.0.9"
+        else:
+            pkt[IP].dst = "10.0.0.9"
+
+    path = writeCapture(tmp_path / "capture.pcap", idle + makeConnections(EXPIRE_PACKETS // 5, start=START + 2 * FLOW_TIMEOUT))
+    state = TcpAnalyzer(id="capture", path=path, index=True).getState()
+    client = ipToInt("10.0.0.9")
+
+    assert state["total"] > EXPIRE_PACKETS
+    assert not any(client in key[:2] for key in state["flows"])
+    assert not any(client in key[:2] for key in state["synTimes"])
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from conftest import makePings, makeConnections, writeCapture, START
+from analyzer.sampler import Sampler
+from analyzer.packet_analyzer import PacketAnalyzer
+from analyzer.icmp_analyzer import IcmpAnalyzer
+from analyzer.tcp_analyzer import TcpAnalyzer
+
+# pings e conexões TCP intercalados no tempo
+def makeMixed():
+    return sorted(makePings() + makeConnections(start=START + 0.05), key=lambda pkt: pkt.time)
+
+def test_reprAndNewKeepOnlyConfiguration():
+    sampler = Sampler("random", rate=0.3, seed=4)
+    sampler.select(np.arange(100), np.arange(100) * 10**6)
+    copy = sampler.new()
+
+    assert repr(copy) == repr(sampler)
+    assert "0x" not in repr(sampler)
+    assert copy.populationSize == 0 and copy.sampleSize == 0
+
+def test_systematicSelectsEveryNth():
+    sampler = Sampler("systematic", every=4)
+    sample = sampler.select(np.arange(100), np.arange(100) * 10**6)
+
+    assert np.array_equal(sample, np.arange(0, 100, 4))
+    assert sampler.getSamplingRate() == 0.25
+
+def test_keyedSamplingKeepsWholeClusters():
+    keys = np.repeat(np.arange(500), 2) # pares de registros com a mesma chave
+    sampler = Sampler("random", rate=0.2, seed=1)
+    sample = sampler.select(np.arange(1000), np.arange(1000) * 10**6, keys)
+
+    assert len(sample) % 2 == 0
+    assert np.array_equal(sample[0::2] + 1, sample[1::2])
+
+@pytest.mark.parametrize("method, options", [("random", {"rate": 0.2}), ("systematic", {"every": 5})])
+def test_keyedTotalIsUnbiasedWithCoverage(method, options):
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(1, 6, size=400) # conglomerados de 1 a 5 registros
+    keys = np.repeat(np.arange(400), sizes)
+    values = rng.integers(60, 1500, size=len(keys)).astype(float)
+    indexes = np.arange(len(keys))
+    estimates, covered = [], 0
+
+    for seed in range(200):
+        sampler = Sampler(method, seed=seed, **options)
+        sample = sampler.select(indexes, indexes * 10**6, (keys * 2654435761 + seed * 97) % 2**32) # chaves diferentes por rodada
+        estimate, low, high = sampler.estimateTotal(values[sample], positions=sample)
+        estimates.append(estimate)
+        covered += low <= values.sum() <= high
+
+    assert np.mean(estimates) == pytest.approx(values.sum(), rel=0.02)
+    assert covered / 200 > 0.88
+
+def test_packetTotalIsUnbiased():
+    values = np.random.default_rng(2).integers(60, 1500, size=2000).astype(float)
+    indexes = np.arange(len(values))
+    estimates = []
+
+    for seed in range(100):
+        sampler = Sampler("random", rate=0.1, seed=seed)
+        sample = sampler.select(indexes, indexes * 10**6)
+        estimates.append(sampler.estimateTotal(values[sample])[0])
+
+    assert np.mean(estimates) == pytest.approx(values.sum(), rel=0.02)
+
+def test_timeSamplingVarianceFollowsSlices():
+    times = np.arange(1000) * 10**7 # 100 pacotes por fatia de 1 s
+    sampler = Sampler("time", every=2, sliceTime=1)
+    sample = sampler.select(np.arange(1000), times)
+    estimate, low, high = sampler.estimateTotal(np.ones(len(sample)), times[sample])
+
+    assert estimate == 1000 and low == high == 1000 # fatias iguais, sem variação entre fatias vizinhas
+
+def test_meanWithoutSamplesIsNone():
+    sampler = Sampler("systematic", every=2)
+
+    assert sampler.estimateMean([]) is None
+    assert sampler.estimateMean([1.0, 3.0])[0] == 2.0
+
+@pytest.mark.parametrize("analyzerClass, makePackets", [(IcmpAnalyzer, makePings), (TcpAnalyzer, makeConnections)])
+@pytest.mark.parametrize("every", [2, 4])
+def test_pairSamplingKeepsRtt(tmp_path, analyzerClass, makePackets, every):
+    path = writeCapture(tmp_path / "capture.pcap", makePackets())
+    full = analyzerClass(id="capture", path=path).getSummary(rtt=True)
+    summary = analyzerClass(id="capture", path=path, sampler=Sampler("systematic", every=every)).getSummary(rtt=True)
+
+    assert summary["rtt.n"] > 0
+    assert summary["rtt.mean.low"] <= summary["rtt.mean"] <= summary["rtt.mean.high"]
+    assert summary["rtt.mean"] == pytest.approx(full["rtt.mean"], rel=0.2)
+
+def test_rttOmittedWithoutSampledPairs(tmp_path):
+    path = writeCapture(tmp_path / "capture.pcap", makePings(20))
+    summary = IcmpAnalyzer(id="capture", path=path, sampler=Sampler("random", rate=1e-6, seed=1)).getSummary(rtt=True)
+
+    assert summary["sampling.packets"] == 0
+    assert not any(key.startswith("rtt.") for key in summary)
+
+def test_totalsAreExactWithoutFilter(tmp_path):
+    path = writeCapture(tmp_path / "capture.pcap", makeMixed())
+    full = PacketAnalyzer(id="capture", path=path).getSummary()
+    summary = PacketAnalyzer(id="capture", path=path, sampler=Sampler("time", every=4, sliceTime=1)).getSummary()
+
+    for key in ("totalPackets", "totalBytes", "throughput"):
+        assert summary[key] == pytest.approx(full[key])
+        assert f"{key}.low" not in summary
+
+def test_filteredTotalsAreEstimated(tmp_path):
+    path = writeCapture(tmp_path / "capture.pcap", makeMixed())
+    tcpPackets = TcpAnalyzer(id="capture", path=path, packetFilter=True).getTotalPackets()
+    summary = TcpAnalyzer(id="capture", path=path, packetFilter=True, sampler=Sampler("random", rate=0.5, seed=3)).getSummary()
+
+    assert summary["totalPackets.low"] <= tcpPackets <= summary["totalPackets.high"]